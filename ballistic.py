@@ -0,0 +1,232 @@
+#coding=utf-8
+"""
+弹道估计：常加速度卡尔曼滤波，按轨迹点的硬件时间戳更新，飞行中预测飞镖越过落点参考线的位置和时间
+  - 状态为 [位置, 速度, 加速度]，x、y两个方向模型和噪声相同，共用一个3x3协方差（状态为3x2矩阵）；
+    过程噪声为白噪声加加速度（jerk）模型，帧间隔不固定（丢帧、跟踪ROI切换）时按实际 dt 预测
+  - crossing(line_y) 由当前状态解 y(t) = line_y，飞行中每帧都能得到预测落点，不必等飞镖进入参考线附近的阈值带；
+    同时给出预测位置的标准差（协方差沿外推时间传播），调用方据此决定预测是否可用
+  - 最新一个点已经越过参考线时，在上一个点和这个点之间求交点（帧间插值），落点是参考线上的点，与帧率无关；
+    点数不够 min_points 时用最近两点的直线插值（轨迹结束时还没越线则直线外推）
+BallisticFit 用增量最小二乘抛物线拟合（trajectory_fit.IncrementalPolyFit，可指数遗忘）代替卡尔曼滤波，外推和插值相同
+坐标都是显示坐标（浮点），时间为秒
+"""
+import numpy as np
+from trajectory_fit import IncrementalPolyFit
+
+
+class BallisticEstimator(object):
+    """
+    reset() 新轨迹开始时调用，update(t, x, y) 每个轨迹点调用一次，之后读取 predict(t) / crossing(line_y)
+    统计：updates 更新次数、crossings 越线后帧间插值的落点数、forecasts 越线前外推的落点数
+    """
+
+    def __init__(self, jerk=5000.0, measurement_noise=1.0, min_points=4):
+        self.jerk = jerk                            # 加加速度噪声（像素/秒^3），越大越相信新观测
+        self.measurement_noise = measurement_noise  # 中心观测噪声（像素，亚像素细化后约1像素）
+        self.min_points = min_points                # 少于这么多点时不外推（速度、加速度还没收敛）
+        # 初始协方差：位置取观测噪声，速度、加速度取飞镖的量级（像素/秒、像素/秒^2）
+        self._p0 = np.diag([measurement_noise ** 2, 2000.0 ** 2, 5000.0 ** 2])
+        self.reset()
+        # 统计
+        self.updates = 0
+        self.crossings = 0
+        self.forecasts = 0
+
+    def reset(self):
+        self.state = None       # 3x2：[位置; 速度; 加速度] x [x, y]
+        self.cov = None
+        self.t = None           # 状态对应的时间
+        self.points = 0
+        self.error = float('inf')   # 最近一次 crossing() 预测位置的标准差（像素）
+        self._last = None       # 最近两个观测 (t, x, y)，越线时插值用
+        self._prev = None
+
+    @property
+    def ready(self):
+        return self.points >= self.min_points
+
+    @staticmethod
+    def _transition(dt):
+        return np.array([[1.0, dt, 0.5 * dt * dt],
+                         [0.0, 1.0, dt],
+                         [0.0, 0.0, 1.0]])
+
+    def _process_noise(self, dt):
+        d2 = dt * dt
+        d3 = d2 * dt
+        q = self.jerk * self.jerk
+        return q * np.array([[d3 * d2 / 20.0, d2 * d2 / 8.0, d3 / 6.0],
+                             [d2 * d2 / 8.0, d3 / 3.0, d2 / 2.0],
+                             [d3 / 6.0, d2 / 2.0, dt]])
+
+    def update(self, t, x, y):
+        """加入一个轨迹点（t为硬件时间戳秒，x/y为显示坐标）"""
+        self.updates += 1
+        self.points += 1
+        self._prev, self._last = self._last, (t, x, y)
+        self._filter(t, np.array([x, y], np.float64))
+
+    def _filter(self, t, z):
+        """卡尔曼预测 + 更新，状态推进到t"""
+        if self.state is None:
+            self.state = np.zeros((3, 2))
+            self.state[0] = z
+            self.cov = self._p0.copy()
+            self.t = t
+            return
+        dt = t - self.t
+        if dt > 0:
+            f = self._transition(dt)
+            self.state = f @ self.state
+            self.cov = f @ self.cov @ f.T + self._process_noise(dt)
+            self.t = t
+        # 只观测位置：卡尔曼增益是协方差的第一列
+        gain = self.cov[:, 0] / (self.cov[0, 0] + self.measurement_noise ** 2)
+        self.state += np.outer(gain, z - self.state[0])
+        self.cov -= np.outer(gain, self.cov[0])
+
+    def predict(self, t):
+        """t时刻的预测位置 (x, y)，没有点时为None"""
+        if self.state is None:
+            return None
+        dt = t - self.t
+        p, v, a = self.state
+        return tuple(p + v * dt + 0.5 * a * dt * dt)
+
+    def _spread(self, dt):
+        """外推dt秒后位置的标准差（两个方向相同）"""
+        h = np.array([1.0, dt, 0.5 * dt * dt])
+        return float(np.sqrt(max(0.0, h @ self.cov @ h)))
+
+    def _root(self, line_y, lo, hi):
+        """y(t) = line_y 在 [self.t + lo, self.t + hi] 内最早的解（相对self.t的dt），没有时为None"""
+        p, v, a = self.state[:, 1]
+        c = p - line_y
+        if abs(a) < 1e-9:
+            roots = [-c / v] if abs(v) > 1e-9 else []
+        else:
+            disc = v * v - 2.0 * a * c
+            if disc < 0:
+                return None
+            s = np.sqrt(disc)
+            roots = sorted(((-v - s) / a, (-v + s) / a))
+        for dt in roots:
+            if lo <= dt <= hi:
+                return dt
+        return None
+
+    def _crossed(self, line_y):
+        """最近两个点分在参考线两侧（最新的点已经越过）"""
+        if self._prev is None:
+            return False
+        y0, y1 = self._prev[2], self._last[2]
+        return y0 != y1 and (y0 - line_y) * (y1 - line_y) <= 0
+
+    def crossing(self, line_y, horizon=1.0):
+        """
+        越过参考线 y=line_y 的时间和x：(t, x)，得不到时为None；预测位置的标准差记在 error
+        最新的点已经越过（与上一个点分在参考线两侧）时在两点之间插值，否则在 horizon 秒内外推
+        """
+        self.error = float('inf')
+        if self._last is None:
+            return None
+        t1, x1, y1 = self._last
+        if self._crossed(line_y):
+            t0, x0, y0 = self._prev
+            if self.ready:
+                dt = self._root(line_y, t0 - self.t, t1 - self.t)
+                if dt is not None:
+                    self.error = self._spread(dt)
+                    return self.t + dt, self.predict(self.t + dt)[0]
+            # 点数不够或滤波解不在两点之间：直线插值
+            self.error = self.measurement_noise
+            return self._line(line_y)
+        if not self.ready:
+            return None
+        dt = self._root(line_y, 0.0, horizon)
+        if dt is None:
+            return None
+        self.error = self._spread(dt)
+        return self.t + dt, self.predict(self.t + dt)[0]
+
+    def _line(self, line_y):
+        """最近两点连线与参考线的交点 (t, x)，两点y相同时为None"""
+        t0, x0, y0 = self._prev
+        t1, x1, y1 = self._last
+        if y1 == y0:
+            return None
+        k = (line_y - y0) / (y1 - y0)
+        return t0 + k * (t1 - t0), x0 + k * (x1 - x0)
+
+    def landing(self, line_y, horizon=1.0):
+        """
+        轨迹结束时调用：同 crossing()，点数不够外推时用最近两点直线外推，并计入插值/外推统计；
+        只有一个点时为None
+        """
+        result = self.crossing(line_y, horizon)
+        if result is None and self._prev is not None:
+            result = self._line(line_y)
+        if result is not None:
+            if self._crossed(line_y):
+                self.crossings += 1
+            else:
+                self.forecasts += 1
+        return result
+
+    def summary(self):
+        """统计字符串（打印用）"""
+        return f"更新 {self.updates} 次，落点帧间插值 {self.crossings} 个，越线前外推 {self.forecasts} 个"
+
+
+class BallisticFit(BallisticEstimator):
+    """
+    同 BallisticEstimator，状态由增量最小二乘抛物线拟合得到（每个点O(1)），forgetting < 1 时旧点指数遗忘
+    预测标准差取拟合残差（不小于观测噪声）按参数协方差沿外推时间传播
+    """
+
+    def __init__(self, forgetting=1.0, measurement_noise=1.0, min_points=4):
+        self.fit = IncrementalPolyFit(2, forgetting)
+        super(BallisticFit, self).__init__(0.0, measurement_noise, max(min_points, 3))
+
+    def reset(self):
+        super(BallisticFit, self).reset()
+        self.fit.reset()
+
+    @property
+    def ready(self):
+        """点数够且拟合解得出（时间戳重复等退化输入时不外推）"""
+        return self.points >= self.min_points and self.fit.coefficients is not None
+
+    def _filter(self, t, z):
+        """拟合加点，状态取拟合抛物线在t时刻的位置、速度、加速度"""
+        fit = self.fit
+        fit.add(t, z[0], z[1])
+        self.t = t
+        c = fit.coefficients
+        if c is None:
+            self.state = np.zeros((3, 2))
+            self.state[0] = z
+            return
+        tau = t - fit.t0
+        self.state = np.array([c[0] + c[1] * tau + c[2] * tau * tau, c[1] + 2.0 * c[2] * tau, 2.0 * c[2]])
+
+    def _spread(self, dt):
+        fit = self.fit
+        if fit.coefficients is None:
+            return float('inf')
+        dof = fit.weight - 3
+        variance = self.measurement_noise ** 2
+        if dof > 0:
+            rx, ry = fit.residuals
+            variance = max(variance, (rx * rx + ry * ry) / 2.0 * fit.weight / dof)
+        tau = self.t + dt - fit.t0
+        h = np.array([1.0, tau, tau * tau])
+        return float(np.sqrt(max(0.0, variance * (h @ np.linalg.solve(fit.normal_matrix(), h)))))
+
+    def summary(self):
+        """统计字符串（打印用），附最近一条轨迹的拟合残差"""
+        text = super(BallisticFit, self).summary()
+        residuals = self.fit.residuals
+        if residuals is not None:
+            text += f"，最近一条轨迹拟合残差 x {residuals[0]:.2f} / y {residuals[1]:.2f} 像素"
+        return text
@@ -0,0 +1,107 @@
+#coding=utf-8
+"""
+RAW Bayer 检测路径：跳过软件ISP
+每个2x2 Bayer像素块当作一个半分辨率像素（R、两个G取平均、B），直接得到检测用的半分辨率BGR图，
+代替 CameraImageProcess（去马赛克+颜色+LUT）+ cv2.resize 两个整图步骤
+只有需要显示/录制的帧才用 RawIsp 跑完整ISP
+"""
+import sys
+sys.path.append('python_demo')
+import mvsdk
+import cv2
+import numpy as np
+import platform
+from frame_view import FrameViewCache
+from workspace import DetectionWorkspace
+
+# Bayer格式 -> 2x2块中 R、G1、G2、B 的位置 (行, 列)
+BAYER_LAYOUTS = {
+    mvsdk.CAMERA_MEDIA_TYPE_BAYRG8: ((0, 0), (0, 1), (1, 0), (1, 1)),
+    mvsdk.CAMERA_MEDIA_TYPE_BAYGR8: ((0, 1), (0, 0), (1, 1), (1, 0)),
+    mvsdk.CAMERA_MEDIA_TYPE_BAYGB8: ((1, 0), (0, 0), (1, 1), (0, 1)),
+    mvsdk.CAMERA_MEDIA_TYPE_BAYBG8: ((1, 1), (0, 1), (1, 0), (0, 0)),
+}
+
+# Bayer格式 -> OpenCV去马赛克代码（OpenCV按第二行第二、三个像素命名，与传感器的叫法错开一位）
+BAYER_CV_CODES = {
+    mvsdk.CAMERA_MEDIA_TYPE_BAYRG8: cv2.COLOR_BayerBG2BGR,
+    mvsdk.CAMERA_MEDIA_TYPE_BAYGR8: cv2.COLOR_BayerGB2BGR,
+    mvsdk.CAMERA_MEDIA_TYPE_BAYGB8: cv2.COLOR_BayerGR2BGR,
+    mvsdk.CAMERA_MEDIA_TYPE_BAYBG8: cv2.COLOR_BayerRG2BGR,
+}
+
+
+class BayerHalf(object):
+    """
+    RAW Bayer -> 半分辨率BGR，输出缓冲取自 workspace（不传时自己建一个）
+    白平衡增益取自帧头（fRgain/fGgain/fBgain），mirror=True 时水平镜像（与ISP镜像后的显示坐标一致）
+    """
+
+    def __init__(self, mirror=True, workspace=None):
+        self.mirror = mirror
+        self.workspace = workspace if workspace is not None else DetectionWorkspace()
+
+    def convert(self, raw, FrameHead):
+        """raw: (H, W) uint8 Bayer图，返回 (H/2, W/2, 3) BGR"""
+        layout = BAYER_LAYOUTS.get(FrameHead.uiMediaType)
+        if layout is None:
+            raise ValueError(f"不支持的RAW格式: 0x{FrameHead.uiMediaType:08X}")
+        h, w = raw.shape[0] // 2, raw.shape[1] // 2
+        ws = self.workspace
+        (ry, rx), (g1y, g1x), (g2y, g2x), (by, bx) = layout
+
+        def plane(y0, x0):
+            return raw[y0:y0 + 2 * h:2, x0:x0 + 2 * w:2]
+
+        out = ws.buffer('bayer_half', (h, w, 3))
+        g = ws.buffer('bayer_g', (h, w), np.uint16)
+        out[:, :, 2] = plane(ry, rx)
+        out[:, :, 0] = plane(by, bx)
+        np.add(plane(g1y, g1x), plane(g2y, g2x), out=g, dtype=np.uint16)
+        np.right_shift(g, 1, out=g)
+        out[:, :, 1] = g
+
+        # 白平衡（帧头里没有增益信息时跳过）
+        gains = (FrameHead.fBgain, FrameHead.fGgain, FrameHead.fRgain)
+        if min(gains) > 0 and gains != (1.0, 1.0, 1.0):
+            cv2.multiply(out, gains + (0,), dst=out)
+
+        if self.mirror:
+            return cv2.flip(out, 1, dst=ws.buffer('bayer_mirrored', (h, w, 3)))
+        return out
+
+    def demosaic(self, raw, FrameHead):
+        """
+        RAW Bayer小块 -> 全分辨率BGR（OpenCV双线性去马赛克，白平衡和镜像与 convert 相同），用于全分辨率检测窗口
+        小块的左上角必须在2x2块边界上（Bayer排列与整帧相同）
+        """
+        h, w = raw.shape
+        bgr = cv2.cvtColor(raw, BAYER_CV_CODES[FrameHead.uiMediaType], dst=self.workspace.buffer('bayer_full', (h, w, 3)))
+        gains = (FrameHead.fBgain, FrameHead.fGgain, FrameHead.fRgain)
+        if min(gains) > 0 and gains != (1.0, 1.0, 1.0):
+            cv2.multiply(bgr, gains + (0,), dst=bgr)
+        if self.mirror:
+            return cv2.flip(bgr, 1, dst=self.workspace.buffer('bayer_mirrored', (h, w, 3)))
+        return bgr
+
+
+class RawIsp(object):
+    """对环形缓冲里的RAW帧按需跑完整ISP（只用于显示/录制），输出缓冲复用"""
+
+    def __init__(self, hCamera, buffer_size):
+        self.hCamera = hCamera
+        self.buffer = mvsdk.CameraAlignMalloc(buffer_size, 16)
+        self.views = FrameViewCache()
+        self._flip = (platform.system() == "Windows")
+
+    def process(self, captured):
+        # CameraImageProcess会把帧头改成输出格式，复制一份以免影响RAW帧头
+        FrameHead = captured.head.clone()
+        mvsdk.CameraImageProcess(self.hCamera, captured.buffer, self.buffer, FrameHead)
+        if self._flip:
+            mvsdk.CameraFlipFrameBuffer(self.buffer, FrameHead, 1)
+        return self.views.get(self.buffer, FrameHead)
+
+    def close(self):
+        self.views.clear()
+        mvsdk.CameraAlignFree(self.buffer)
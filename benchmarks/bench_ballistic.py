@@ -0,0 +1,101 @@
+#coding=utf-8
+"""
+落点判定：阈值带（第一个进入参考线上下 landing_threshold 的检测点）vs BallisticEstimator（卡尔曼外推 + 帧间插值）
+vs BallisticFit（增量最小二乘抛物线拟合，外推和插值相同）（不需要相机）
+随机抛物线：从画面顶部以不同初速度、加速度、水平速度飞到参考线（y=420），30~240fps 采样（随机相位），
+中心加高斯噪声（亚像素细化后约0.5像素）；统计每种帧率下
+  - 漏判：飞镖一帧跳过整个阈值带，轨迹不结束
+  - 落点x误差（与真实越线点比较，RMS）、得到落点的时刻相对真实越线时间（负数为提前）
+  - 弹道估计在轨迹结束前给出过可用预测（标准差不超过 max_error）的比例、第一次可用预测比越线提前多少、这次预测的x误差
+用法：python3 benchmarks/bench_ballistic.py [飞镖数] [噪声像素]
+"""
+import sys
+sys.path.append('.')
+import numpy as np
+from ballistic import BallisticEstimator, BallisticFit
+
+LINE_Y = 420.0
+START_Y = 20.0
+THRESHOLD = 20
+MAX_ERROR = 5.0
+RATES = (30, 60, 120, 240)
+
+
+def make_darts(count, rng):
+    """[(vx, vy, ay, x0)]：y(t) = START_Y + vy t + ay t^2 / 2，x(t) = x0 + vx t"""
+    return [(rng.uniform(-300, 300), rng.uniform(200, 1500), rng.uniform(500, 3000), rng.uniform(150, 490))
+            for _ in range(count)]
+
+
+def crossing(dart):
+    vx, vy, ay, x0 = dart
+    t = (-vy + np.sqrt(vy * vy + 2.0 * ay * (LINE_Y - START_Y))) / ay
+    return t, x0 + vx * t
+
+
+def run(darts, fps, noise, rng, make_estimator):
+    stats = {'band': [], 'band_miss': 0, 'landing': [], 'forecast': []}
+    for dart in darts:
+        vx, vy, ay, x0 = dart
+        t_true, x_true = crossing(dart)
+        estimator = make_estimator()
+        band_done = done = False
+        first = None
+        t = rng.uniform(0, 1.0 / fps)
+        while not (band_done and done):
+            x = x0 + vx * t + rng.normal(0, noise)
+            y = START_Y + vy * t + 0.5 * ay * t * t + rng.normal(0, noise)
+            if y > LINE_Y + 200:
+                break
+            # 原来的判定：进入阈值带
+            if not band_done and abs(y - LINE_Y) < THRESHOLD and y >= LINE_Y - THRESHOLD:
+                stats['band'].append((x - x_true, t - t_true))
+                band_done = True
+            # 弹道估计：飞行中预测，进入阈值带或越线时结束
+            estimator.update(t, x, y)
+            if not done:
+                forecast = estimator.crossing(LINE_Y)
+                if forecast is not None and estimator.error <= MAX_ERROR and first is None:
+                    first = (t, forecast[1])
+                if y >= LINE_Y - THRESHOLD:
+                    land = estimator.landing(LINE_Y)
+                    x_land = land[1] if land is not None else x     # 只有一个点时与主程序一样用检测点
+                    stats['landing'].append((x_land - x_true, t - t_true))
+                    if first is not None:
+                        stats['forecast'].append((first[1] - x_true, t_true - first[0]))
+                    done = True
+            t += 1.0 / fps
+        if not band_done:
+            stats['band_miss'] += 1
+    return stats
+
+
+def rms(values):
+    return float(np.sqrt(np.mean(np.square(values)))) if len(values) else float('nan')
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    noise = float(sys.argv[2]) if len(sys.argv) > 2 else 0.5
+    darts = make_darts(count, np.random.default_rng(0))
+    estimators = (('卡尔曼', BallisticEstimator), ('拟合', BallisticFit))
+    print(f"{count} 支飞镖，参考线 y={LINE_Y:.0f}，阈值带 ±{THRESHOLD}，中心噪声 {noise} 像素")
+    print(f"{'帧率':>6}{'方法':>10}{'漏判':>8}{'x误差RMS':>10}{'结果时刻 ms':>12}"
+          f"{'有预测':>8}{'首次预测提前 ms':>16}{'首次预测x误差':>14}")
+    for fps in RATES:
+        for k, (name, make_estimator) in enumerate(estimators):
+            # 每种方法用同样的采样相位和噪声
+            stats = run(darts, fps, noise, np.random.default_rng(fps), make_estimator)
+            if k == 0:
+                band = np.array(stats['band']).reshape(-1, 2)
+                print(f"{fps:>6}{'阈值带':>10}{stats['band_miss'] / count:>8.1%}{rms(band[:, 0]):>10.2f}"
+                      f"{np.mean(band[:, 1]) * 1000:>12.1f}{'-':>8}{'-':>16}{'-':>14}")
+            landing = np.array(stats['landing']).reshape(-1, 2)
+            forecast = np.array(stats['forecast']).reshape(-1, 2)
+            print(f"{fps:>6}{name:>10}{1 - len(landing) / count:>8.1%}{rms(landing[:, 0]):>10.2f}"
+                  f"{np.mean(landing[:, 1]) * 1000:>12.1f}{len(forecast) / count:>8.0%}"
+                  f"{np.mean(forecast[:, 1]) * 1000:>16.1f}{rms(forecast[:, 0]):>14.2f}")
+
+
+if __name__ == '__main__':
+    main()
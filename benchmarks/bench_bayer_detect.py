@@ -0,0 +1,163 @@
+#coding=utf-8
+"""
+RAW Bayer检测路径 vs 现有ISP路径：检测精度对比 + 每帧CPU耗时（不需要相机，需要SDK库；没有SDK库时设置 MVSDK_SIM=synthetic）
+  现有路径：去马赛克（代替CameraImageProcess）-> 镜像 -> resize 1/2 -> HSV阈值
+  RAW路径 ：BayerHalf（2x2像素块直接得到1/2图，含镜像）-> HSV阈值
+输入（回放）：
+  视频文件    - 每帧按BayerGR8重新马赛克，模拟相机RAW输出
+  目录        - 目录下的 *.npy RAW帧（(H, W) uint8，BayerGR8）
+  不指定      - 合成画面：绿灯 + 沿抛物线运动的红色飞镖头
+用法：python3 benchmarks/bench_bayer_detect.py [视频/目录] [帧数]
+"""
+import glob
+import json
+import os
+import sys
+import time
+sys.path.append('python_demo')
+sys.path.append('.')
+import cv2
+import numpy as np
+import mvsdk
+from bayer_detect import BayerHalf
+
+# 与dart_detector.py一致的红色阈值
+RED_RANGES = [(np.array([0, 100, 100]), np.array([10, 255, 255])),
+              (np.array([170, 100, 100]), np.array([180, 255, 255]))]
+
+
+class FakeFrameHead(object):
+    """只包含BayerHalf用到的tSdkFrameHead字段（没有白平衡增益）"""
+    def __init__(self, width, height):
+        self.iWidth = width
+        self.iHeight = height
+        self.uBytes = width * height
+        self.uiMediaType = mvsdk.CAMERA_MEDIA_TYPE_BAYGR8
+        self.fRgain = self.fGgain = self.fBgain = 0.0
+
+
+def load_green_range():
+    try:
+        with open('green_led_config.json', 'r') as f:
+            config = json.load(f)['green_led']
+        return np.array(config['hsv_lower']), np.array(config['hsv_upper'])
+    except (OSError, KeyError, ValueError):
+        return np.array([35, 50, 50]), np.array([85, 255, 255])
+
+
+def mosaic_gr(bgr):
+    """BGR -> BayerGR8（第一行 G R，第二行 B G）"""
+    h, w = bgr.shape[0] & ~1, bgr.shape[1] & ~1
+    raw = np.empty((h, w), np.uint8)
+    raw[0::2, 0::2] = bgr[0:h:2, 0:w:2, 1]
+    raw[0::2, 1::2] = bgr[0:h:2, 1:w:2, 2]
+    raw[1::2, 0::2] = bgr[1:h:2, 0:w:2, 0]
+    raw[1::2, 1::2] = bgr[1:h:2, 1:w:2, 1]
+    return raw
+
+
+def synthetic_frames(n, width=640, height=480):
+    """合成RAW帧：固定绿灯 + 红色飞镖头从左上飞向右下"""
+    rng = np.random.default_rng(0)
+    for i in range(n):
+        bgr = rng.integers(0, 30, (height, width, 3), dtype=np.uint8)
+        cv2.circle(bgr, (520, 400), 30, (40, 220, 40), -1)
+        t = i / max(n - 1, 1)
+        x = int(60 + 480 * t)
+        y = int(60 + 300 * t * t)
+        cv2.circle(bgr, (x, y), 14, (30, 30, 230), -1)
+        cv2.circle(bgr, (x, y), 5, (200, 200, 255), -1)
+        yield mosaic_gr(bgr)
+
+
+def replay_frames(source, n):
+    if os.path.isdir(source):
+        for path in sorted(glob.glob(os.path.join(source, '*.npy')))[:n]:
+            yield np.load(path)
+        return
+    video = cv2.VideoCapture(source)
+    count = 0
+    while count < n:
+        ok, bgr = video.read()
+        if not ok:
+            break
+        # 录像是镜像后的画面，翻回传感器方向再马赛克
+        yield mosaic_gr(cv2.flip(bgr, 1))
+        count += 1
+    video.release()
+
+
+def isp_path(raw):
+    full = cv2.cvtColor(raw, cv2.COLOR_BayerGB2BGR)  # OpenCV的Bayer命名错开一行，GRBG对应BayerGB
+    full = cv2.flip(full, 1)
+    return cv2.resize(full, (full.shape[1] // 2, full.shape[0] // 2), interpolation=cv2.INTER_LINEAR)
+
+
+def masks(detect_frame, green_range):
+    hsv = cv2.cvtColor(detect_frame, cv2.COLOR_BGR2HSV)
+    red = cv2.bitwise_or(cv2.inRange(hsv, *RED_RANGES[0]), cv2.inRange(hsv, *RED_RANGES[1]))
+    green = cv2.inRange(hsv, *green_range)
+    return red, green
+
+
+def largest_center(mask):
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    if not contours:
+        return None
+    x, y, w, h = cv2.boundingRect(max(contours, key=cv2.contourArea))
+    return (x + w / 2.0, y + h / 2.0)
+
+
+def iou(a, b):
+    union = np.count_nonzero(a | b)
+    return 1.0 if union == 0 else np.count_nonzero(a & b) / union
+
+
+def main():
+    source = sys.argv[1] if len(sys.argv) > 1 else None
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    frames = list(replay_frames(source, n) if source else synthetic_frames(n))
+    if not frames:
+        print("没有可用的帧")
+        return
+    green_range = load_green_range()
+    bayer_half = BayerHalf(mirror=True)
+    head = FakeFrameHead(frames[0].shape[1], frames[0].shape[0])
+
+    t_isp = t_raw = 0.0
+    red_iou, green_iou, center_err = [], [], []
+    both = isp_only = raw_only = 0
+    for raw in frames:
+        t0 = time.perf_counter()
+        a_red, a_green = masks(isp_path(raw), green_range)
+        t1 = time.perf_counter()
+        b_red, b_green = masks(bayer_half.convert(raw, head), green_range)
+        t2 = time.perf_counter()
+        t_isp += t1 - t0
+        t_raw += t2 - t1
+
+        red_iou.append(iou(a_red > 0, b_red > 0))
+        green_iou.append(iou(a_green > 0, b_green > 0))
+        ca, cb = largest_center(a_red), largest_center(b_red)
+        if ca is not None and cb is not None:
+            both += 1
+            # 检测图是1/2分辨率，误差换算回全幅像素
+            center_err.append(2 * np.hypot(ca[0] - cb[0], ca[1] - cb[1]))
+        elif ca is not None:
+            isp_only += 1
+        elif cb is not None:
+            raw_only += 1
+
+    count = len(frames)
+    print(f"帧数: {count}  分辨率: {head.iWidth}x{head.iHeight}  输入: {source or '合成'}")
+    print(f"每帧耗时  ISP路径: {t_isp / count * 1e3:.3f} ms  RAW路径: {t_raw / count * 1e3:.3f} ms  "
+          f"加速 {t_isp / max(t_raw, 1e-9):.2f}x")
+    print(f"掩模IoU   红色: 平均 {np.mean(red_iou):.3f} 最小 {np.min(red_iou):.3f}  "
+          f"绿色: 平均 {np.mean(green_iou):.3f} 最小 {np.min(green_iou):.3f}")
+    print(f"红色目标  两路都检出 {both}  仅ISP {isp_only}  仅RAW {raw_only}")
+    if center_err:
+        print(f"中心偏差  平均 {np.mean(center_err):.2f} px  最大 {np.max(center_err):.2f} px（全幅像素）")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+#coding=utf-8
+"""
+候选目标提取：findContours + 逐轮廓 contourArea/boundingRect/arcLength 的Python循环
+vs BlobExtractor（connectedComponentsWithStats + NumPy向量化过滤）（不需要相机）
+掩模为320x240检测图：一个飞镖头 + 数量递增的干扰斑点（反光、灯光噪点），
+看每帧耗时是否随画面杂乱程度增长，以及两种方法得到的候选是否一致：
+  - 候选一致：每帧两种方法的候选数相同的帧比例，BlobExtractor 的面积（外接框装得下面积下限的连通域上的 contourArea）
+    与 contourArea 的最大偏差；每种杂乱程度都要求每帧候选数相同，否则退出码为1
+    （唯一允许的差别是别的连通域孔里的连通域：RETR_EXTERNAL 的轮廓循环看不到，连通域会算上，这里的掩模没有出现）
+用法：python3 benchmarks/bench_blob_extract.py [每种杂乱程度的帧数]
+"""
+import sys
+import time
+sys.path.append('.')
+import cv2
+import numpy as np
+from blob_extract import BlobExtractor, blob_center
+
+MIN_AREA, MAX_AREA, MAX_ASPECT = 300, 10000, 15.0
+SCALE = 2
+
+
+def make_masks(n, clutter, width=320, height=240):
+    """飞镖头（半径7）+ clutter个干扰斑点（小于面积阈值的噪点和少量细长反光）"""
+    rng = np.random.default_rng(clutter)
+    masks = []
+    for i in range(n):
+        mask = np.zeros((height, width), np.uint8)
+        t = i / max(n - 1, 1)
+        cv2.circle(mask, (int(30 + 240 * t), int(30 + 150 * t * t)), 7, 255, -1)
+        for _ in range(clutter):
+            x, y = int(rng.integers(0, width)), int(rng.integers(0, height))
+            if rng.random() < 0.1:
+                cv2.line(mask, (x, y), (x + int(rng.integers(20, 60)), y), 255, 1)
+            else:
+                cv2.circle(mask, (x, y), int(rng.integers(1, 4)), 255, -1)
+        masks.append(mask)
+    return masks
+
+
+def contour_loop(mask):
+    """原来的做法（与dart_detector.py中的循环相同）"""
+    candidates = []
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    for contour in contours:
+        area = cv2.contourArea(contour)
+        if area < MIN_AREA / (SCALE * SCALE) or area > MAX_AREA / (SCALE * SCALE):
+            continue
+        x, y, w, h = cv2.boundingRect(contour)
+        aspect_ratio = max(w, h) / (min(w, h) + 1e-5)
+        perimeter = cv2.arcLength(contour, True)
+        circularity = 4 * np.pi * area / (perimeter * perimeter) if perimeter > 0 else 0
+        if aspect_ratio > MAX_ASPECT:
+            continue
+        candidates.append({'center': (x * SCALE + w * SCALE // 2, y * SCALE + h * SCALE // 2),
+                           'area': area * SCALE * SCALE, 'aspect_ratio': aspect_ratio,
+                           'circularity': circularity})
+    return candidates
+
+
+def time_per_frame(fn, masks, repeat=3):
+    fn(masks[0])
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for m in masks:
+            fn(m)
+        best = min(best, time.perf_counter() - t0)
+    return best / len(masks) * 1000.0
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    cv2.setNumThreads(1)
+    extractor = BlobExtractor(MIN_AREA, MAX_AREA, MAX_ASPECT)
+    with_circularity = BlobExtractor(MIN_AREA, MAX_AREA, MAX_ASPECT, min_circularity=0.01)
+
+    print(f"{'干扰斑点':>8}{'轮廓数':>8}{'轮廓循环 ms':>13}{'连通域 ms':>11}{'+圆形度 ms':>12}{'加速':>8}"
+          f"{'候选数 轮廓/连通域':>20}{'候选一致':>10}{'面积偏差':>10}{'中心偏差 px':>12}")
+    ok = True
+    for clutter in (0, 20, 100, 400, 1000):
+        masks = make_masks(n, clutter)
+        t_loop = time_per_frame(contour_loop, masks)
+        t_cc = time_per_frame(lambda m: extractor.extract(m, SCALE), masks)
+        t_circ = time_per_frame(lambda m: with_circularity.extract(m, SCALE), masks)
+
+        count_loop = count_cc = same = 0
+        offsets = []
+        area_error = 0.0
+        for m in masks:
+            a = contour_loop(m)
+            b, _ = extractor.extract(m, SCALE)
+            count_loop += len(a)
+            count_cc += len(b)
+            if len(a) == len(b):
+                same += 1
+                # 按面积排序后逐个比较
+                areas = np.sort([c['area'] for c in a])
+                if len(areas):
+                    area_error = max(area_error, float(np.abs(areas - np.sort(b['area'])).max()))
+            if a and len(b):
+                # 各自面积最大的候选（即飞镖头）
+                ca = max(a, key=lambda c: c['area'])['center']
+                cb = blob_center(b[0])
+                offsets.append(np.hypot(ca[0] - cb[0], ca[1] - cb[1]))
+        contours = len(cv2.findContours(masks[0], cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)[0])
+        offset = f"{np.mean(offsets):.2f}" if offsets else '-'
+        print(f"{clutter:>8d}{contours:>8d}{t_loop:>13.3f}{t_cc:>11.3f}{t_circ:>12.3f}{t_loop / t_cc:>7.1f}x"
+              f"{f'{count_loop}/{count_cc}':>20}{same / n:>10.0%}{area_error:>10.0f}{offset:>12}")
+        if same < n:
+            ok = False
+    print(f"每帧候选一致: {'是' if ok else '否'}")
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+#coding=utf-8
+"""
+取帧方式对比：poll（采集线程轮询） vs callback（CameraSetCallbackFunction） vs grabber（CameraGrabber帧监听）
+每种方式打开一次相机，检测线程按固定耗时模拟检测，统计：
+  交接延迟   - 帧写入环形缓冲到检测线程拿到的时间（主机时钟）
+  采集延迟   - 相机硬件时间戳到检测线程拿到的时间（FrameCapture.latency）
+  丢帧率     - 环形缓冲中被覆盖、没被检测的帧 / 采集到的帧，以及SDK统计的丢帧/错帧
+  CPU        - 每帧进程CPU时间（含SDK线程）
+需要连接相机（或使用模拟相机后端），在项目根目录运行：
+  python3 benchmarks/bench_capture_backend.py [每种方式秒数] [模拟检测耗时ms] [mode]
+"""
+import sys
+import time
+sys.path.append('python_demo')
+sys.path.append('.')
+import numpy as np
+import mvsdk
+from frame_capture import FrameCapture, CAPTURE_BACKENDS, open_camera, close_camera
+
+
+def setup_camera(hCamera):
+    """与主程序相同的相机设置，返回缓冲大小"""
+    cap = mvsdk.CameraGetCapability(hCamera)
+    res = mvsdk.tSdkImageResolution()
+    res.iIndex = 0xff
+    res.iWidth = res.iWidthFOV = 640
+    res.iHeight = res.iHeightFOV = 480
+    mvsdk.CameraSetImageResolution(hCamera, res)
+    mvsdk.CameraSetIspOutFormat(hCamera, mvsdk.CAMERA_MEDIA_TYPE_BGR8)
+    mvsdk.CameraSetTriggerMode(hCamera, 0)
+    mvsdk.CameraSetAeState(hCamera, 0)
+    mvsdk.CameraSetExposureTime(hCamera, 20000)
+    mvsdk.CameraPlay(hCamera)
+    return cap.sResolutionRange.iWidthMax * cap.sResolutionRange.iHeightMax * 3
+
+
+def run_backend(DevInfo, backend, mode, seconds, work_ms):
+    hCamera, grabber = open_camera(DevInfo, backend)
+    capture = None
+    try:
+        buffer_size = setup_camera(hCamera)
+        capture = FrameCapture(hCamera, buffer_size, mode=mode, backend=backend, grabber=grabber)
+        capture.start()
+        # 预热：等第一帧，之后的统计从零开始
+        first = capture.read(1.0)
+        if first is not None:
+            capture.release(first)
+        captured0, dropped0 = capture.captured, capture.dropped
+        sdk0 = capture.sdk_stats()
+
+        handoff, latency = [], []
+        t_start, c_start = time.perf_counter(), time.process_time()
+        t_end = t_start + seconds
+        while time.perf_counter() < t_end:
+            frame = capture.read(0.2)
+            if frame is None:
+                continue
+            handoff.append(time.perf_counter() - frame.host_time)
+            latency.append(capture.latency(frame))
+            if work_ms > 0:
+                time.sleep(work_ms / 1000.0)
+            capture.release(frame)
+        elapsed = time.perf_counter() - t_start
+        cpu = time.process_time() - c_start
+
+        sdk = capture.sdk_stats()
+        captured = capture.captured - captured0
+        dropped = capture.dropped - dropped0
+        handoff = np.array(handoff) * 1000.0
+        latency = np.array(latency) * 1000.0
+        n = max(len(handoff), 1)
+        return {
+            'frames': len(handoff),
+            'fps': len(handoff) / elapsed,
+            'handoff_p50': np.percentile(handoff, 50) if len(handoff) else 0.0,
+            'handoff_p95': np.percentile(handoff, 95) if len(handoff) else 0.0,
+            'latency_p50': np.percentile(latency, 50) if len(latency) else 0.0,
+            'latency_p95': np.percentile(latency, 95) if len(latency) else 0.0,
+            'drop_rate': dropped / max(captured, 1),
+            'sdk_lost': sdk['lost'] - sdk0['lost'],
+            'sdk_error': sdk['error'] - sdk0['error'],
+            'cpu_ms': cpu / n * 1000.0,
+        }
+    finally:
+        if capture is not None:
+            capture.stop()
+        close_camera(hCamera, grabber)
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 5.0
+    work_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 10.0
+    mode = sys.argv[3] if len(sys.argv) > 3 else 'process'
+
+    DevList = mvsdk.CameraEnumerateDevice()
+    if len(DevList) < 1:
+        print("Error: No camera found!")
+        return
+
+    print(f"mode={mode}  每种方式 {seconds:.0f} 秒，模拟检测 {work_ms:.1f} ms/帧")
+    print(f"{'backend':<10s}{'frames':>8s}{'FPS':>7s}{'handoff p50/p95 ms':>21s}{'latency p50/p95 ms':>21s}"
+          f"{'drop':>8s}{'SDK lost':>10s}{'SDK err':>9s}{'CPU ms':>8s}")
+    print("-" * 102)
+    for backend in CAPTURE_BACKENDS:
+        try:
+            r = run_backend(DevList[0], backend, mode, seconds, work_ms)
+        except mvsdk.CameraException as e:
+            print(f"{backend:<10s}失败: {e.message}")
+            continue
+        handoff = f"{r['handoff_p50']:.2f}/{r['handoff_p95']:.2f}"
+        latency = f"{r['latency_p50']:.2f}/{r['latency_p95']:.2f}"
+        print(f"{backend:<10s}{r['frames']:>8d}{r['fps']:>7.1f}{handoff:>21s}{latency:>21s}"
+              f"{r['drop_rate']:>8.1%}{r['sdk_lost']:>10d}{r['sdk_error']:>9d}{r['cpu_ms']:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
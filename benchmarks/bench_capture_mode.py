@@ -0,0 +1,81 @@
+#coding=utf-8
+"""
+采集路径对比：process（Get/Process/Release三次调用） vs fused（PriorityEx3一次调用）
+每种模式连续取图若干秒，统计每帧调用耗时（均值/P50/P95）和实际帧率
+需要连接相机（或使用模拟相机后端），在项目根目录运行：
+  python3 benchmarks/bench_capture_mode.py [每种模式秒数]
+"""
+import sys
+import time
+sys.path.append('python_demo')
+sys.path.append('.')
+import numpy as np
+import mvsdk
+from frame_capture import FrameCapture
+
+
+def run_mode(hCamera, mode, buffer_size, seconds):
+    """在当前线程中直接调用采集函数，测量每帧耗时"""
+    capture = FrameCapture(hCamera, buffer_size, mode=mode)
+    latencies = []
+    timeouts = 0
+    t_end = time.perf_counter() + seconds
+    t_start = time.perf_counter()
+    while time.perf_counter() < t_end:
+        t0 = time.perf_counter()
+        status = capture._grab(0)
+        if status == mvsdk.CAMERA_STATUS_TIME_OUT:
+            timeouts += 1
+            continue
+        if status != mvsdk.CAMERA_STATUS_SUCCESS:
+            raise mvsdk.CameraException(status)
+        latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - t_start
+    capture.ring.close()
+    lat = np.array(latencies) * 1000.0
+    return {
+        'frames': len(latencies),
+        'fps': len(latencies) / elapsed,
+        'mean': lat.mean() if len(lat) else 0.0,
+        'p50': np.percentile(lat, 50) if len(lat) else 0.0,
+        'p95': np.percentile(lat, 95) if len(lat) else 0.0,
+        'timeouts': timeouts,
+    }
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 5.0
+
+    DevList = mvsdk.CameraEnumerateDevice()
+    if len(DevList) < 1:
+        print("Error: No camera found!")
+        return
+    hCamera = mvsdk.CameraInit(DevList[0], -1, -1)
+    try:
+        cap = mvsdk.CameraGetCapability(hCamera)
+
+        # 与主程序相同的相机设置
+        res = mvsdk.tSdkImageResolution()
+        res.iIndex = 0xff
+        res.iWidth = res.iWidthFOV = 640
+        res.iHeight = res.iHeightFOV = 480
+        mvsdk.CameraSetImageResolution(hCamera, res)
+        mvsdk.CameraSetIspOutFormat(hCamera, mvsdk.CAMERA_MEDIA_TYPE_BGR8)
+        mvsdk.CameraSetTriggerMode(hCamera, 0)
+        mvsdk.CameraSetAeState(hCamera, 0)
+        mvsdk.CameraSetExposureTime(hCamera, 20000)
+        mvsdk.CameraPlay(hCamera)
+
+        buffer_size = cap.sResolutionRange.iWidthMax * cap.sResolutionRange.iHeightMax * 3
+
+        print(f"{'mode':<10s}{'frames':>8s}{'FPS':>8s}{'mean ms':>10s}{'p50 ms':>10s}{'p95 ms':>10s}{'timeouts':>10s}")
+        print("-" * 66)
+        for mode in ('process', 'fused'):
+            r = run_mode(hCamera, mode, buffer_size, seconds)
+            print(f"{mode:<10s}{r['frames']:>8d}{r['fps']:>8.1f}{r['mean']:>10.2f}{r['p50']:>10.2f}{r['p95']:>10.2f}{r['timeouts']:>10d}")
+    finally:
+        mvsdk.CameraUnInit(hCamera)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+#coding=utf-8
+"""
+颜色分类：原来的 cvtColor(HSV) + 绿色inRange + 两段红色inRange + bitwise_or（每步分配新数组）
+vs HsvClassifier（同样的运算，输出写进预分配的缓冲，默认）vs ColorLut 量化三维查找表（bits=8/6/5/4，可选）（不需要相机）
+  - 每帧耗时（检测分辨率320x240），默认 cv2.setNumThreads(1) 模拟树莓派上检测线程的单核预算
+  - 掩模一致性：HsvClassifier 和 bits=8 必须逐像素相同，bits<8 统计不同的像素数
+  - 建表耗时（阈值变化时的重建代价）和表的大小（bits=8 为3 x 16 MB，不在缓存里；bits=5 为3 x 32 KB）
+  - 最后一行给出结论：bits=8 的查找表在这台机器上是否比 HsvClassifier 快（打开 color_lut.enabled 的前提）
+输入：视频文件（每帧缩小到1/2）、图片目录，或不指定时用合成画面 + 随机噪声画面（最坏情况：查表没有缓存局部性）
+用法：python3 benchmarks/bench_color_lut.py [视频/目录] [帧数] [OpenCV线程数]
+"""
+import glob
+import json
+import os
+import sys
+import time
+sys.path.append('.')
+import cv2
+import numpy as np
+from color_lut import ColorLut, HsvClassifier, DEFAULT_RED_RANGES, DEFAULT_GREEN_RANGE
+
+
+def load_green_range():
+    try:
+        with open('green_led_config.json', 'r') as f:
+            config = json.load(f)['green_led']
+        return tuple(config['hsv_lower']), tuple(config['hsv_upper'])
+    except (OSError, KeyError, ValueError):
+        return DEFAULT_GREEN_RANGE
+
+
+def synthetic_frames(n, width=320, height=240):
+    """合成检测图：暗背景 + 绿灯 + 沿抛物线运动的红色飞镖头 + 一盏红色干扰灯"""
+    rng = np.random.default_rng(0)
+    frames = []
+    for i in range(n):
+        bgr = rng.integers(0, 30, (height, width, 3), dtype=np.uint8)
+        cv2.circle(bgr, (260, 200), 15, (40, 220, 40), -1)
+        cv2.circle(bgr, (40, 30), 6, (60, 60, 250), -1)
+        t = i / max(n - 1, 1)
+        x, y = int(30 + 240 * t), int(30 + 150 * t * t)
+        cv2.circle(bgr, (x, y), 7, (30, 30, 230), -1)
+        cv2.circle(bgr, (x, y), 2, (200, 200, 255), -1)
+        frames.append(bgr)
+    return frames
+
+
+def load_frames(source, n):
+    if os.path.isdir(source):
+        paths = sorted(p for ext in ('*.png', '*.jpg', '*.bmp') for p in glob.glob(os.path.join(source, ext)))
+        frames = [cv2.imread(p, cv2.IMREAD_COLOR) for p in paths[:n]]
+    else:
+        frames = []
+        video = cv2.VideoCapture(source)
+        while len(frames) < n:
+            ok, bgr = video.read()
+            if not ok:
+                break
+            frames.append(bgr)
+        video.release()
+    return [cv2.resize(f, (f.shape[1] // 2, f.shape[0] // 2), interpolation=cv2.INTER_LINEAR) for f in frames]
+
+
+def reference_masks(bgr, red_ranges, green_range):
+    """现有检测程序的做法"""
+    hsv = cv2.cvtColor(bgr, cv2.COLOR_BGR2HSV)
+    green = cv2.inRange(hsv, np.array(green_range[0]), np.array(green_range[1]))
+    mask1 = cv2.inRange(hsv, np.array(red_ranges[0][0]), np.array(red_ranges[0][1]))
+    mask2 = cv2.inRange(hsv, np.array(red_ranges[1][0]), np.array(red_ranges[1][1]))
+    return cv2.bitwise_or(mask1, mask2), green
+
+
+def time_per_frame(fn, frames, repeat=3):
+    fn(frames[0])
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for f in frames:
+            fn(f)
+        best = min(best, time.perf_counter() - t0)
+    return best / len(frames) * 1000.0
+
+
+def main():
+    source = sys.argv[1] if len(sys.argv) > 1 and sys.argv[1] != '-' else None
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    threads = int(sys.argv[3]) if len(sys.argv) > 3 else 1
+    cv2.setNumThreads(threads)
+
+    red_ranges = DEFAULT_RED_RANGES
+    green_range = load_green_range()
+    inputs = [('video' if source else 'synthetic', load_frames(source, n) if source else synthetic_frames(n))]
+    rng = np.random.default_rng(1)
+    inputs.append(('noise', [rng.integers(0, 256, (240, 320, 3), dtype=np.uint8) for _ in range(min(n, 50))]))
+    if not inputs[0][1]:
+        print("没有可用的帧")
+        return
+
+    print(f"OpenCV线程数: {threads}  红色: {red_ranges}  绿色: {green_range}")
+    classifiers = [('HsvClassifier', HsvClassifier(red_ranges, green_range))]
+    for bits in (8, 6, 5, 4):
+        lut = ColorLut(red_ranges, green_range, bits=bits)
+        classifiers.append((f'LUT bits={bits}', lut))
+        print(f"建表 bits={bits}: {lut.build_time * 1000:.1f} ms（{lut.nbytes / 1024.0:.0f} KB）")
+
+    failed = False
+    lut_wins = True
+    for name, frames in inputs:
+        h, w = frames[0].shape[:2]
+        t_ref = time_per_frame(lambda f: reference_masks(f, red_ranges, green_range), frames)
+        times = {}
+        print(f"\n[{name}] {len(frames)} 帧 {w}x{h}")
+        print(f"{'方法':<16}{'ms/帧':>8}{'加速':>8}{'红色不同像素':>14}{'绿色不同像素':>14}")
+        print(f"{'cvtColor+inRange':<16}{t_ref:>8.3f}{'1.00x':>8}{0:>14d}{0:>14d}")
+        for label, classifier in classifiers:
+            times[label] = t = time_per_frame(classifier.masks, frames)
+            red_diff = green_diff = 0
+            for f in frames:
+                ref_red, ref_green = reference_masks(f, red_ranges, green_range)
+                red, green = classifier.masks(f)
+                red_diff += np.count_nonzero(red != ref_red)
+                green_diff += np.count_nonzero(green != ref_green)
+            print(f"{label:<16}{t:>8.3f}{f'{t_ref / t:.2f}x':>8}{red_diff:>14d}{green_diff:>14d}")
+            if label in ('HsvClassifier', 'LUT bits=8') and (red_diff or green_diff):
+                print(f"  错误：{label} 的掩模与 cvtColor+inRange 不一致")
+                failed = True
+        lut_wins &= times['LUT bits=8'] < times['HsvClassifier']
+    print(f"\n结论：bits=8 查找表{'比' if lut_wins else '不比'} HsvClassifier 快"
+          f"{'，可以打开 color_lut.enabled' if lut_wins else '，保持 color_lut.enabled=false'}")
+    if failed:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+#coding=utf-8
+"""
+飞行走廊：等待飞镖时每帧全幅检测 vs 只处理 Corridor 矩形（起始区域到参考线，四周加margin）（不需要相机）
+合成640x480画面：上半部分为起始区域，参考线以下有一排红色背景灯，画面两侧还有两列背景灯（与模拟相机 lamps= 的位置相同，都比飞镖头大，只按面积排序时排在飞镖前面）；
+飞镖两种路径：正常（从入口中部飞到绿灯附近 (LANDING_X, landing_y)）和靠边（从画面左边缘进来，落在离绿灯 OFFSET 像素处）
+走廊的梯形只给候选排序，入口范围取整个顶边（默认）和 [0.15, 0.85] 各测一次，统计
+每帧红色检测耗时（1/2缩小 + 颜色分类 + 形态学 + 连通域 + 梯形排序）、处理的像素比例、背景灯造成的误检候选数
+（离飞镖超过30像素的候选）、找到飞镖的帧比例（不能因为走廊变少）和飞镖排在候选第一的帧比例
+用法：python3 benchmarks/bench_corridor.py [帧数] [参考线y]
+"""
+import sys
+import time
+sys.path.append('.')
+import cv2
+import numpy as np
+from color_lut import HsvClassifier
+from blob_extract import BlobExtractor
+from search_window import Corridor, detect_rect
+
+WIDTH, HEIGHT = 640, 480
+LANDING_X = 352
+OFFSET = 120
+PATHS = {'正常': (0.2, 0), '靠边': (0.01, OFFSET)}     # 入口x（全幅宽度的比例）、落点离绿灯的横向距离
+
+
+def dart_position(i, n, landing_y, path):
+    entry, offset = PATHS[path]
+    t = i / max(n - 1, 1)
+    return (int(WIDTH * entry + (LANDING_X + offset - WIDTH * entry) * t),
+            int(40 + (landing_y - 60) * t * t))
+
+
+def make_frames(n, landing_y, path):
+    rng = np.random.default_rng(0)
+    frames = []
+    for i in range(n):
+        bgr = rng.integers(0, 30, (HEIGHT, WIDTH, 3), dtype=np.uint8)
+        # 参考线以下的背景红灯（指示灯、反光）
+        for x in range(40, WIDTH, 120):
+            cv2.circle(bgr, (x, min(HEIGHT - 12, landing_y + 60)), 14, (40, 40, 240), -1)
+        # 画面两侧的背景灯（入口范围以外）
+        for y in range(60, landing_y - 20, 70):
+            cv2.circle(bgr, (40, y), 14, (40, 40, 240), -1)
+            cv2.circle(bgr, (WIDTH - 40, y), 14, (40, 40, 240), -1)
+        cv2.circle(bgr, dart_position(i, n, landing_y, path), 12, (30, 30, 230), -1)
+        frames.append(bgr)
+    return frames
+
+
+def detect(bgr, classifier, blobs, kernel, window, corridor):
+    if window is None:
+        detect_frame = cv2.resize(bgr, (WIDTH // 2, HEIGHT // 2), interpolation=cv2.INTER_LINEAR)
+        offset = (0, 0)
+    else:
+        x0, y0, x1, y1 = window
+        detect_frame = cv2.resize(bgr[2 * y0:2 * y1, 2 * x0:2 * x1], (x1 - x0, y1 - y0),
+                                  interpolation=cv2.INTER_LINEAR)
+        offset = (x0 * 2, y0 * 2)
+    red, _ = classifier.masks(detect_frame)
+    mask = cv2.morphologyEx(red, cv2.MORPH_OPEN, kernel)
+    mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel)
+    candidates, _ = blobs.extract(mask, 2, offset)
+    if corridor is not None:
+        candidates = corridor.rank(candidates)
+    return candidates
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    landing_y = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    cv2.setNumThreads(1)
+    classifier = HsvClassifier()
+    blobs = BlobExtractor(300, 10000, max_aspect=15.0)
+    kernel = np.ones((3, 3), np.uint8)
+
+    print(f"{n} 帧 {WIDTH}x{HEIGHT}，起始区域 (0, 0, {WIDTH}, {HEIGHT // 2})，参考线 y={landing_y}，margin 48，单线程")
+    for path in PATHS:
+        frames = make_frames(n, landing_y, path)
+        print(f"\n[{path}]")
+        print(f"{'方式':<22}{'ms/帧':>8}{'像素比例':>10}{'候选/帧':>10}{'背景灯误检/帧':>14}{'找到飞镖':>10}"
+              f"{'飞镖排第一':>12}")
+        for name, span in (('全幅', None), ('走廊 入口[0, 1]', (0.0, 1.0)), ('走廊 入口[0.15, 0.85]', (0.15, 0.85))):
+            corridor = None
+            if span is not None:
+                corridor = Corridor(WIDTH, HEIGHT, 48, entry_span=span)
+                corridor.update((0, 0, WIDTH, HEIGHT // 2), (LANDING_X, landing_y))
+            rect = corridor.rect if corridor is not None else None
+            window = detect_rect(rect, 2, (0, 0), WIDTH // 2, HEIGHT // 2)
+            detect(frames[0], classifier, blobs, kernel, window, corridor)
+            results = []
+            t0 = time.perf_counter()
+            for bgr in frames:
+                results.append(detect(bgr, classifier, blobs, kernel, window, corridor))
+            elapsed = (time.perf_counter() - t0) / n * 1000.0
+            counts, false, found, first = 0, 0, 0, 0
+            for i, candidates in enumerate(results):
+                x, y = dart_position(i, n, landing_y, path)
+                near = np.hypot(candidates['cx'] - x, candidates['cy'] - y) <= 30
+                counts += len(candidates)
+                false += len(candidates) - int(np.count_nonzero(near))
+                found += bool(near.any())
+                first += bool(len(near) and near[0])
+            coverage = corridor.coverage if corridor is not None else 1.0
+            print(f"{name:<22}{elapsed:>8.3f}{coverage:>10.0%}{counts / n:>10.2f}{false / n:>14.2f}{found / n:>10.0%}"
+                  f"{first / n:>12.0%}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+#coding=utf-8
+"""
+帧缓存转ndarray的每帧开销对比（不需要相机）
+  旧路径：每帧 (c_ubyte * uBytes).from_address + np.frombuffer + reshape + cv2.flip
+  新路径：FrameViewCache 缓存视图（镜像由ISP完成，不再flip）
+用法：python3 benchmarks/bench_frame_view.py [宽] [高] [帧数]
+"""
+import ctypes
+import sys
+import time
+sys.path.append('python_demo')
+import cv2
+import numpy as np
+from frame_view import FrameViewCache
+
+BGR8 = 0x02180015  # CAMERA_MEDIA_TYPE_BGR8，这里不导入mvsdk以便在没有SDK的机器上运行
+
+
+class FakeFrameHead(object):
+    """只包含转换用到的tSdkFrameHead字段"""
+    def __init__(self, width, height, channels):
+        self.iWidth = width
+        self.iHeight = height
+        self.uBytes = width * height * channels
+        self.uiMediaType = BGR8
+
+
+def old_path(pFrameBuffer, FrameHead):
+    frame_data = (ctypes.c_ubyte * FrameHead.uBytes).from_address(pFrameBuffer)
+    frame = np.frombuffer(frame_data, dtype=np.uint8)
+    frame = frame.reshape((FrameHead.iHeight, FrameHead.iWidth, 3))
+    return frame
+
+
+def bench(name, fn, n):
+    fn()  # 预热
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn()
+    dt = (time.perf_counter() - t0) / n
+    print(f"{name:<40s} {dt * 1e6:9.2f} us/frame")
+    return dt
+
+
+def main():
+    width = int(sys.argv[1]) if len(sys.argv) > 1 else 640
+    height = int(sys.argv[2]) if len(sys.argv) > 2 else 480
+    n = int(sys.argv[3]) if len(sys.argv) > 3 else 2000
+
+    head = FakeFrameHead(width, height, 3)
+    raw = ctypes.create_string_buffer(head.uBytes)
+    pFrameBuffer = ctypes.addressof(raw)
+    cache = FrameViewCache()
+
+    # 两条路径得到的像素必须一致
+    assert np.array_equal(old_path(pFrameBuffer, head), cache.get(pFrameBuffer, head))
+
+    print(f"Frame {width}x{height} BGR8, {n} iterations")
+    print("-" * 60)
+    t_old = bench("ctypes type + frombuffer + reshape", lambda: old_path(pFrameBuffer, head), n)
+    t_new = bench("FrameViewCache.get", lambda: cache.get(pFrameBuffer, head), n)
+    t_old_flip = bench("old path + cv2.flip(frame, 1)", lambda: cv2.flip(old_path(pFrameBuffer, head), 1), n)
+    print("-" * 60)
+    print(f"view construction: {t_old / t_new:.1f}x faster")
+    print(f"per-frame saved incl. flip copy: {(t_old_flip - t_new) * 1e6:.1f} us")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+#coding=utf-8
+"""
+绿灯定位：每帧整图（开运算 + 闭运算 + 连通域） vs GreenLedTracker（启动/丢失/每N帧整图搜索，其余帧小块核对）（不需要相机）
+合成320x240检测图的绿色掩模：绿灯固定在底部，中途熄灭一段、被飞过的物体部分遮挡一段、相机被碰后移动一次，
+统计每帧耗时、整图搜索/核对次数、亮灭判断的正确率、绿灯中心y（落点参考线）与真实位置的平均误差
+用法：python3 benchmarks/bench_green_tracker.py [帧数]
+"""
+import sys
+import time
+sys.path.append('.')
+import cv2
+import numpy as np
+from blob_extract import BlobExtractor, blob_center
+from green_tracker import GreenLedTracker, GREEN_SEARCH, GREEN_VERIFY
+
+WIDTH, HEIGHT = 320, 240
+SCALE = 2
+MIN_AREA, MAX_AREA = 1000, 16000
+
+
+def make_masks(n):
+    """返回 [(绿色掩模, 真实中心（显示坐标，熄灭时为None）)]"""
+    rng = np.random.default_rng(0)
+    masks = []
+    for i in range(n):
+        mask = np.zeros((HEIGHT, WIDTH), np.uint8)
+        led = (130, 210) if i < n * 3 // 4 else (136, 208)       # 最后1/4相机被碰，灯移动
+        on = not (n // 4 <= i < n // 4 + 10)                     # 熄灭10帧
+        if on:
+            cv2.circle(mask, led, 14, 255, -1)
+            if n // 2 <= i < n // 2 + 6:                         # 飞镖飞过，遮住一半
+                cv2.rectangle(mask, (led[0] - 14, led[1] - 14), (led[0] + 14, led[1]), 0, -1)
+        # 随机噪点（反光），逐帧变化
+        for _ in range(30):
+            mask[rng.integers(0, HEIGHT), rng.integers(0, WIDTH)] = 255
+        masks.append((mask, (led[0] * SCALE, led[1] * SCALE) if on else None))
+    return masks
+
+
+def full_search(mask, extractor, kernel):
+    """现有做法：每帧整图"""
+    m = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel)
+    m = cv2.morphologyEx(m, cv2.MORPH_CLOSE, kernel)
+    found, _ = extractor.extract(m, SCALE)
+    return blob_center(found[0]) if len(found) else None
+
+
+def on_accuracy(centers, truth):
+    return np.mean([(c is None) == (t is None) for c, t in zip(centers, truth)])
+
+
+def y_error(centers, truth):
+    return np.mean([abs(c[1] - t[1]) for c, t in zip(centers, truth) if c is not None and t is not None])
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    cv2.setNumThreads(1)
+    masks = make_masks(n)
+    kernel = np.ones((3, 3), np.uint8)
+    extractor = BlobExtractor(MIN_AREA, MAX_AREA, max_aspect=np.inf)
+
+    full_times, full_centers = [], []
+    for mask, _ in masks:
+        t0 = time.perf_counter()
+        full_centers.append(full_search(mask, extractor, kernel))
+        full_times.append(time.perf_counter() - t0)
+    full_times = np.array(full_times) * 1000.0
+
+    print(f"{n} 帧 {WIDTH}x{HEIGHT} 绿色掩模（熄灭10帧、半遮挡6帧、移动1次），单线程")
+    print(f"{'方式':<12}{'ms/帧':>8}{'整图':>6}{'核对':>6}{'核对失败':>10}{'亮灭正确':>10}{'y误差 px':>10}{'最低置信度':>12}")
+    truth = [c for _, c in masks]
+    print(f"{'每帧整图':<12}{full_times.mean():>8.3f}{n:>6d}{0:>6d}{0:>10d}{on_accuracy(full_centers, truth):>10.1%}"
+          f"{y_error(full_centers, truth):>10.2f}{'-':>12}")
+
+    for refresh_every in (10, 30, 120):
+        tracker = GreenLedTracker(extractor, refresh_every=refresh_every)
+        times, centers, confidences = [], [], []
+        for mask, _ in masks:
+            t0 = time.perf_counter()
+            tracker.update(mask, SCALE)
+            times.append(time.perf_counter() - t0)
+            centers.append(tracker.center if tracker.on else None)
+            if tracker.state in (GREEN_SEARCH, GREEN_VERIFY) and tracker.on:
+                confidences.append(tracker.confidence)
+        times = np.array(times) * 1000.0
+        print(f"{f'N={refresh_every}':<12}{times.mean():>8.3f}{tracker.searches:>6d}{tracker.verifies:>6d}"
+              f"{tracker.verify_failures:>10d}{on_accuracy(centers, truth):>10.1%}{y_error(centers, truth):>10.2f}"
+              f"{min(confidences):>12.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+#coding=utf-8
+"""
+运动门控：等待飞镖时每帧全幅红色检测 vs MotionGate（1/8灰度小图差分，只检测有运动的区域，静止帧跳过）（不需要相机）
+合成640x480画面：暗背景 + 逐帧传感器噪声 + 静态红色背景灯 + 绿灯，飞镖每隔一段时间从顶部飞下来（其余为空闲帧），
+统计空闲帧/飞行帧的每帧耗时（含小图缩小和差分）、门控命中/跳过次数和飞镖检出率
+用法：python3 benchmarks/bench_motion_gate.py [帧数] [门控阈值]
+"""
+import sys
+import time
+sys.path.append('.')
+import cv2
+import numpy as np
+from color_lut import HsvClassifier
+from blob_extract import BlobExtractor
+from search_window import detect_rect
+from motion_gate import MotionGate
+
+WIDTH, HEIGHT = 640, 480
+
+
+def make_frames(n, noise):
+    """返回 [(BGR帧, 飞镖中心或None)]，每120帧飞一次镖（飞行40帧）"""
+    rng = np.random.default_rng(0)
+    background = rng.integers(0, 25, (HEIGHT, WIDTH, 3), dtype=np.uint8)
+    for k in range(6):
+        cv2.circle(background, (40 if k % 2 == 0 else WIDTH - 40, 60 + k * 60), 11, (40, 40, 240), -1)
+    cv2.circle(background, (WIDTH // 2, HEIGHT - 60), 28, (40, 220, 40), -1)
+    frames = []
+    for i in range(n):
+        bgr = background.copy()
+        if noise:
+            cv2.add(bgr, rng.integers(0, noise, bgr.shape, dtype=np.uint8), dst=bgr)
+        k = (i % 120) / 40.0
+        dart = None
+        if k < 1.0:
+            dart = (int(WIDTH * 0.2 + WIDTH * 0.35 * k), int(20 + (HEIGHT - 80) * k * k))
+            cv2.circle(bgr, dart, 12, (30, 30, 230), -1)
+        frames.append((bgr, dart))
+    return frames
+
+
+def detect(bgr, classifier, blobs, kernel, window):
+    if window is None:
+        detect_frame = cv2.resize(bgr, (WIDTH // 2, HEIGHT // 2), interpolation=cv2.INTER_LINEAR)
+        offset = (0, 0)
+    else:
+        x0, y0, x1, y1 = window
+        detect_frame = cv2.resize(bgr[2 * y0:2 * y1, 2 * x0:2 * x1], (x1 - x0, y1 - y0),
+                                  interpolation=cv2.INTER_LINEAR)
+        offset = (x0 * 2, y0 * 2)
+    red, _ = classifier.masks(detect_frame)
+    mask = cv2.morphologyEx(red, cv2.MORPH_OPEN, kernel)
+    mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel)
+    candidates, _ = blobs.extract(mask, 2, offset)
+    return candidates
+
+
+def found(candidates, dart):
+    return len(candidates) > 0 and np.min(np.hypot(candidates['cx'] - dart[0], candidates['cy'] - dart[1])) < 6
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 480
+    threshold = int(sys.argv[2]) if len(sys.argv) > 2 else 12
+    cv2.setNumThreads(1)
+    classifier = HsvClassifier()
+    blobs = BlobExtractor(300, 10000, max_aspect=15.0)
+    kernel = np.ones((3, 3), np.uint8)
+
+    print(f"{n} 帧 {WIDTH}x{HEIGHT}（每120帧飞行40帧），6盏静态红灯，门控阈值 {threshold}，单线程")
+    print(f"{'方式':<14}{'空闲 ms':>9}{'飞行 ms':>9}{'平均 ms':>9}{'跳过':>8}{'有运动':>8}{'检测面积':>10}{'飞镖检出':>10}")
+    for noise in (0, 8):
+        frames = make_frames(n, noise)
+        for gated in (False, True):
+            gate = MotionGate(WIDTH, HEIGHT, threshold=threshold) if gated else None
+            idle, flight, hits = [], [], 0
+            for bgr, dart in frames:
+                t0 = time.perf_counter()
+                window = None
+                still = False
+                if gate is not None:
+                    rect = gate.update(bgr)
+                    still = not gate.moving
+                    window = detect_rect(rect, 2, (0, 0), WIDTH // 2, HEIGHT // 2)
+                candidates = detect(bgr, classifier, blobs, kernel, window) if not still else None
+                elapsed = (time.perf_counter() - t0) * 1000.0
+                (flight if dart is not None else idle).append(elapsed)
+                if dart is not None and candidates is not None and found(candidates, dart):
+                    hits += 1
+            name = ('门控' if gated else '全幅') + f' 噪声{noise}'
+            skips = f'{gate.skips}' if gated else '-'
+            moving = f'{gate.hits}' if gated else '-'
+            coverage = f'{gate.coverage:.1%}' if gated else '100%'
+            print(f"{name:<14}{np.mean(idle):>9.3f}{np.mean(flight):>9.3f}{np.mean(idle + flight):>9.3f}"
+                  f"{skips:>8}{moving:>8}{coverage:>10}{hits / len(flight):>10.0%}")
+
+
+if __name__ == '__main__':
+    main()
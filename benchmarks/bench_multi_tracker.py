@@ -0,0 +1,127 @@
+#coding=utf-8
+"""
+多目标跟踪：每帧跟面积最大的候选（原来的 dart_candidates[0]）vs MultiTargetTracker（greedy / hungarian 关联）（不需要相机）
+一轮 DARTS 支飞镖间隔 STAGGER 秒先后飞过画面（抛物线，面积随机，同时在空中的飞镖互相交错），
+第一支飞镖有一个跟着移动的反光（水平镜像位置，面积有时比飞镖大），另有位置固定、随机闪烁的灯光（每帧出现 FLICKER）
+和每帧 BLIPS 个随机位置的杂点，每帧约十几个候选；飞镖检测随机丢失 DROPOUT 的帧；统计每种帧率下
+  - 第一支飞镖：按原来的写法轨迹点真的是这支飞镖的比例；跟踪器为这支飞镖的检测点中分到它最主要的那条跟踪的比例（纯度）
+  - 每支飞镖被分配的跟踪号切换次数（总和）、纯度不低于95%的飞镖数（各自保持成一条跟踪）
+  - update() 每帧耗时（包括代价矩阵、关联、出生/死亡）
+用法：python3 benchmarks/bench_multi_tracker.py [轮数] [闪烁灯光数]
+"""
+import sys
+import time
+sys.path.append('.')
+import numpy as np
+from blob_extract import BLOB_DTYPE
+from multi_tracker import MultiTargetTracker
+
+WIDTH, HEIGHT = 640, 480
+DARTS = 3
+STAGGER = 0.15
+DROPOUT = 0.1
+FLICKER = 0.7
+BLIPS = 2
+RATES = (30, 60, 120)
+
+
+def make_volley(rng):
+    """[(t0, x0, vx, vy, ay, area)]，y(t) = vy t + ay t^2 / 2 从画面顶部开始"""
+    return [(k * STAGGER + rng.uniform(0, 0.03), rng.uniform(150, 490), rng.uniform(-150, 150),
+             rng.uniform(150, 400), rng.uniform(300, 600), rng.uniform(300, 600)) for k in range(DARTS)]
+
+
+def frames(volley, fps, clutter, rng):
+    """逐帧生成 (t, candidates, 每个候选的真实飞镖号)，真实飞镖号 -1 为反光/杂点"""
+    lights = rng.uniform((0, 0), (WIDTH, HEIGHT), (clutter, 2))
+    t = 0.0
+    end = max(v[0] for v in volley) + 1.5
+    while t < end:
+        rows = []
+        for d, (t0, x0, vx, vy, ay, area) in enumerate(volley):
+            s = t - t0
+            if s < 0:
+                continue
+            x, y = x0 + vx * s, vy * s + 0.5 * ay * s * s
+            if y > HEIGHT or rng.random() < DROPOUT:
+                continue
+            rows.append((x + rng.normal(0, 0.5), y + rng.normal(0, 0.5), area * rng.uniform(0.8, 1.2), d))
+            if d == 0:
+                rows.append((WIDTH - x, y + 10, area * rng.uniform(0.6, 1.3), -1))
+        for x, y in lights[rng.random(clutter) < FLICKER]:
+            rows.append((x + rng.normal(0, 1.0), y + rng.normal(0, 1.0), rng.uniform(300, 500), -1))
+        for _ in range(BLIPS):
+            rows.append((rng.uniform(0, WIDTH), rng.uniform(0, HEIGHT), rng.uniform(300, 500), -1))
+        candidates = np.zeros(len(rows), BLOB_DTYPE)
+        truth = np.array([r[3] for r in rows], np.int64)
+        if rows:
+            candidates['cx'] = [r[0] for r in rows]
+            candidates['cy'] = [r[1] for r in rows]
+            candidates['area'] = [r[2] for r in rows]
+            order = np.argsort(-candidates['area'], kind='stable')    # 与 BlobExtractor 一样按面积从大到小
+            candidates, truth = candidates[order], truth[order]
+        yield t, candidates, truth
+        t += 1.0 / fps
+
+
+def run(volleys, fps, clutter, association):
+    stats = {'first': [], 'switches': 0, 'kept': 0, 'us': []}
+    for k, volley in enumerate(volleys):
+        rng = np.random.default_rng(1000 * fps + k)
+        tracker = MultiTargetTracker(WIDTH, HEIGHT, association) if association else None
+        followed = None
+        ids = [[] for _ in range(DARTS)]
+        hits = []
+        for frame_id, (t, candidates, truth) in enumerate(frames(volley, fps, clutter, rng)):
+            if tracker is None:
+                # 原来的写法：第一支飞镖出现后每帧取第0个候选
+                if followed is None and np.any(truth == 0):
+                    followed = 0
+                if followed is not None and np.any(truth == 0) and len(candidates):
+                    hits.append(truth[0] == 0)
+                continue
+            t0 = time.perf_counter()
+            track_of = tracker.update(candidates, t, frame_id)
+            stats['us'].append((time.perf_counter() - t0) * 1e6)
+            for d in range(DARTS):
+                idx = np.flatnonzero(truth == d)
+                if len(idx):
+                    ids[d].append(int(track_of[idx[0]]))
+        if tracker is None:
+            stats['first'].append(np.mean(hits))
+            continue
+        for d, seq in enumerate(ids):
+            if not seq:
+                continue
+            seq = np.array(seq)
+            stats['switches'] += int(np.count_nonzero(seq[1:] != seq[:-1]))
+            purity = np.mean(seq == np.bincount(seq[seq >= 0]).argmax()) if np.any(seq >= 0) else 0.0
+            if d == 0:
+                stats['first'].append(purity)
+            stats['kept'] += purity >= 0.95
+    return stats
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    clutter = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    rng = np.random.default_rng(0)
+    volleys = [make_volley(rng) for _ in range(count)]
+    print(f"{count} 轮 x {DARTS} 支飞镖（间隔 {STAGGER * 1000:.0f} ms），第一支带反光，{clutter} 个闪烁灯光 + "
+          f"{BLIPS} 个随机杂点，丢失 {DROPOUT:.0%}")
+    print(f"{'帧率':>6}{'写法':>12}{'第一支轨迹正确':>16}{'跟踪号切换':>12}{'保持一条跟踪':>14}"
+          f"{'update us':>12}{'p99 us':>10}")
+    for fps in RATES:
+        for name, association in (('候选[0]', None), ('greedy', 'greedy'), ('hungarian', 'hungarian')):
+            stats = run(volleys, fps, clutter, association)
+            first = np.mean(stats['first'])
+            if association is None:
+                print(f"{fps:>6}{name:>12}{first:>16.1%}{'-':>12}{'-':>14}{'-':>12}{'-':>10}")
+                continue
+            us = np.array(stats['us'])
+            print(f"{fps:>6}{name:>12}{first:>16.1%}{stats['switches']:>12}"
+                  f"{stats['kept'] / (count * DARTS):>14.1%}{np.mean(us):>12.1f}{np.percentile(us, 99):>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+#coding=utf-8
+"""
+检测分辨率调节：固定1/2检测 vs ResolutionGovernor（空闲1/4、追踪1/2 / 追踪时窗口内全分辨率）（不需要相机）
+合成640x480画面：暗背景 + 传感器噪声 + 绿灯，空闲段没有飞镖，飞行段飞镖头（抗锯齿，亚像素位置）从顶部沿抛物线飞到绿灯高度；
+统计空闲帧/飞行帧的每帧检测耗时（缩小 + 颜色分类 + 形态学 + 连通域 + 亚像素细化）、飞镖出现后第几帧检出、
+飞行帧检出率和细化后中心与真实中心的误差（RMS）
+用法：python3 benchmarks/bench_resolution.py [轮数] [噪声]
+"""
+import sys
+import time
+sys.path.append('.')
+import cv2
+import numpy as np
+from color_lut import HsvClassifier
+from blob_extract import BlobExtractor
+from stripe_detect import StripeDetector
+from subpixel import SubpixelRefiner
+from resolution import ResolutionGovernor
+
+WIDTH, HEIGHT = 640, 480
+LED = (320, 420)
+IDLE_FRAMES = 60
+FLIGHT_FRAMES = 60
+WINDOW = 128
+
+
+def make_frames(rounds, noise):
+    """返回 [(BGR帧, 真实中心或None)]：每轮空闲段 + 飞行段，中心按1/16像素绘制"""
+    rng = np.random.default_rng(0)
+    background = rng.integers(0, 25, (HEIGHT, WIDTH, 3), dtype=np.uint8)
+    cv2.circle(background, LED, 28, (40, 220, 40), -1)
+    frames = []
+    for r in range(rounds):
+        for i in range(IDLE_FRAMES + FLIGHT_FRAMES):
+            bgr = background.copy()
+            if noise:
+                cv2.add(bgr, rng.integers(0, noise, bgr.shape, dtype=np.uint8), dst=bgr)
+            center = None
+            if i >= IDLE_FRAMES:
+                k = (i - IDLE_FRAMES) / (FLIGHT_FRAMES - 1)
+                x, y = 130.0 + 60.0 * r + 220.0 * k, 20.0 + (LED[1] - 40.0) * k * k
+                c16 = (int(round(x * 16)), int(round(y * 16)))
+                cv2.circle(bgr, c16, 12 * 16, (30, 30, 230), -1, cv2.LINE_AA, 4)
+                cv2.circle(bgr, c16, 4 * 16, (200, 200, 255), -1, cv2.LINE_AA, 4)
+                center = (x, y)
+            frames.append((bgr, center))
+    return frames
+
+
+def run(frames, governor, detector, refiner):
+    """逐帧检测，追踪中只处理上一次位置附近的窗口；返回统计"""
+    idle_time = flight_time = 0.0
+    idle_frames = flight_frames = found = 0
+    entry_delay = []
+    errors = []
+    last = None
+    since_entry = None
+    for bgr, truth in frames:
+        t0 = time.perf_counter()
+        rect = None
+        if last is not None:
+            rect = (int(last[0]) - WINDOW // 2, int(last[1]) - WINDOW // 2, WINDOW, WINDOW)
+        scale = governor.select(last is not None, rect is not None)
+        detect_frame, offset, _ = governor.prepare(bgr, rect)
+        red, _ = detector.classify(detect_frame)
+        candidates, _ = detector.extract(red, scale, offset, ops=governor.morph_ops(detector.ops))
+        if len(candidates) > 0:
+            refiner.refine(candidates, bgr)
+        elapsed = time.perf_counter() - t0
+
+        if len(candidates) > 0:
+            last = (float(candidates['cx'][0]), float(candidates['cy'][0]))
+        else:
+            last = None
+        if truth is None:
+            idle_time += elapsed
+            idle_frames += 1
+            since_entry = None
+            continue
+        flight_time += elapsed
+        flight_frames += 1
+        since_entry = 0 if since_entry is None else since_entry + 1
+        if len(candidates) > 0:
+            found += 1
+            errors.append(np.hypot(last[0] - truth[0], last[1] - truth[1]))
+            if len(entry_delay) < idle_frames // IDLE_FRAMES:
+                entry_delay.append(since_entry)    # 本轮飞行段第一次检出
+    return {
+        'idle_ms': idle_time / max(idle_frames, 1) * 1000.0,
+        'flight_ms': flight_time / max(flight_frames, 1) * 1000.0,
+        'entry': np.mean(entry_delay) if entry_delay else float('nan'),
+        'found': found / max(flight_frames, 1),
+        'rms': np.sqrt(np.mean(np.square(errors))) if errors else float('nan'),
+    }
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    noise = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    cv2.setNumThreads(1)
+    frames = make_frames(rounds, noise)
+    classifier = HsvClassifier()
+    blobs = BlobExtractor(300, 10000, max_aspect=15.0)
+    configs = (('固定 1/2', 2, 2), ('空闲1/4 追踪1/2', 4, 2), ('空闲1/4 窗口全分辨率', 4, 1))
+
+    print(f"{rounds} 轮 x（空闲 {IDLE_FRAMES} + 飞行 {FLIGHT_FRAMES}）帧 {WIDTH}x{HEIGHT}，噪声 {noise}，单线程")
+    print(f"{'配置':<16}{'空闲 ms/帧':>12}{'飞行 ms/帧':>12}{'出现后第几帧检出':>18}{'飞行检出率':>12}{'中心RMS px':>12}")
+    for name, idle_scale, track_scale in configs:
+        governor = ResolutionGovernor(1, None, idle_scale, track_scale)
+        detector = StripeDetector(classifier, blobs, 1)
+        stats = run(frames, governor, detector, SubpixelRefiner())
+        print(f"{name:<16}{stats['idle_ms']:>12.3f}{stats['flight_ms']:>12.3f}{stats['entry']:>18.1f}"
+              f"{stats['found']:>12.0%}{stats['rms']:>12.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+#coding=utf-8
+"""
+逐帧SDK调用的Python侧开销：mvsdk.py 原封装 vs mvsdk_fast 预绑定（不需要相机，需要gcc，仅Linux）
+用gcc编译一个同名的桩库 libMVSDK.so（所有函数立即返回），先于mvsdk加载，
+这样测到的只有ctypes参数转换、结构体分配、last_error和异常的开销
+用法：python3 benchmarks/bench_sdk_binding.py [每项调用次数]
+"""
+import ctypes
+import os
+import subprocess
+import sys
+import tempfile
+import time
+sys.path.append('python_demo')
+
+STUB_SOURCE = r"""
+#include <string.h>
+static int g_status = 0;
+static unsigned int g_frame_id = 0;
+static unsigned char g_raw[16];
+void StubSetStatus(int status) { g_status = status; }
+int CameraGetImageBuffer(int h, void *head, void **raw, unsigned int t) {
+    if (g_status) return g_status;
+    memset(head, 0, 8);
+    *raw = g_raw;
+    g_frame_id++;
+    return 0;
+}
+int CameraImageProcess(int h, void *in, void *out, void *head) { return 0; }
+int CameraReleaseImageBuffer(int h, void *raw) { return 0; }
+int CameraFlipFrameBuffer(void *buf, void *head, int flags) { return 0; }
+int CameraGetFrameID(int h, unsigned int *id) { *id = g_frame_id; return 0; }
+int CameraGetFrameTimeStamp(int h, unsigned int *lo, unsigned int *hi) { *lo = g_frame_id; *hi = 0; return 0; }
+int CameraGetImageBufferPriorityEx3(int h, void *out, unsigned int fmt, int *w, int *hh,
+                                    unsigned int *ts, unsigned int t, unsigned int p) {
+    if (g_status) return g_status;
+    *w = 640; *hh = 480; *ts = g_frame_id++;
+    return 0;
+}
+const char *CameraGetErrorString(int status) { return "stub"; }
+"""
+
+
+def load_stub():
+    """编译并加载桩库，soname为libMVSDK.so，之后mvsdk的LoadLibrary会直接拿到它"""
+    workdir = tempfile.mkdtemp(prefix='mvsdk_stub_')
+    src = os.path.join(workdir, 'stub.c')
+    lib = os.path.join(workdir, 'libMVSDK.so')
+    with open(src, 'w') as f:
+        f.write(STUB_SOURCE)
+    subprocess.check_call(['gcc', '-O2', '-shared', '-fPIC', '-Wl,-soname,libMVSDK.so', '-o', lib, src])
+    return ctypes.CDLL(lib, mode=ctypes.RTLD_GLOBAL)
+
+
+def bench(fn, n):
+    fn()
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - t0) / n * 1e9
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    stub = load_stub()
+    import mvsdk
+    from mvsdk_fast import FastCamera, pointer
+    mvsdk._sdk = stub  # 已经装了真实SDK时也确保测的是桩库
+
+    hCamera = 1
+    fast = FastCamera(hCamera)
+    checked = FastCamera(hCamera, checked=True)
+    head = mvsdk.tSdkFrameHead()
+    head_ref = fast.new_head()[1]
+    out = ctypes.create_string_buffer(16)
+    pOut = ctypes.addressof(out)
+    pRaw = mvsdk.CameraGetImageBuffer(hCamera, 200)[0]
+    # fast路径：地址预先转换成c_void_p
+    vOut, vRaw = pointer(pOut), pointer(pRaw)
+
+    def old_timeout():
+        try:
+            mvsdk.CameraGetImageBuffer(hCamera, 200)
+        except mvsdk.CameraException:
+            pass
+
+    def old_frame():
+        raw, fh = mvsdk.CameraGetImageBuffer(hCamera, 200)
+        mvsdk.CameraImageProcess(hCamera, raw, pOut, fh)
+        mvsdk.CameraReleaseImageBuffer(hCamera, raw)
+        mvsdk.CameraGetFrameID(hCamera)
+
+    def fast_frame(sdk=fast):
+        if sdk.get_buffer(head_ref, 200) == 0:
+            raw = sdk.raw
+            sdk.process(raw, vOut, head_ref)
+            sdk.release(raw)
+            sdk.frame_id()
+
+    cases = [
+        ('get_buffer', lambda: mvsdk.CameraGetImageBuffer(hCamera, 200), lambda: fast.get_buffer(head_ref, 200)),
+        ('process', lambda: mvsdk.CameraImageProcess(hCamera, pRaw, pOut, head), lambda: fast.process(vRaw, vOut, head_ref)),
+        ('release', lambda: mvsdk.CameraReleaseImageBuffer(hCamera, pRaw), lambda: fast.release(vRaw)),
+        ('flip', lambda: mvsdk.CameraFlipFrameBuffer(pOut, head, 1), lambda: fast.flip(vOut, head_ref, 1)),
+        ('frame_id', lambda: mvsdk.CameraGetFrameID(hCamera), fast.frame_id),
+        ('timestamp', lambda: mvsdk.CameraGetFrameTimeStamp(hCamera), fast.timestamp),
+        ('ex3', lambda: mvsdk.CameraGetImageBufferPriorityEx3(hCamera, pOut, 0, 200, 0),
+                lambda: fast.get_buffer_ex3(vOut, 0, 200, 0)),
+        ('per_frame', old_frame, fast_frame),
+        ('per_frame/chk', old_frame, lambda: fast_frame(checked)),
+    ]
+
+    print(f"每项调用 {n} 次（桩库，纯Python侧开销）")
+    print(f"{'call':<14}{'mvsdk ns':>12}{'fast ns':>12}{'speedup':>10}")
+    print("-" * 48)
+    for name, old, new in cases:
+        t_old, t_new = bench(old, n), bench(new, n)
+        print(f"{name:<14}{t_old:>12.0f}{t_new:>12.0f}{t_old / t_new:>9.2f}x")
+
+    # 200ms超时：原封装每次构造并抛出CameraException
+    stub.StubSetStatus(mvsdk.CAMERA_STATUS_TIME_OUT)
+    t_old, t_new = bench(old_timeout, n), bench(lambda: fast.get_buffer(head_ref, 200), n)
+    print(f"{'timeout':<14}{t_old:>12.0f}{t_new:>12.0f}{t_old / t_new:>9.2f}x")
+
+
+if __name__ == '__main__':
+    main()
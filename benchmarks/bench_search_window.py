@@ -0,0 +1,120 @@
+#coding=utf-8
+"""
+飞行阶段红色检测：每帧全幅（1/2缩小 + 颜色分类 + 形态学 + 连通域） vs SearchWindow 预测窗口（只处理窗口内像素）
+合成640x480画面：红色飞镖头沿抛物线飞行，中途被遮挡若干帧（测试窗口放大和退回全幅），角落有一盏红色干扰灯
+输出每帧检测耗时、窗口命中/放大/退回全幅次数、窗口平均面积占比，以及两种方式得到的飞镖位置差
+用法：python3 benchmarks/bench_search_window.py [帧数] [遮挡帧数]
+"""
+import sys
+import time
+sys.path.append('.')
+import cv2
+import numpy as np
+from color_lut import HsvClassifier
+from blob_extract import BlobExtractor, blob_center
+from search_window import SearchWindow
+
+WIDTH, HEIGHT = 640, 480
+FRAME_PERIOD = 1.0 / 120
+
+
+def make_frames(n, occlusion):
+    """返回 [(t, bgr)]，遮挡从飞行中段开始"""
+    rng = np.random.default_rng(0)
+    frames = []
+    hidden = range(n // 2, n // 2 + occlusion)
+    for i in range(n):
+        bgr = rng.integers(0, 30, (HEIGHT, WIDTH, 3), dtype=np.uint8)
+        cv2.circle(bgr, (600, 40), 8, (60, 60, 250), -1)    # 干扰灯（面积低于阈值，不是候选）
+        t = i / max(n - 1, 1)
+        x, y = int(60 + 480 * t), int(40 + 380 * t * t)
+        if i not in hidden:
+            cv2.circle(bgr, (x, y), 12, (30, 30, 230), -1)
+        frames.append((i * FRAME_PERIOD, bgr))
+    return frames
+
+
+class Detector(object):
+    """与dart_detector.py相同的红色检测流程"""
+
+    def __init__(self):
+        self.classifier = HsvClassifier()
+        self.blobs = BlobExtractor(300, 10000, max_aspect=15.0)
+        self.kernel = np.ones((3, 3), np.uint8)
+
+    def detect(self, bgr, window=None):
+        if window is None:
+            detect_frame = cv2.resize(bgr, (WIDTH // 2, HEIGHT // 2), interpolation=cv2.INTER_LINEAR)
+            offset = (0, 0)
+        else:
+            x0, y0, x1, y1 = window
+            detect_frame = cv2.resize(bgr[2 * y0:2 * y1, 2 * x0:2 * x1], (x1 - x0, y1 - y0),
+                                      interpolation=cv2.INTER_LINEAR)
+            offset = (x0 * 2, y0 * 2)
+        red, _ = self.classifier.masks(detect_frame)
+        mask = cv2.morphologyEx(red, cv2.MORPH_OPEN, self.kernel)
+        mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, self.kernel)
+        candidates, _ = self.blobs.extract(mask, 2, offset)
+        return candidates
+
+
+def nearest(candidates, points):
+    """离轨迹最后一点最近的候选（避免干扰灯被当成飞镖）"""
+    if len(candidates) == 0:
+        return None
+    if not points:
+        return blob_center(candidates[0])
+    _, lx, ly = points[-1]
+    d = (candidates['cx'] - lx) ** 2 + (candidates['cy'] - ly) ** 2
+    return blob_center(candidates[int(np.argmin(d))])
+
+
+def run(frames, detector, search_window):
+    points = []
+    times = []
+    positions = []
+    for t, bgr in frames:
+        t0 = time.perf_counter()
+        window = None
+        if search_window is not None and search_window.begin(points, t) is not None:
+            window = search_window.detect_rect(2, (0, 0), WIDTH // 2, HEIGHT // 2)
+        pos = nearest(detector.detect(bgr, window), points)
+        times.append(time.perf_counter() - t0)
+        if search_window is not None:
+            if pos is not None:
+                search_window.hit()
+            else:
+                search_window.miss()
+        if pos is not None:
+            points.append((t, pos[0], pos[1]))
+        positions.append(pos)
+    return np.array(times) * 1000.0, positions
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 120
+    occlusion = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    cv2.setNumThreads(1)
+    frames = make_frames(n, occlusion)
+    detector = Detector()
+
+    run(frames[:5], detector, None)  # 预热
+    t_full, pos_full = run(frames, detector, None)
+    print(f"{n} 帧 {WIDTH}x{HEIGHT}，遮挡 {occlusion} 帧，单线程")
+    print(f"{'方式':<14}{'ms/帧':>8}{'P95 ms':>8}{'找到':>6}{'命中':>6}{'放大':>6}{'退回全幅':>10}{'平均窗口':>10}{'位置差 px':>10}")
+    print(f"{'全幅':<14}{t_full.mean():>8.3f}{np.percentile(t_full, 95):>8.3f}"
+          f"{sum(p is not None for p in pos_full):>6d}{'-':>6}{'-':>6}{'-':>10}{'100%':>10}{'-':>10}")
+
+    for size in (96, 128, 192):
+        for max_misses in (3, 8):
+            search_window = SearchWindow(WIDTH, HEIGHT, size, size, grow=1.5, max_misses=max_misses)
+            t_win, pos_win = run(frames, detector, search_window)
+            both = [(a, b) for a, b in zip(pos_full, pos_win) if a is not None and b is not None]
+            diff = max((abs(a[0] - b[0]) + abs(a[1] - b[1]) for a, b in both), default=0)
+            print(f"{f'窗口{size} K={max_misses}':<14}{t_win.mean():>8.3f}{np.percentile(t_win, 95):>8.3f}"
+                  f"{sum(p is not None for p in pos_win):>6d}{search_window.hits:>6d}{search_window.grows:>6d}"
+                  f"{search_window.resets:>10d}{search_window.coverage:>10.1%}{diff:>10d}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+#coding=utf-8
+"""
+背景静态灯光排除：红色掩模直接做形态学+连通域 vs 先与 StaticLightMask 的保留掩模做一次bitwise_and（不需要相机）
+合成320x240检测图的红色掩模：飞镖头沿抛物线飞行 + 0~60盏静态背景灯（带少量闪烁噪点），
+先学习learn帧得到排除掩模，再统计每帧耗时、误检候选数和飞镖是否仍被检出
+用法：python3 benchmarks/bench_static_lights.py [帧数] [学习帧数]
+"""
+import sys
+import time
+sys.path.append('.')
+import cv2
+import numpy as np
+from blob_extract import BlobExtractor
+from static_lights import StaticLightMask
+
+WIDTH, HEIGHT = 320, 240
+SCALE = 2
+FRAME_PERIOD = 1.0 / 60
+
+
+def make_masks(n, lamps, seed=0):
+    """返回 [(红色掩模, 飞镖中心（显示坐标）)]"""
+    rng = np.random.default_rng(seed)
+    positions = [(int(rng.integers(10, WIDTH - 10)), int(rng.integers(10, HEIGHT - 10))) for _ in range(lamps)]
+    masks = []
+    for i in range(n):
+        mask = np.zeros((HEIGHT, WIDTH), np.uint8)
+        for x, y in positions:
+            cv2.circle(mask, (x, y), int(rng.integers(5, 7)), 255, -1)   # 亮度波动导致半径变化
+        t = (i % 60) / 60.0
+        dart = (int(30 + 260 * t), int(20 + 200 * t * t))
+        cv2.circle(mask, dart, 7, 255, -1)
+        masks.append((mask, (dart[0] * SCALE, dart[1] * SCALE)))
+    return masks
+
+
+def detect(mask, blobs, kernel):
+    m = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel)
+    m = cv2.morphologyEx(m, cv2.MORPH_CLOSE, kernel)
+    candidates, _ = blobs.extract(m, SCALE)
+    return candidates
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 120
+    learn = int(sys.argv[2]) if len(sys.argv) > 2 else 180
+    cv2.setNumThreads(1)
+    blobs = BlobExtractor(300, 10000, max_aspect=15.0)
+    kernel = np.ones((3, 3), np.uint8)
+
+    print(f"{n} 帧 {WIDTH}x{HEIGHT} 红色掩模，学习 {learn} 帧（{learn * FRAME_PERIOD:.1f} 秒），单线程")
+    print(f"{'静态灯':>6}{'直接 ms':>9}{'排除 ms':>9}{'候选/帧 直接':>14}{'候选/帧 排除':>14}{'飞镖检出':>10}{'排除占比':>10}")
+    for lamps in (0, 5, 20, 60):
+        # 学习用另一段画面（同样的灯，飞镖位置不同）
+        lights = StaticLightMask(WIDTH * SCALE, HEIGHT * SCALE, learn_seconds=(learn - 1) * FRAME_PERIOD)
+        for i, (mask, _) in enumerate(make_masks(learn, lamps)):
+            lights.observe(mask.copy(), SCALE, (0, 0), i * FRAME_PERIOD)
+        masks = make_masks(n, lamps)
+
+        t0 = time.perf_counter()
+        direct = [len(detect(m, blobs, kernel)) for m, _ in masks]
+        t_direct = (time.perf_counter() - t0) / n * 1000.0
+
+        found = 0
+        excluded = []
+        t0 = time.perf_counter()
+        for m, dart in masks:
+            m = m.copy()
+            lights.apply(m, SCALE, (0, 0))
+            candidates = detect(m, blobs, kernel)
+            excluded.append(len(candidates))
+            if len(candidates) and np.min(np.hypot(candidates['cx'] - dart[0], candidates['cy'] - dart[1])) < 6:
+                found += 1
+        t_excluded = (time.perf_counter() - t0) / n * 1000.0
+        print(f"{lamps:>6d}{t_direct:>9.3f}{t_excluded:>9.3f}{np.mean(direct):>14.2f}{np.mean(excluded):>14.2f}"
+              f"{found / n:>10.0%}{lights.excluded:>10.1%}")
+
+
+if __name__ == '__main__':
+    main()
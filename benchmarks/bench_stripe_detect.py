@@ -0,0 +1,81 @@
+#coding=utf-8
+"""
+分条并行检测：颜色分类 + 开运算 + 闭运算 + 连通域，StripeDetector 1~4 个线程的每帧耗时和加速比（不需要相机）
+合成检测图：暗背景 + 若干红色斑点/细线（跨条边界的连通域需要合并），检测分辨率 320x240、640x480、1280x960，
+并检查并行结果与串行逐项一致；OpenCV内部线程关闭（cv2.setNumThreads(1)），只测分条带来的并行
+用法：python3 benchmarks/bench_stripe_detect.py [帧数]
+"""
+import os
+import sys
+import time
+sys.path.append('.')
+import cv2
+import numpy as np
+from color_lut import HsvClassifier
+from blob_extract import BlobExtractor
+from stripe_detect import StripeDetector
+
+
+def make_frames(n, width, height):
+    rng = np.random.default_rng(0)
+    frames = []
+    for _ in range(n):
+        bgr = rng.integers(0, 30, (height, width, 3), dtype=np.uint8)
+        for k in range(30):
+            c = (int(rng.integers(0, width)), int(rng.integers(0, height)))
+            if k % 5 == 0:
+                end = (int(rng.integers(0, width)), int(rng.integers(0, height)))
+                cv2.line(bgr, c, end, (30, 30, 230), 3)
+            else:
+                cv2.circle(bgr, c, int(rng.integers(3, 12)) * width // 320, (30, 30, 230), -1)
+        frames.append(bgr)
+    return frames
+
+
+def run(detector, frames):
+    results = []
+    t0 = time.perf_counter()
+    for bgr in frames:
+        red, _ = detector.classify(bgr)
+        results.append(detector.extract(red, 2))
+    return (time.perf_counter() - t0) / len(frames) * 1000.0, results
+
+
+def same(a, b):
+    for (ca, ra), (cb, rb) in zip(a, b):
+        for x, y in ((ca, cb), (ra, rb)):
+            if len(x) != len(y):
+                return False
+            for name in ('x', 'y', 'w', 'h', 'area'):
+                if not np.array_equal(x[name], y[name]):
+                    return False
+            if not (np.allclose(x['cx'], y['cx'], atol=1e-3) and np.allclose(x['cy'], y['cy'], atol=1e-3)):
+                return False
+    return True
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    cv2.setNumThreads(1)
+    classifier = HsvClassifier()
+    extractor = BlobExtractor(300, 100000, max_aspect=15.0)
+
+    print(f"{n} 帧，CPU核数 {os.cpu_count()}，OpenCV内部线程关闭")
+    print(f"{'检测分辨率':<12}{'线程':>6}{'ms/帧':>10}{'加速比':>8}{'跨条合并/帧':>12}{'与串行一致':>12}")
+    for width, height in ((320, 240), (640, 480), (1280, 960)):
+        frames = make_frames(n, width, height)
+        base, base_results = None, None
+        for workers in (1, 2, 3, 4):
+            detector = StripeDetector(classifier, extractor, workers)
+            run(detector, frames[:5])
+            detector.merges = 0
+            elapsed, results = run(detector, frames)
+            detector.close()
+            if base is None:
+                base, base_results = elapsed, results
+            print(f"{f'{width}x{height}':<12}{workers:>6d}{elapsed:>10.3f}{base / elapsed:>7.2f}x"
+                  f"{detector.merges / n:>12.1f}{'是' if same(base_results, results) else '否':>12}")
+
+
+if __name__ == '__main__':
+    main()
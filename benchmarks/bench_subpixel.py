@@ -0,0 +1,111 @@
+#coding=utf-8
+"""
+亚像素飞镖中心：外接框中心 / 检测图（1/2）二值掩模质心 vs SubpixelRefiner 全分辨率小块加权质心（不需要相机）
+回放合成640x480画面：飞镖头（抗锯齿，亚像素位置）沿抛物线飞行，加传感器噪声，
+统计与真实中心的误差（RMS）、抖动（相邻帧位移与真实位移之差的RMS）和每帧检测耗时/细化增加的耗时，
+全分辨率图分别用ISP后的BGR、RAW Bayer（小块去马赛克）和1/2缩小图（BIN输出）
+用法：python3 benchmarks/bench_subpixel.py [帧数] [噪声]
+"""
+import sys
+import time
+sys.path.append('.')
+import cv2
+import numpy as np
+from color_lut import HsvClassifier
+from blob_extract import BlobExtractor
+from subpixel import SubpixelRefiner
+
+WIDTH, HEIGHT = 640, 480
+
+
+def mosaic_gr(bgr):
+    """BGR -> BayerGR8（第一行 G R，第二行 B G），与模拟相机相同"""
+    raw = np.empty(bgr.shape[:2], np.uint8)
+    raw[0::2, 0::2] = bgr[0::2, 0::2, 1]
+    raw[0::2, 1::2] = bgr[0::2, 1::2, 2]
+    raw[1::2, 0::2] = bgr[1::2, 0::2, 0]
+    raw[1::2, 1::2] = bgr[1::2, 1::2, 1]
+    return raw
+
+
+def make_frames(n, noise):
+    """返回 [(BGR帧, 真实中心)]，中心按1/16像素绘制"""
+    rng = np.random.default_rng(0)
+    background = rng.integers(0, 25, (HEIGHT, WIDTH, 3), dtype=np.uint8)
+    frames = []
+    for i in range(n):
+        bgr = background.copy()
+        if noise:
+            cv2.add(bgr, rng.integers(0, noise, bgr.shape, dtype=np.uint8), dst=bgr)
+        k = i / max(n - 1, 1)
+        x, y = 120.0 + 350.0 * k, 30.0 + 380.0 * k * k
+        center = (int(round(x * 16)), int(round(y * 16)))
+        cv2.circle(bgr, center, 12 * 16, (30, 30, 230), -1, cv2.LINE_AA, 4)
+        cv2.circle(bgr, center, 4 * 16, (200, 200, 255), -1, cv2.LINE_AA, 4)
+        frames.append((bgr, (x, y)))
+    return frames
+
+
+def detect(bgr, classifier, blobs, kernel):
+    detect_frame = cv2.resize(bgr, (WIDTH // 2, HEIGHT // 2), interpolation=cv2.INTER_LINEAR)
+    red, _ = classifier.masks(detect_frame)
+    mask = cv2.morphologyEx(red, cv2.MORPH_OPEN, kernel)
+    mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel)
+    candidates, _ = blobs.extract(mask, 2)
+    return candidates, detect_frame
+
+
+def errors(points, truth):
+    """(RMS误差, 抖动RMS)：抖动为相邻帧位移与真实位移之差"""
+    points, truth = np.array(points), np.array(truth)
+    err = np.sqrt(np.mean(np.sum((points - truth) ** 2, axis=1)))
+    step = np.diff(points, axis=0) - np.diff(truth, axis=0)
+    return err, np.sqrt(np.mean(np.sum(step ** 2, axis=1)))
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    noise = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    cv2.setNumThreads(1)
+    frames = make_frames(n, noise)
+    classifier = HsvClassifier()
+    blobs = BlobExtractor(300, 10000, max_aspect=15.0)
+    kernel = np.ones((3, 3), np.uint8)
+    refiner = SubpixelRefiner()
+
+    results = {'外接框中心': [], '二值掩模质心': [], '细化 BGR': [], '细化 RAW': [], '细化 1/2图': []}
+    added = {'细化 BGR': 0.0, '细化 RAW': 0.0, '细化 1/2图': 0.0}
+    truth = []
+    t_detect = 0.0
+    for bgr, center in frames:
+        raw = mosaic_gr(cv2.flip(bgr, 1))    # 传感器方向（镜像之前）的RAW图
+        t0 = time.perf_counter()
+        candidates, detect_frame = detect(bgr, classifier, blobs, kernel)
+        t_detect += time.perf_counter() - t0
+        if len(candidates) == 0:
+            continue
+        truth.append(center)
+        blob = candidates[:1]
+        results['外接框中心'].append((blob['x'][0] + (blob['w'][0] - 1) / 2.0, blob['y'][0] + (blob['h'][0] - 1) / 2.0))
+        results['二值掩模质心'].append((float(blob['cx'][0]), float(blob['cy'][0])))
+        for name, args in (('细化 BGR', (bgr, 1)),
+                           ('细化 RAW', (raw, 1, (0, 0), True, cv2.COLOR_BayerGB2BGR)),
+                           ('细化 1/2图', (detect_frame, 2))):
+            b = blob.copy()
+            t0 = time.perf_counter()
+            refiner.refine(b, *args)
+            added[name] += time.perf_counter() - t0
+            results[name].append((float(b['cx'][0]), float(b['cy'][0])))
+
+    found = len(truth)
+    print(f"{n} 帧 {WIDTH}x{HEIGHT}（检出 {found} 帧），噪声 {noise}，检测（1/2缩小+颜色分类+形态学+连通域）"
+          f"{t_detect / n * 1000:.3f} ms/帧，单线程")
+    print(f"{'中心':<12}{'RMS误差 px':>12}{'抖动 px':>10}{'增加 ms/帧':>12}")
+    for name, points in results.items():
+        err, jitter = errors(points, truth)
+        cost = f"{added[name] / found * 1000:.3f}" if name in added else '-'
+        print(f"{name:<12}{err:>12.3f}{jitter:>10.3f}{cost:>12}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+#coding=utf-8
+"""
+轨迹拟合：每帧对全部轨迹点重新 np.polyfit vs IncrementalPolyFit（累加和，每个点O(1)）（不需要相机）
+轨迹长度 10~1000 点的抛物线（加0.5像素噪声），统计轨迹长度为N时加一个点并取得 x(t)、y(t) 二次系数的耗时，
+并检查两种方法的系数一致（forgetting=1 对比 np.polyfit，forgetting<1 对比按 forgetting^点龄 加权的 np.polyfit）
+用法：python3 benchmarks/bench_trajectory_fit.py [重复次数]
+"""
+import copy
+import sys
+import time
+sys.path.append('.')
+import numpy as np
+from trajectory_fit import IncrementalPolyFit
+
+LENGTHS = (10, 30, 100, 300, 1000)
+FPS = 120.0
+
+
+def make_points(n, rng):
+    t = np.arange(n) / FPS
+    x = 130.0 + 140.0 * t + rng.normal(0, 0.5, n)
+    y = 20.0 + 100.0 * t + 900.0 * t * t + rng.normal(0, 0.5, n)
+    return t, x, y
+
+
+def refit_us(t, xy, repeat, forgetting):
+    """长度为len(t)的轨迹重新拟合一次的耗时（微秒）和系数（高次在前，与np.polyfit相同）"""
+    w = None
+    if forgetting < 1.0:
+        w = np.sqrt(forgetting ** np.arange(len(t) - 1, -1, -1))
+    tau = t - t[0]
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        coeffs = np.polyfit(tau, xy, 2, w=w)
+    return (time.perf_counter() - t0) / repeat * 1e6, coeffs
+
+
+def incremental_us(t, x, y, repeat, forgetting):
+    """已有len(t)-1个点时，加最后一个点并取系数的耗时（微秒）"""
+    base = IncrementalPolyFit(2, forgetting)
+    for i in range(len(t) - 1):
+        base.add(t[i], x[i], y[i])
+    elapsed = 0.0
+    for _ in range(repeat):
+        fit = copy.deepcopy(base)       # 每次都从同一个完整状态开始（含times、_last_t、系数缓存）
+        t0 = time.perf_counter()
+        fit.add(t[-1], x[-1], y[-1])
+        coeffs = fit.coefficients
+        elapsed += time.perf_counter() - t0
+    return elapsed / repeat * 1e6, fit.coefficients[::-1], fit.residuals
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    rng = np.random.default_rng(0)
+    print(f"二次拟合 x(t)、y(t)，{FPS:.0f}fps 抛物线，噪声0.5像素，每项重复 {repeat} 次")
+    print(f"{'遗忘':>6}{'点数':>7}{'polyfit us':>12}{'增量 us':>10}{'加速':>8}{'系数最大差':>12}{'残差 x/y 像素':>16}")
+    for forgetting in (1.0, 0.95):
+        for n in LENGTHS:
+            t, x, y = make_points(n, rng)
+            full_us, full = refit_us(t, np.stack([x, y], axis=1), repeat, forgetting)
+            inc_us, inc, residuals = incremental_us(t, x, y, repeat, forgetting)
+            diff = np.max(np.abs(full - inc))
+            print(f"{forgetting:>6.2f}{n:>7}{full_us:>12.1f}{inc_us:>10.1f}{full_us / inc_us:>7.1f}x{diff:>12.2e}"
+                  f"{residuals[0]:>8.2f} /{residuals[1]:>5.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+#coding=utf-8
+"""
+轨迹存储：(t, x, y) 元组列表（超过100点 pop(0)，完成时 .copy()，逐段 cv2.line 绘制）
+vs TrajectoryRing + TrajectoryArena（预分配结构化数组，cv2.polylines 一次绘制）（不需要相机）
+模拟一局：max_darts 支飞镖，每支 points 个点（超过容量时丢弃最早的点），每帧都画全部已完成轨迹和当前轨迹，
+并取当前轨迹的 t/x/y 数组（拟合、导出用）；统计
+  - 每个点的追加耗时、每帧绘制耗时、每帧取 t/x/y 数组的耗时（各 ROUNDS 轮取最快）
+  - 一局结束时轨迹数据占用的内存（tracemalloc，列表为所有元组和数字对象，数组为预分配的缓冲）
+用法：python3 benchmarks/bench_trajectory_store.py [每支点数] [飞镖数]
+"""
+import sys
+import time
+import tracemalloc
+sys.path.append('.')
+import cv2
+import numpy as np
+from trajectory_store import TrajectoryRing, TrajectoryArena
+
+WIDTH, HEIGHT = 640, 480
+CAPACITY = 100
+ROUNDS = 5
+
+
+def make_points(count, darts):
+    """每支飞镖一条抛物线 (t, x, y, area, frame_id)，坐标为亚像素浮点"""
+    rng = np.random.default_rng(0)
+    tracks = []
+    for d in range(darts):
+        t = d * 2.0 + np.arange(count) / 200.0
+        k = np.linspace(0.0, 1.0, count)
+        x = 130 + 300 * k + rng.normal(0, 0.3, count)
+        y = 20 + 400 * k * k + rng.normal(0, 0.3, count)
+        area = rng.uniform(300, 600, count)
+        frame = d * 1000 + np.arange(count)
+        tracks.append([(float(a), float(b), float(c), float(e), int(f)) for a, b, c, e, f in zip(t, x, y, area, frame)])
+    return tracks
+
+
+class ListStore(object):
+    """原来的写法：当前轨迹为 (t, x, y) 整数坐标元组列表，完成的轨迹为列表的拷贝"""
+
+    def __init__(self):
+        self.current = []
+        self.completed = []
+
+    def append(self, t, x, y, area, frame_id):
+        self.current.append((t, int(round(x)), int(round(y))))
+        if len(self.current) > CAPACITY:
+            self.current.pop(0)
+
+    def finish(self):
+        self.completed.append(self.current.copy())
+        self.current.clear()
+
+    def draw(self, frame):
+        for traj in self.completed:
+            for i in range(1, len(traj)):
+                cv2.line(frame, traj[i - 1][1:], traj[i][1:], (255, 0, 0), 1)
+        for i in range(1, len(self.current)):
+            cv2.line(frame, self.current[i - 1][1:], self.current[i][1:], (0, 0, 255), 2)
+
+    def arrays(self):
+        return np.array(self.current, np.float64).T
+
+
+class ArrayStore(object):
+    """TrajectoryRing + TrajectoryArena"""
+
+    def __init__(self, darts):
+        self.current = TrajectoryRing(CAPACITY)
+        self.completed = TrajectoryArena(darts * CAPACITY, darts)
+
+    def append(self, t, x, y, area, frame_id):
+        self.current.append(t, x, y, area, frame_id)
+
+    def finish(self):
+        self.completed.add(self.current.points)
+        self.current.clear()
+
+    def draw(self, frame):
+        if len(self.completed) > 0:
+            cv2.polylines(frame, self.completed.polylines(), False, (255, 0, 0), 1)
+        if len(self.current) > 1:
+            cv2.polylines(frame, [self.current.polyline()], False, (0, 0, 255), 2)
+
+    def arrays(self):
+        points = self.current.points
+        return points['t'], points['x'], points['y']
+
+
+def play(store, tracks, frame):
+    """一局：每个点追加后画一帧、取一次数组，返回 (追加, 绘制, 取数组) 的每次平均微秒"""
+    spent = [0.0, 0.0, 0.0]
+    calls = 0
+    for track in tracks:
+        for point in track:
+            t0 = time.perf_counter()
+            store.append(*point)
+            t1 = time.perf_counter()
+            store.draw(frame)
+            t2 = time.perf_counter()
+            store.arrays()
+            t3 = time.perf_counter()
+            spent[0] += t1 - t0
+            spent[1] += t2 - t1
+            spent[2] += t3 - t2
+            calls += 1
+        store.finish()
+    return [s / calls * 1e6 for s in spent]
+
+
+def session_bytes(make_store, tracks):
+    """一局结束（最后一支飞镖还在飞）时轨迹数据占用的内存"""
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    store = make_store()
+    for k, track in enumerate(tracks):
+        for point in track:
+            store.append(*point)
+        if k < len(tracks) - 1:
+            store.finish()
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return after - before
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 150
+    darts = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    cv2.setNumThreads(1)
+    tracks = make_points(count, darts)
+    frame = np.zeros((HEIGHT, WIDTH, 3), np.uint8)
+    stores = (('元组列表', ListStore), ('结构化数组', lambda: ArrayStore(darts)))
+
+    print(f"{darts} 支飞镖 x {count} 点，当前轨迹最多 {CAPACITY} 点，每个点画一帧（已完成轨迹 + 当前轨迹）")
+    print(f"{'写法':<10}{'追加 us/点':>12}{'绘制 us/帧':>12}{'取t/x/y us':>12}{'内存 KB':>10}")
+    for name, make_store in stores:
+        best = [float('inf')] * 3
+        for _ in range(ROUNDS):
+            best = [min(a, b) for a, b in zip(best, play(make_store(), tracks, frame))]
+        kb = session_bytes(make_store, tracks) / 1024.0
+        print(f"{name:<10}{best[0]:>12.2f}{best[1]:>12.1f}{best[2]:>12.2f}{kb:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
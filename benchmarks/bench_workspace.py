@@ -0,0 +1,243 @@
+#coding=utf-8
+"""
+检测中间缓冲：每帧新分配（缩小、颜色分类、掩模、形态学、连通域都返回新数组）vs DetectionWorkspace（dst= 写进预分配缓冲）（不需要相机）
+合成画面：暗背景 + 传感器噪声 + 绿灯 + 飞镖头，两种写法都按1/2检测（缩小 + cvtColor/inRange + 开闭运算 + 连通域 + 亚像素细化）
+  - 分配：tracemalloc 统计预热之后每帧各步骤的分配峰值（相对步骤开始时）。飞镖停在画面里不动（稳定运行），
+    预热 STILL_WARMUP 帧后每个步骤取所有帧中出现最多的值（个别帧上解释器的空闲链表、字典扩容等会差几十字节），减去统计代码自己的分配（ProbePipeline）。
+    同一场景在 640x480 和 1280x960（多出来的只是背景，飞镖、绿灯的位置和大小不变）上各测一次：
+    workspace 版本每个步骤在两种分辨率下的分配必须逐字节相同，即每帧为图像分配的字节数为0，否则退出码为1。
+    两种分辨率下都剩下的是与图像尺寸无关的 Python 小对象，按步骤：
+      缩小      ResolutionGovernor 的计数器（超过256的整数每次加1都是新对象）、检测图视图和坐标元组
+      颜色分类  OpenCV 绑定为 dst= 关键字参数建的参数字典、返回的元组
+      连通域    connectedComponentsWithStats 新建的 stats/centroids（连通域数 x 5/2）、候选外接框上 findContours 返回的
+                轮廓列表和点数组、from_stats 按连通域数的过滤数组、输出的候选结构化数组（都只与连通域数和候选轮廓长度有关）
+      亚像素    cv2.moments 返回的24项字典和每个候选的 NumPy 标量
+    这些对象由 OpenCV/NumPy 的接口返回，不经过 workspace，数值随 Python/NumPy/OpenCV 版本变化，只打印不断言
+  - 每帧耗时（tracemalloc 关闭，飞镖沿抛物线飞行）分两种测：只跑检测；与主程序/无界面版本 ISP 不支持镜像时一样，
+    检测之前先 cv2.flip 出一张整幅帧（检测期间一直占着，这一帧处理完才释放）。glibc 把刚释放的块原样还回来时两种写法差不多；
+    每帧分配的写法检测中途的分配峰值加上这张整幅帧超过 glibc 的堆收缩阈值（M_TRIM_THRESHOLD）时，每帧结束时堆顶还给系统、
+    下一帧重新缺页（minor fault）清零，缺页数一列可以看出有没有发生。
+    两种写法交替跑 ROUNDS 轮取最快的一轮，同时统计每帧缺页数（Linux）
+用法：python3 benchmarks/bench_workspace.py [帧数] [噪声]
+"""
+import gc
+import sys
+from collections import Counter
+import time
+import tracemalloc
+try:
+    import resource
+except ImportError:      # Windows：不统计缺页
+    resource = None
+sys.path.append('.')
+import cv2
+import numpy as np
+from color_lut import HsvClassifier, DEFAULT_RED_RANGES, DEFAULT_GREEN_RANGE
+from blob_extract import BlobExtractor
+from stripe_detect import StripeDetector
+from subpixel import SubpixelRefiner
+from resolution import ResolutionGovernor
+from workspace import DetectionWorkspace
+
+WIDTH, HEIGHT = 640, 480
+SIZES = ((800, 600), (1280, 960))     # 分配对比的两种分辨率（检测图的宽高都超过256，Python 不缓存这么大的整数，两种分辨率下都是新对象）
+LED = (320, 420)
+WARMUP = 10
+STILL_WARMUP = 100      # 分配统计的预热帧数：前几十帧解释器的空闲链表还在变化，每帧的分配差几十字节
+STILL_FRAMES = 100      # 分配统计的帧数（20张不动的画面循环使用）
+ROUNDS = 5
+STAGES = ('缩小', '颜色分类', '连通域', '亚像素')
+
+
+def make_frames(count, noise, still=False, width=WIDTH, height=HEIGHT):
+    """
+    飞镖从左上沿抛物线飞到绿灯高度（still 为True时停在半路不动，只有噪声变化），返回BGR帧列表
+    飞镖和绿灯的位置、大小与 width/height 无关，画面变大时多出来的只是背景
+    """
+    rng = np.random.default_rng(0)
+    background = rng.integers(0, 25, (height, width, 3), dtype=np.uint8)
+    cv2.circle(background, LED, 28, (40, 220, 40), -1)
+    frames = []
+    for i in range(count):
+        bgr = background.copy()
+        if noise:
+            cv2.add(bgr, rng.integers(0, noise, bgr.shape, dtype=np.uint8), dst=bgr)
+        k = 0.5 if still else (i % 60) / 59.0
+        center = (int(130 + 220 * k), int(20 + (LED[1] - 40) * k * k))
+        cv2.circle(bgr, center, 12, (30, 30, 230), -1)
+        cv2.circle(bgr, center, 4, (200, 200, 255), -1)
+        frames.append(bgr)
+    return frames
+
+
+class AllocatingPipeline(object):
+    """原来的写法：每一步都返回新数组"""
+
+    def __init__(self, blobs, red_ranges=DEFAULT_RED_RANGES, green_range=DEFAULT_GREEN_RANGE):
+        self.blobs = blobs
+        self.red_ranges = red_ranges
+        self.green_range = green_range
+
+    def steps(self, bgr):
+        """按 STAGES 逐步检测，每步之后 yield（统计各步骤的分配），最后 yield (candidates, green)"""
+        small = cv2.resize(bgr, (bgr.shape[1] // 2, bgr.shape[0] // 2), interpolation=cv2.INTER_LINEAR)
+        yield
+        hsv = cv2.cvtColor(small, cv2.COLOR_BGR2HSV)
+        (lower1, upper1), (lower2, upper2) = self.red_ranges
+        red = cv2.bitwise_or(cv2.inRange(hsv, np.array(lower1), np.array(upper1)),
+                             cv2.inRange(hsv, np.array(lower2), np.array(upper2)))
+        green = cv2.inRange(hsv, np.array(self.green_range[0]), np.array(self.green_range[1]))
+        yield
+        kernel = np.ones((3, 3), np.uint8)
+        mask = cv2.morphologyEx(red, cv2.MORPH_OPEN, kernel)
+        mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel)
+        candidates, _ = self.blobs.extract(mask, 2)
+        yield
+        for blob in candidates[:4]:
+            x0, y0 = max(0, int(blob['x']) - 4), max(0, int(blob['y']) - 4)
+            patch = bgr[y0:int(blob['y'] + blob['h']) + 4, x0:int(blob['x'] + blob['w']) + 4]
+            b, g, r = cv2.split(patch)
+            weight = cv2.subtract(r, cv2.max(g, b))
+            cv2.moments(weight)
+        yield candidates, green
+
+
+class WorkspacePipeline(object):
+    """DetectionWorkspace：各步骤 dst= 写进预分配缓冲"""
+
+    def __init__(self, blobs, width=WIDTH, height=HEIGHT):
+        workspace = DetectionWorkspace(width, height)
+        self.workspace = workspace
+        self.governor = ResolutionGovernor(1, None, 2, 2, workspace)
+        self.detector = StripeDetector(HsvClassifier(workspace=workspace), blobs, 1)
+        self.refiner = SubpixelRefiner(workspace=workspace)
+
+    def steps(self, bgr):
+        """同 AllocatingPipeline.steps"""
+        self.governor.select(False)
+        detect_frame, offset, _ = self.governor.prepare(bgr)
+        yield
+        red, green = self.detector.classify(detect_frame)
+        yield
+        candidates, _ = self.detector.extract(red, 2, offset)
+        yield
+        self.refiner.refine(candidates, bgr)
+        yield candidates, green
+
+
+class ProbePipeline(object):
+    """什么都不做，只在同样的位置 yield：测出统计代码自己的分配（get_traced_memory 返回的元组和整数），从各步骤里减掉"""
+
+    def steps(self, bgr):
+        for _ in STAGES[:-1]:
+            yield
+        yield None, None
+
+
+def detect(pipeline, bgr):
+    """跑完一帧检测，返回 (candidates, green)"""
+    for result in pipeline.steps(bgr):
+        pass
+    return result
+
+
+def traced_stages(pipeline, frames):
+    """预热 STILL_WARMUP 帧之后每帧各步骤的分配峰值（字节，相对步骤开始时），每个步骤取所有帧中出现最多的值"""
+    for bgr in frames[:STILL_WARMUP]:
+        detect(pipeline, bgr)
+    # 垃圾回收的时机取决于之前的分配次数，回收时放回空闲链表的元组等会让个别帧少分配几十字节：统计期间关掉
+    gc.collect()
+    gc.disable()
+    tracemalloc.start()
+    counts = [Counter() for _ in STAGES]
+    for bgr in frames[STILL_WARMUP:]:
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        for i, result in enumerate(pipeline.steps(bgr)):
+            current, top = tracemalloc.get_traced_memory()
+            counts[i][top - before] += 1
+            tracemalloc.reset_peak()
+            before = current
+        del result
+    tracemalloc.stop()
+    gc.enable()
+    return [c.most_common(1)[0][0] for c in counts]
+
+
+def stage_bytes(pipeline, frames, probe):
+    """各步骤稳定运行时的分配（字节），减去统计代码自己的分配 probe"""
+    return [b - p for b, p in zip(traced_stages(pipeline, frames), probe)]
+
+
+def minor_faults():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_minflt if resource is not None else 0
+
+
+def frame_ms(pipeline, frames, mirror):
+    """每帧耗时（毫秒）和每帧缺页数，mirror 为True时检测之前先翻转出一张整幅帧，检测在它上面做，处理完才释放"""
+    faults = minor_faults()
+    t0 = time.perf_counter()
+    for bgr in frames:
+        if mirror:
+            frame = cv2.flip(bgr, 1)
+            detect(pipeline, frame)
+            del frame
+        else:
+            detect(pipeline, bgr)
+    ms = (time.perf_counter() - t0) / len(frames) * 1000.0
+    return ms, (minor_faults() - faults) / float(len(frames))
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    noise = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    cv2.setNumThreads(1)
+    frames = make_frames(count, noise)
+    blobs = BlobExtractor(300, 10000, max_aspect=15.0)
+    pipelines = (('每帧分配', AllocatingPipeline(blobs)), ('workspace', WorkspacePipeline(blobs)))
+
+    print(f"{count} 帧 {WIDTH}x{HEIGHT}，1/2检测，噪声 {noise}，单线程")
+    best = dict(((name, mirror), (float('inf'), 0.0)) for name, _ in pipelines for mirror in (False, True))
+    for _, pipeline in pipelines:
+        for bgr in frames[:WARMUP]:
+            detect(pipeline, bgr)
+    for _ in range(ROUNDS):
+        for mirror in (False, True):
+            for name, pipeline in pipelines:
+                best[name, mirror] = min(best[name, mirror], frame_ms(pipeline, frames, mirror))
+    print(f"{'写法':<12}{'只检测 ms/帧':>14}{'缺页/帧':>10}{'翻转+检测 ms/帧':>18}{'缺页/帧':>10}")
+    for name, _ in pipelines:
+        (ms, faults), (ms_mirror, faults_mirror) = best[name, False], best[name, True]
+        print(f"{name:<12}{ms:>14.3f}{faults:>10.1f}{ms_mirror:>18.3f}{faults_mirror:>10.1f}")
+    for mirror, label in ((False, '只检测'), (True, '翻转+检测')):
+        print(f"{label} workspace 加速 {best['每帧分配', mirror][0] / best['workspace', mirror][0]:.2f}x")
+
+    print(f"稳定运行（飞镖不动）每帧各步骤的分配，字节（预热 {STILL_WARMUP} 帧后 {STILL_FRAMES} 帧取出现最多的值，已减去统计代码自己的分配）")
+    print(f"{'写法':<12}{'分辨率':>10}" + ''.join(f"{stage:>10}" for stage in STAGES))
+    measured = {}
+    for width, height in SIZES:
+        still = make_frames(20, noise, True, width, height) * ((STILL_WARMUP + STILL_FRAMES) // 20)
+        probe = traced_stages(ProbePipeline(), still)
+        for name, pipeline in (('每帧分配', AllocatingPipeline(blobs)),
+                               ('workspace', WorkspacePipeline(blobs, width, height))):
+            stages = stage_bytes(pipeline, still, probe)
+            measured[name, width] = stages
+            print(f"{name:<12}{f'{width}x{height}':>10}" + ''.join(f"{b:>10}" for b in stages))
+            if name == 'workspace':
+                ws = pipeline.workspace
+                print(f"{'':<12}{'':>10}  workspace 缓冲 {ws.nbytes / 1024.0:.0f} KB，分配 {ws.allocations} 次")
+    (small, _), (large, _) = SIZES
+    print(f"{'分辨率变大后多分配的字节':<12}")
+    ok = True
+    for name in ('每帧分配', 'workspace'):
+        grown = [b - a for a, b in zip(measured[name, small], measured[name, large])]
+        print(f"{name:<12}{'':>10}" + ''.join(f"{b:>10}" for b in grown))
+        if name == 'workspace':
+            ok = not any(grown)
+    print(f"workspace 稳定运行时每帧为图像分配 0 字节（各步骤的分配与分辨率无关）: {'是' if ok else '否'}")
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,208 @@
+#coding=utf-8
+"""
+颜色分类：得到红色和绿色掩模（0/255，与inRange的输出格式相同）
+  - HsvClassifier（默认）：cvtColor(BGR2HSV) + 两段红色inRange + bitwise_or + 绿色inRange，与原来的检测程序逐像素一致，
+    所有输出都通过 dst= 写进 DetectionWorkspace 的缓冲，每帧不分配内存
+  - ColorLut（可选，配置 color_lut.enabled）：BGR -> 颜色类别量化三维查找表，一次量化、两次查表得到两种掩模
+    建表：每个通道取高 bits 位，对 2^(3*bits) 个量化格子的中心颜色跑一遍同样的 cvtColor + inRange，结果按位存成标签
+    查表：一次 cv2.LUT（每个通道各一张256项的表，直接给出移位后的 B>>s、(G>>s)<<bits、(R>>s)<<2bits），
+    一次 cv2.transform 把三个通道加起来、拷进intp下标缓冲，再 np.take 一次得到掩模
+    （np.take 的下标必须是intp，其他类型会临时转换一整份；跨步的通道视图用 np.add 相加会分配迭代缓冲，cv2.transform 不会）
+    intp下标缓冲每像素8字节，只在打开查表时才从 workspace 分配
+    只有 bits=8 与 cvtColor + inRange 逐像素一致，但表为3 x 16 MB、建表约0.4秒，每个像素都是一次随机访存；
+    bits<8 时量化格子跨过阈值的颜色会不同。单线程320x240上两种位数都比 HsvClassifier 慢
+    （bench_color_lut.py），所以默认不用，在目标板上测出更快且掩模一致之前不要打开
+两个类的接口相同（update / masks / scratch / masks_into），StripeDetector 不区分
+"""
+import cv2
+import numpy as np
+from workspace import DetectionWorkspace
+
+LABEL_RED = 1
+LABEL_GREEN = 2
+
+# 与dart_detector.py一致的默认阈值（红色在HSV中分为两段）
+DEFAULT_RED_RANGES = (((0, 100, 100), (10, 255, 255)),
+                      ((170, 100, 100), (180, 255, 255)))
+DEFAULT_GREEN_RANGE = ((35, 50, 50), (90, 255, 255))
+
+
+def _as_ranges(ranges):
+    """[(lower, upper), ...] -> 可比较的元组"""
+    return tuple((tuple(int(v) for v in lower), tuple(int(v) for v in upper)) for lower, upper in ranges)
+
+
+def _classify(bgr, red_ranges, green_range):
+    """与检测程序相同的 cvtColor + inRange，返回标签图（LABEL_RED | LABEL_GREEN 按位）"""
+    hsv = cv2.cvtColor(bgr, cv2.COLOR_BGR2HSV)
+    label = np.zeros(bgr.shape[:2], np.uint8)
+    for lower, upper in red_ranges:
+        np.bitwise_or(label, cv2.inRange(hsv, np.array(lower), np.array(upper)) & LABEL_RED, out=label)
+    lower, upper = green_range
+    np.bitwise_or(label, cv2.inRange(hsv, np.array(lower), np.array(upper)) & LABEL_GREEN, out=label)
+    return label
+
+
+def build_table(red_ranges, green_range, bits=8):
+    """
+    建表：返回 2^(3*bits) 个uint8标签，下标为 B>>s | (G>>s)<<bits | (R>>s)<<2bits（s = 8 - bits），
+    每项为该量化格子中心颜色的标签
+    """
+    n = 1 << bits
+    step = 256 // n
+    levels = (np.arange(n, dtype=np.uint16) * step + step // 2).astype(np.uint8)
+    # 按 [R][G][B] 排列，展平后的下标正好是 B | G<<bits | R<<2bits
+    cube = np.empty((n, n, n, 3), np.uint8)
+    cube[..., 0] = levels[None, None, :]
+    cube[..., 1] = levels[None, :, None]
+    cube[..., 2] = levels[:, None, None]
+    side = 1 << ((3 * bits + 1) // 2)  # cvtColor需要二维图像
+    return _classify(cube.reshape(side, -1, 3), red_ranges, green_range).reshape(-1)
+
+
+def build_quantizer(bits=8):
+    """cv2.LUT 用的 (256, 1, 3) 表：B、G、R 通道分别映射为 v>>s、(v>>s)<<bits、(v>>s)<<2bits，三个通道相加即为下标"""
+    v = np.arange(256) >> (8 - bits)
+    dtype = np.uint16 if 3 * bits <= 16 else np.int32
+    return np.stack([v, v << bits, v << (2 * bits)], -1).astype(dtype).reshape(256, 1, 3)
+
+
+class HsvClassifier(object):
+    """
+    cvtColor + inRange 颜色分类：update 设置阈值，masks 得到红/绿掩模（0/255）
+    HSV图和第二段红色的中间掩模取自 workspace（不传时自己建一个）
+    """
+
+    def __init__(self, red_ranges=DEFAULT_RED_RANGES, green_range=DEFAULT_GREEN_RANGE, workspace=None):
+        self.red_ranges = None
+        self.green_range = None
+        self._red_bounds = ()
+        self._green_bounds = None
+        self.workspace = workspace if workspace is not None else DetectionWorkspace()
+        self._names = {}            # prefix -> 中间缓冲的名字（每帧不再拼字符串）
+        self.update(red_ranges, green_range)
+
+    def update(self, red_ranges=None, green_range=None):
+        """设置阈值（None表示不变），返回是否有变化"""
+        red = _as_ranges(red_ranges) if red_ranges is not None else self.red_ranges
+        green = _as_ranges([green_range])[0] if green_range is not None else self.green_range
+        if red == self.red_ranges and green == self.green_range:
+            return False
+        # inRange 的上下限先转成数组，每帧不再转换
+        self._red_bounds = tuple((np.array(lower, np.uint8), np.array(upper, np.uint8)) for lower, upper in red)
+        self._green_bounds = tuple(np.array(v, np.uint8) for v in green)
+        self.red_ranges, self.green_range = red, green
+        return True
+
+    def scratch(self, h, w, prefix='hsv'):
+        """分类用的中间缓冲 (HSV图, 第二段红色掩模)，取自 workspace（分条处理时每条用不同的 prefix）"""
+        names = self._names.get(prefix)
+        if names is None:
+            names = self._names[prefix] = (prefix + '_hsv', prefix + '_band')
+        ws = self.workspace
+        return ws.buffer(names[0], (h, w, 3)), ws.buffer(names[1], (h, w))
+
+    def masks(self, bgr):
+        """BGR图 -> (红色掩模, 绿色掩模)，0/255（复用的缓冲）"""
+        h, w = bgr.shape[:2]
+        ws = self.workspace
+        return self.masks_into(bgr, ws.buffer('red', (h, w)), ws.buffer('green', (h, w)), *self.scratch(h, w))
+
+    def masks_into(self, bgr, red, green, hsv, band):
+        """同 masks()，结果写进调用方提供的缓冲（hsv/band 同 scratch()；red/green 可以是大图的行切片）"""
+        cv2.cvtColor(bgr, cv2.COLOR_BGR2HSV, dst=hsv)
+        (lower, upper), rest = self._red_bounds[0], self._red_bounds[1:]
+        cv2.inRange(hsv, lower, upper, dst=red)
+        for lower, upper in rest:
+            cv2.inRange(hsv, lower, upper, dst=band)
+            cv2.bitwise_or(red, band, dst=red)
+        cv2.inRange(hsv, self._green_bounds[0], self._green_bounds[1], dst=green)
+        return red, green
+
+
+class ColorLut(object):
+    """
+    颜色分类器：阈值变化时（update）重新建表，classify 得到标签图，masks 得到红/绿掩模（0/255）
+    table 为标签表，red_table / green_table 为同样下标的0/255掩模表（查出来直接是掩模，不用再拆标签）
+    输出缓冲取自 workspace（不传时自己建一个）
+    """
+
+    def __init__(self, red_ranges=DEFAULT_RED_RANGES, green_range=DEFAULT_GREEN_RANGE, bits=8, workspace=None):
+        self.bits = bits
+        self.red_ranges = None
+        self.green_range = None
+        self.table = None
+        self.red_table = None
+        self.green_table = None
+        self.quantizer = build_quantizer(bits)
+        self._sum = np.ones((1, 3))         # cv2.transform 的系数：三个通道相加
+        self._names = {}
+        self.builds = 0             # 建表次数
+        self.build_time = 0.0       # 最近一次建表耗时（秒）
+        self.workspace = workspace if workspace is not None else DetectionWorkspace()
+        self.update(red_ranges, green_range)
+
+    @property
+    def nbytes(self):
+        """三张表的总字节数"""
+        return self.table.nbytes + self.red_table.nbytes + self.green_table.nbytes
+
+    def update(self, red_ranges=None, green_range=None):
+        """设置阈值（None表示不变），有变化时重新建表，返回是否重建"""
+        red = _as_ranges(red_ranges) if red_ranges is not None else self.red_ranges
+        green = _as_ranges([green_range])[0] if green_range is not None else self.green_range
+        if red == self.red_ranges and green == self.green_range and self.table is not None:
+            return False
+        t0 = cv2.getTickCount()
+        self.table = build_table(red, green, self.bits)
+        self.red_table = np.where(self.table & LABEL_RED, 255, 0).astype(np.uint8)
+        self.green_table = np.where(self.table & LABEL_GREEN, 255, 0).astype(np.uint8)
+        self.build_time = (cv2.getTickCount() - t0) / cv2.getTickFrequency()
+        self.red_ranges, self.green_range = red, green
+        self.builds += 1
+        return True
+
+    def scratch(self, h, w, prefix='lut'):
+        """查表用的中间缓冲 (量化图, 下标和, intp下标)，取自 workspace（分条处理时每条用不同的 prefix）"""
+        names = self._names.get(prefix)
+        if names is None:
+            names = self._names[prefix] = (prefix + '_quant', prefix + '_sum', prefix + '_index')
+        ws, dtype = self.workspace, self.quantizer.dtype
+        return (ws.buffer(names[0], (h, w, 3), dtype), ws.buffer(names[1], (h, w), dtype),
+                ws.buffer(names[2], (h, w), np.intp))
+
+    def index(self, bgr, quant, total, index):
+        """BGR图 -> 量化颜色下标，写进 index（intp）；quant/total 为 (h, w, 3)/(h, w) 的中间缓冲，dtype 与 quantizer 相同"""
+        cv2.LUT(bgr, self.quantizer, dst=quant)
+        cv2.transform(quant, self._sum, dst=total)
+        np.copyto(index, total)
+        return index
+
+    def classify(self, bgr, out=None, quant=None, total=None, index=None):
+        """
+        BGR图 -> 标签图（复用的缓冲，下一次调用时被覆盖）
+        out/quant/total/index 为调用方提供的标签图和 scratch() 的中间缓冲，None时取 workspace
+        """
+        h, w = bgr.shape[:2]
+        if out is None:
+            out = self.workspace.buffer('lut_label', (h, w))
+            quant, total, index = self.scratch(h, w)
+        # 下标不会越界；mode='raise'（默认）时 out 要经过一次临时缓冲
+        self.table.take(self.index(bgr, quant, total, index), out=out, mode='clip')
+        return out
+
+    def masks(self, bgr):
+        """BGR图 -> (红色掩模, 绿色掩模)，0/255，与inRange的输出格式相同（复用的缓冲）"""
+        h, w = bgr.shape[:2]
+        ws = self.workspace
+        return self.masks_into(bgr, ws.buffer('red', (h, w)), ws.buffer('green', (h, w)), *self.scratch(h, w))
+
+    def masks_into(self, bgr, red, green, quant, total, index):
+        """
+        同 masks()，结果写进调用方提供的缓冲（quant/total/index 同 scratch()；red/green 可以是大图的行切片）：
+        一次量化、两次查表
+        """
+        self.index(bgr, quant, total, index)
+        self.red_table.take(index, out=red, mode='clip')
+        self.green_table.take(index, out=green, mode='clip')
+        return red, green
@@ -5,6 +5,7 @@
 操作：
   q - 退出
   s - 保存当前检测结果
+  b - 重新标定背景静态灯光（画面中不要有飞镖）
   + - 增加面积阈值
   - - 减少面积阈值
 """
@@ -18,6 +19,23 @@ import time
 from datetime import datetime
 import json
 import os
+from frame_capture import FrameCapture, open_camera, close_camera
+from tracking_roi import TrackingRoi, SensorRoi
+from bayer_detect import BayerHalf, RawIsp, BAYER_CV_CODES
+from sensor_mode import list_sensor_modes, choose_sensor_mode
+from color_lut import ColorLut, HsvClassifier
+from blob_extract import BlobExtractor, BLOB_DTYPE, blob_center
+from search_window import SearchWindow, Corridor
+from green_tracker import GreenLedTracker, GREEN_HOLD
+from static_lights import StaticLightMask
+from motion_gate import MotionGate
+from subpixel import SubpixelRefiner
+from stripe_detect import StripeDetector
+from resolution import ResolutionGovernor
+from workspace import DetectionWorkspace
+from ballistic import BallisticEstimator, BallisticFit
+from trajectory_store import TrajectoryRing, TrajectoryArena, TRAJECTORY_DTYPE
+from multi_tracker import MultiTargetTracker
 
 def load_green_led_config(config_file='green_led_config.json'):
     """从JSON文件加载绿色LED检测配置"""
@@ -37,8 +55,15 @@ def load_green_led_config(config_file='green_led_config.json'):
     return None
 
 def save_config(start_point, config_file='dart_detector_config.json'):
-    """保存起始点配置到JSON文件"""
-    config = {'start_point': start_point}
+    """保存起始点配置到JSON文件（保留文件中的其他配置项）"""
+    config = {}
+    if os.path.exists(config_file):
+        try:
+            with open(config_file, 'r', encoding='utf-8') as f:
+                config = json.load(f)
+        except Exception:
+            config = {}
+    config['start_point'] = start_point
     try:
         with open(config_file, 'w', encoding='utf-8') as f:
             json.dump(config, f, indent=2, ensure_ascii=False)
@@ -56,6 +81,123 @@ def load_config(config_file='dart_detector_config.json'):
             print(f"加载配置失败: {e}")
     return None
 
+def load_config_section(section, defaults, config_file='dart_detector_config.json'):
+    """从JSON文件加载一个配置段，缺省的键使用defaults中的值"""
+    result = dict(defaults)
+    if os.path.exists(config_file):
+        try:
+            with open(config_file, 'r', encoding='utf-8') as f:
+                config = json.load(f)
+            result.update(config.get(section, {}))
+        except Exception as e:
+            print(f"加载配置段 {section} 失败: {e}，使用默认值")
+    return result
+
+def load_capture_config(config_file='dart_detector_config.json'):
+    """
+    采集配置（mode: process/fused/raw, backend: poll/callback/grabber 取帧方式,
+    num_buffers: 环形缓冲数量, display_every: raw模式或传感器缩小输出时每几帧显示一次）
+    """
+    defaults = {'mode': 'process', 'backend': 'poll', 'num_buffers': 4, 'display_every': 3}
+    return load_config_section('capture', defaults, config_file)
+
+def load_sensor_mode_config(config_file='dart_detector_config.json'):
+    """传感器输出模式配置（mode: crop/auto/bin_avg2/skip2/bin_sum2...，见sensor_mode.py）"""
+    return load_config_section('sensor_mode', {'mode': 'crop'}, config_file)
+
+def load_tracking_roi_config(config_file='dart_detector_config.json'):
+    """跟踪ROI配置（method: fov/transfer，ROI宽高，连续丢失多少帧后恢复全幅）"""
+    defaults = {'enabled': False, 'method': 'fov', 'width': 320, 'height': 240, 'lost_frames': 5}
+    return load_config_section('tracking_roi', defaults, config_file)
+
+def load_search_window_config(config_file='dart_detector_config.json'):
+    """预测窗口搜索配置（窗口宽高为显示坐标，没找到时按grow放大，连续max_misses帧没找到后全幅扫描）"""
+    defaults = {'enabled': True, 'width': 128, 'height': 128, 'grow': 1.5, 'max_misses': 3}
+    return load_config_section('search_window', defaults, config_file)
+
+def load_corridor_config(config_file='dart_detector_config.json'):
+    """
+    飞行走廊配置：检测只处理起始区域到落点参考线之间、四周加margin像素的矩形；起始区域顶边上的入口横向范围
+    entry_span（全幅宽度的比例 [左, 右]）收窄到绿灯两侧各margin像素的梯形只给候选排序，梯形外的候选不丢
+    """
+    return load_config_section('corridor', {'enabled': True, 'margin': 48, 'entry_span': [0.0, 1.0]}, config_file)
+
+def load_static_lights_config(config_file='dart_detector_config.json'):
+    """
+    背景静态灯光排除配置（前learn_seconds秒学习，出现频率超过threshold的红色区域排除，
+    之后按adapt_rate慢速适应，模型保存到file；相对路径按配置文件所在目录解析，不随当前工作目录变化）
+    """
+    defaults = {'enabled': True, 'learn_seconds': 3.0, 'threshold': 0.8, 'adapt_rate': 0.002,
+                'file': 'static_lights.npz'}
+    config = load_config_section('static_lights', defaults, config_file)
+    config['file'] = os.path.join(os.path.dirname(os.path.abspath(config_file)), config['file'])
+    return config
+
+def load_motion_gate_config(config_file='dart_detector_config.json'):
+    """
+    运动门控配置（1/proxy_scale灰度小图与上一帧差分，差值超过threshold、面积不小于min_area个小图像素的区域
+    加margin像素后才做颜色检测）
+    """
+    defaults = {'enabled': True, 'proxy_scale': 8, 'threshold': 12, 'min_area': 2, 'margin': 16}
+    return load_config_section('motion_gate', defaults, config_file)
+
+def load_subpixel_config(config_file='dart_detector_config.json'):
+    """亚像素中心配置（候选外接框扩大margin像素的全分辨率小块上，红色程度低于min_weight的像素不计入质心）"""
+    defaults = {'enabled': True, 'margin': 4, 'min_weight': 24}
+    return load_config_section('subpixel', defaults, config_file)
+
+def load_color_lut_config(config_file='dart_detector_config.json'):
+    """
+    颜色查找表配置（enabled 为 false 时用 cvtColor + inRange；为 true 时用 bits 位量化的查找表，只有 bits=8 与
+    cvtColor + inRange 逐像素一致，单线程下比 cvtColor + inRange 慢，见 benchmarks/bench_color_lut.py）
+    """
+    return load_config_section('color_lut', {'enabled': False, 'bits': 8}, config_file)
+
+def make_color_classifier(red_ranges, green_range=None, workspace=None, config_file='dart_detector_config.json'):
+    """按配置建颜色分类器：默认 HsvClassifier，color_lut.enabled 时为 ColorLut（两者接口相同）"""
+    config = load_color_lut_config(config_file)
+    kwargs = {'workspace': workspace}
+    if green_range is not None:
+        kwargs['green_range'] = green_range
+    if config['enabled']:
+        return ColorLut(red_ranges, bits=config['bits'], **kwargs)
+    return HsvClassifier(red_ranges, **kwargs)
+
+def load_parallel_config(config_file='dart_detector_config.json'):
+    """分条并行检测配置（workers个线程，检测图每条至少min_rows行，workers=1为串行）"""
+    return load_config_section('parallel', {'workers': 1, 'min_rows': 32}, config_file)
+
+def load_resolution_config(config_file='dart_detector_config.json'):
+    """检测分辨率调节配置（空闲时缩小idle_scale倍，追踪中track_scale倍，track_scale=1为预测窗口内全分辨率）"""
+    return load_config_section('resolution', {'enabled': True, 'idle_scale': 4, 'track_scale': 2}, config_file)
+
+def load_ballistic_config(config_file='dart_detector_config.json'):
+    """
+    弹道估计配置（method: kalman 常加速度卡尔曼滤波，jerk为加加速度噪声；fit 增量最小二乘抛物线拟合，
+    forgetting为每个点的遗忘系数，1为不遗忘；measurement_noise为中心观测噪声像素，
+    至少min_points个点后外推，预测落点标准差不超过max_error像素时显示）
+    """
+    defaults = {'enabled': True, 'method': 'kalman', 'jerk': 5000.0, 'forgetting': 1.0, 'measurement_noise': 1.0,
+                'min_points': 4, 'max_error': 5.0}
+    return load_config_section('ballistic', defaults, config_file)
+
+def load_multi_tracker_config(config_file='dart_detector_config.json'):
+    """
+    多目标跟踪配置（association: greedy 门限内最近邻，hungarian 最小总代价匹配；gate为有速度（命中velocity_hits次）的
+    跟踪的门限半径，速度未知的跟踪再加 max_speed 像素/秒乘经过的时间；确认的跟踪连续丢失超过max_misses帧删除，
+    命中confirm_hits次后确认，最多max_tracks条，velocity_gain为速度修正系数，超过max_age秒没配上的跟踪删除，
+    每帧门限外只有面积最大的max_candidates个候选参与关联，门限内的候选都参与）
+    """
+    defaults = {'enabled': True, 'association': 'greedy', 'gate': 40.0, 'max_speed': 3000.0, 'max_misses': 5,
+                'confirm_hits': 2, 'max_tracks': 16, 'velocity_gain': 0.5, 'max_age': 0.5, 'max_candidates': 32,
+                'velocity_hits': 2}
+    return load_config_section('multi_tracker', defaults, config_file)
+
+def load_green_tracker_config(config_file='dart_detector_config.json'):
+    """绿灯跟踪配置（每refresh_every帧整图搜索一次，其余帧在外接框扩大margin像素的小块上核对）"""
+    defaults = {'refresh_every': 30, 'margin': 8, 'min_confidence': 0.5}
+    return load_config_section('green_tracker', defaults, config_file)
+
 def main():
     print("飞镖头检测启动中...")
     
@@ -70,13 +212,28 @@ def main():
     DevInfo = DevList[0]
     print(f"使用相机: {DevInfo.GetFriendlyName()}")
 
-    # 打开相机
+    # 打开相机（grabber取帧方式由采集器打开相机）
+    capture_config = load_capture_config()
     try:
-        hCamera = mvsdk.CameraInit(DevInfo, -1, -1)
+        hCamera, grabber = open_camera(DevInfo, capture_config['backend'])
     except mvsdk.CameraException as e:
         print(f"初始化失败: {e.message}")
         return
 
+    capture = None
+    raw_isp = None
+    search_window = None
+    corridor = None
+    static_lights = None
+    motion_gate = None
+    subpixel = None
+    detector = None
+    governor = None
+    workspace = None
+    ballistic = None
+    multi_tracker = None
+    green_tracker = None
+    video_writer = None
     try:
         cap = mvsdk.CameraGetCapability(hCamera)
         monoCamera = (cap.sIspCapacity.bMonoSensor != 0)
@@ -86,26 +243,15 @@ def main():
             return
 
         # 设置640x480分辨率（优化性能）
+        # 传感器输出模式：crop为640x480视场原样输出；BIN/SKIP模式由传感器直接输出检测分辨率，省掉每帧resize
         try:
-            custom_res = mvsdk.tSdkImageResolution()
-            custom_res.iIndex = 0xff
-            custom_res.iWidth = 640
-            custom_res.iHeight = 480
-            custom_res.iWidthFOV = 640
-            custom_res.iHeightFOV = 480
-            custom_res.iHOffsetFOV = 0
-            custom_res.iVOffsetFOV = 0
-            custom_res.iWidthZoomSw = 0
-            custom_res.iHeightZoomSw = 0
-            custom_res.iWidthZoomHd = 0
-            custom_res.iHeightZoomHd = 0
-            custom_res.uBinSumMode = 0
-            custom_res.uBinAverageMode = 0
-            custom_res.uSkipMode = 0
-            custom_res.uResampleMask = 0
-            
-            mvsdk.CameraSetImageResolution(hCamera, custom_res)
-            print(f"✓ 已设置分辨率: 640x480")
+            sensor_modes = list_sensor_modes(cap, 640, 480)
+            sensor_mode = choose_sensor_mode(sensor_modes, load_sensor_mode_config()['mode'])
+            if mvsdk.CameraSetImageResolution(hCamera, sensor_mode.resolution) != mvsdk.CAMERA_STATUS_SUCCESS and sensor_mode.kind:
+                print(f"⚠ 输出模式 {sensor_mode.name} 设置失败，改用crop")
+                sensor_mode = sensor_modes[0]
+                mvsdk.CameraSetImageResolution(hCamera, sensor_mode.resolution)
+            print(f"✓ 已设置分辨率: 640x480（传感器输出模式 {sensor_mode.name}）")
         except Exception as e:
             print(f"⚠ 设置分辨率失败: {e}")
             pass
@@ -113,6 +259,9 @@ def main():
         # 设置输出格式为BGR8
         mvsdk.CameraSetIspOutFormat(hCamera, mvsdk.CAMERA_MEDIA_TYPE_BGR8)
 
+        # 镜像翻转交给ISP完成，省掉每帧一次cv2.flip整图拷贝
+        isp_mirror = (mvsdk.CameraSetMirror(hCamera, 0, 1) == mvsdk.CAMERA_STATUS_SUCCESS)
+
         # 连续采集模式
         mvsdk.CameraSetTriggerMode(hCamera, 0)
 
@@ -124,24 +273,124 @@ def main():
         # 开始采集
         mvsdk.CameraPlay(hCamera)
 
-        # 分配缓存
+        # 全幅画面尺寸（采集视场）：传感器ROI或BIN/SKIP生效时，所有坐标都换算回这个坐标系
+        full_res = mvsdk.CameraGetImageResolution(hCamera)
+        full_width, full_height = full_res.iWidthFOV, full_res.iHeightFOV
+        out_scale = max(1, full_width // full_res.iWidth)  # 视场 / 传感器输出
+        # 检测中间缓冲（缩小图、掩模、形态学、标签图）按输出分辨率一次分配，各步骤 dst= 写入，每帧不再分配
+        workspace = DetectionWorkspace(full_res.iWidth, full_res.iHeight)
+
+        # 跟踪ROI：追踪开始后只读出飞镖附近的传感器区域，提升飞行阶段帧率
+        roi_config = load_tracking_roi_config()
+        sensor_roi = SensorRoi(hCamera, roi_config['method']) if roi_config['enabled'] else None
+        tracking_roi = TrackingRoi(full_width, full_height, roi_config['width'], roi_config['height'],
+                                   lost_frames=roi_config['lost_frames'])
+        roi_canvas = None  # ROI帧贴回全幅的画布（用于显示和录制）
+        if sensor_roi is not None:
+            print(f"跟踪ROI: {sensor_roi.method} {tracking_roi.roi_width}x{tracking_roi.roi_height}")
+
+        # 预测窗口搜索：追踪中红色检测只处理预测位置附近的窗口，丢失后放大，连续丢失后全幅扫描
+        window_config = load_search_window_config()
+        if window_config['enabled']:
+            search_window = SearchWindow(full_width, full_height, window_config['width'], window_config['height'],
+                                         window_config['grow'], window_config['max_misses'])
+            print(f"预测窗口搜索: {search_window.width}x{search_window.height}，放大 {search_window.grow}x，"
+                  f"连续 {search_window.max_misses} 帧丢失后全幅")
+
+        # 飞行走廊：找到绿灯后检测只处理起始区域到参考线的矩形，梯形只给候选排序（起始区域或绿灯位置变化时重新计算）
+        corridor_config = load_corridor_config()
+        corridor = None
+        if corridor_config['enabled']:
+            corridor = Corridor(full_width, full_height, corridor_config['margin'],
+                                entry_span=corridor_config['entry_span'])
+
+        # 背景静态灯光：学习长期存在的红色光源，检测前从红色掩模里排除（上次保存的模型直接加载）
+        static_config = load_static_lights_config()
+        if static_config['enabled']:
+            static_lights = StaticLightMask(full_width, full_height, static_config['learn_seconds'],
+                                            static_config['threshold'], static_config['adapt_rate'])
+            if static_lights.load(static_config['file']):
+                print(f"已加载背景静态灯光模型: {static_lights.summary()}")
+            else:
+                print(f"学习背景静态灯光 {static_lights.learn_seconds:.0f} 秒，画面中不要有飞镖")
+
+        # 运动门控：等待飞镖时只在与上一帧有变化的区域做颜色检测，画面静止的帧只核对绿灯
+        gate_config = load_motion_gate_config()
+        if gate_config['enabled']:
+            motion_gate = MotionGate(full_width, full_height, gate_config['proxy_scale'], gate_config['threshold'],
+                                     gate_config['min_area'], gate_config['margin'], workspace)
+            print(f"运动门控: 1/{motion_gate.proxy_scale} 灰度小图差分，阈值 {motion_gate.threshold}")
+
+        # 采集线程：预分配帧缓存组成环形缓冲，检测只取最新帧
+        # fused模式用CameraGetImageBufferPriorityEx3一次完成取图+ISP；callback/grabber由SDK线程推帧
         FrameBufferSize = cap.sResolutionRange.iWidthMax * cap.sResolutionRange.iHeightMax * 3
-        pFrameBuffer = mvsdk.CameraAlignMalloc(FrameBufferSize, 16)
+        capture = FrameCapture(hCamera, FrameBufferSize,
+                               num_buffers=capture_config['num_buffers'],
+                               mode=capture_config['mode'],
+                               sensor_roi=sensor_roi,
+                               backend=capture_config['backend'],
+                               grabber=grabber)
+        capture.start()
+        print(f"采集模式: {capture.mode}（{capture.backend}），环形缓冲 {capture_config['num_buffers']} 帧")
+
+        # raw模式：检测直接用Bayer 2x2像素块，只有显示/录制的帧才跑ISP
+        raw_mode = (capture.mode == 'raw')
+        bayer_half = BayerHalf(mirror=True, workspace=workspace) if raw_mode else None
+        raw_isp = RawIsp(hCamera, FrameBufferSize) if raw_mode else None
+        # 检测分辨率：等待飞镖时粗分辨率，追踪中1/2（或预测窗口内全分辨率），关闭时始终为原来的1/2
+        resolution_config = load_resolution_config()
+        if resolution_config['enabled']:
+            governor = ResolutionGovernor(out_scale, bayer_half, resolution_config['idle_scale'],
+                                          resolution_config['track_scale'], workspace)
+        else:
+            governor = ResolutionGovernor(out_scale, bayer_half, 2, 2, workspace)
+        print(f"检测分辨率: 空闲 1/{governor.idle_scale}，追踪 1/{governor.track_scale}"
+              f"{'（预测窗口内全分辨率）' if governor.roi_full else ''}")
+        # raw模式或传感器缩小输出时，显示帧需要额外的ISP/放大，每display_every帧才显示一次
+        reduced_display = raw_mode or out_scale > 1
+        display_scratch = np.zeros((full_height, full_width, 3), np.uint8) if reduced_display else None
+        display_every = max(1, capture_config['display_every'])
+        frame_index = 0
         
         # 视频录制变量
-        video_writer = None
         recording = False
         record_filename = None
 
         # 轨迹追踪变量
-        trajectory_points = []  # 当前飞镖头中心点轨迹
         max_trajectory_length = 100  # 最多保存100个点
+        # 当前飞镖头中心点轨迹，每个点为 (硬件时间戳秒, x, y, 面积, 帧号)，超过长度时丢弃最早的点
+        trajectory_points = TrajectoryRing(max_trajectory_length)
         
         # 多飞镖追踪
-        completed_trajectories = []  # 已完成的轨迹列表，每个元素是一个轨迹点列表
-        dart_landing_points = []  # 飞镖落点（与绿灯中心的最近点）
         max_darts = 4  # 最多追踪4个飞镖
+        completed_trajectories = TrajectoryArena(max_darts * max_trajectory_length, max_darts)  # 已完成的轨迹
+        dart_landing_points = []  # 飞镖落点（与绿灯中心的最近点），(t, x, y)
+        print(f"轨迹存储: 当前轨迹 {trajectory_points.capacity} 点 + 已完成 {completed_trajectories.capacity} 点，"
+              f"预分配 {(trajectory_points.nbytes + completed_trajectories.nbytes) / 1024.0:.1f} KB")
         landing_threshold = 20  # 飞镖y坐标接近绿灯中心y坐标的阈值（像素）
+        # 弹道估计：飞行中预测越过参考线的落点，落点取帧间插值的参考线交点（不再是第一个进入阈值带的检测点）
+        ballistic_config = load_ballistic_config()
+        if ballistic_config['enabled'] and ballistic_config['method'] == 'fit':
+            ballistic = BallisticFit(ballistic_config['forgetting'], ballistic_config['measurement_noise'],
+                                     ballistic_config['min_points'])
+        elif ballistic_config['enabled']:
+            ballistic = BallisticEstimator(ballistic_config['jerk'], ballistic_config['measurement_noise'],
+                                           ballistic_config['min_points'])
+        landing_forecast = None  # 当前飞镖的预测落点 (t, x)，预测标准差不超过max_error时才有
+        first_forecast = None    # 当前飞镖第一次可用的预测 (预测时的帧时间, x)
+        # 多目标跟踪：所有候选都参与关联，追踪的飞镖只跟自己的跟踪，反光和同一轮的其他飞镖各自成为别的跟踪
+        # （关闭时恢复原来的每帧取面积最大的候选）
+        tracker_config = load_multi_tracker_config()
+        if tracker_config['enabled']:
+            multi_tracker = MultiTargetTracker(full_width, full_height, tracker_config['association'],
+                                               tracker_config['gate'], tracker_config['max_speed'],
+                                               tracker_config['max_misses'], tracker_config['confirm_hits'],
+                                               tracker_config['max_tracks'], tracker_config['velocity_gain'],
+                                               tracker_config['max_age'], max_trajectory_length,
+                                               tracker_config['max_candidates'], tracker_config['velocity_hits'])
+            print(f"多目标跟踪: {multi_tracker.association} 关联，门限 {multi_tracker.gate:.0f} 像素，"
+                  f"最多 {len(multi_tracker.ids)} 条")
+        primary_track = None     # 正在追踪的飞镖的跟踪号
         
         # 绿灯中心位置缓存（用于绿灯被遮挡时）
         last_known_green_center = None
@@ -170,8 +419,10 @@ def main():
         start_zone = None  # 将在第一帧初始化
         start_zone_triggered = False  # 起始区域触发状态
         
-        # 加载绿色LED配置（如果存在）
-        green_config = load_green_led_config()
+        # 加载绿色LED配置（如果存在），运行中文件被修改（green_led_tuner.py保存）时重新加载
+        green_config_file = 'green_led_config.json'
+        green_config_mtime = os.path.getmtime(green_config_file) if os.path.exists(green_config_file) else None
+        green_config = load_green_led_config(green_config_file)
         if green_config:
             lower_green = np.array(green_config['hsv_lower'])
             upper_green = np.array(green_config['hsv_upper'])
@@ -193,15 +444,37 @@ def main():
         # 红色2: 170-180度
         lower_red2 = np.array([170, 100, 100])
         upper_red2 = np.array([180, 255, 255])
+
+        # 颜色分类：默认 cvtColor + inRange（输出写进预分配的缓冲），color_lut.enabled 时用量化查找表
+        color_classifier = make_color_classifier([(lower_red1, upper_red1), (lower_red2, upper_red2)],
+                                                 (lower_green, upper_green), workspace)
+        if isinstance(color_classifier, ColorLut):
+            print(f"颜色查找表已建立（bits={color_classifier.bits}，{color_classifier.build_time * 1000:.0f} ms）")
         
         green_light_detected = False  # 绿灯检测状态
         
         # 飞镖头的特征阈值（可调）
         min_area = 300  # 最小面积（降低以提高灵敏度）
         max_area = 10000  # 最大面积（排除太大的区域）
-        # 取消长宽比限制，让所有形状都能通过
-        min_aspect_ratio = 0.1  # 极小值，基本不限制
-        max_aspect_ratio = 10.0  # 极大值，基本不限制
+        # 取消长宽比限制，让所有形状都能通过（只把长宽比>15的极端细长目标标成灰色）
+        max_aspect_ratio = 15.0
+
+        # 连通域提取：面积/长宽比过滤在统计数组上一次完成，不再逐个轮廓循环
+        dart_blobs = BlobExtractor(min_area, max_area, max_aspect=max_aspect_ratio)
+        # 亚像素中心：候选在缩小的检测图上找到后，在全分辨率小块上按红色程度加权求质心
+        subpixel_config = load_subpixel_config()
+        subpixel = (SubpixelRefiner(subpixel_config['margin'], subpixel_config['min_weight'], workspace=workspace)
+                    if subpixel_config['enabled'] else None)
+        # 分条并行：颜色分类、形态学（开运算+闭运算）、连通域按行分条在线程池里做，跨条的连通域合并
+        parallel_config = load_parallel_config()
+        detector = StripeDetector(color_classifier, dart_blobs, parallel_config['workers'], parallel_config['min_rows'])
+        if detector.workers > 1:
+            print(f"分条并行检测: {detector.workers} 线程，每条至少 {detector.min_rows} 行")
+        green_blobs = BlobExtractor(green_min_area, green_max_area, max_aspect=np.inf)
+        # 绿灯位置固定：只在启动、丢失和每refresh_every帧时整图搜索，其余帧小块核对
+        tracker_config = load_green_tracker_config()
+        green_tracker = GreenLedTracker(green_blobs, tracker_config['refresh_every'], tracker_config['margin'],
+                                        tracker_config['min_confidence'], workspace=workspace)
 
         # 性能计数
         fps_time = time.time()
@@ -212,327 +485,482 @@ def main():
         window_name = "飞镖头检测"
         cv2.namedWindow(window_name, cv2.WINDOW_AUTOSIZE)
         
-        print("检测开始 [q]退出 [s]保存 [r]录制 [c]清空轨迹和起始点")
+        print("检测开始 [q]退出 [s]保存 [r]录制 [c]清空轨迹和起始点 [b]重新标定背景灯光")
 
         while True:
             try:
-                # 获取图像
-                pRawData, FrameHead = mvsdk.CameraGetImageBuffer(hCamera, 200)
-                mvsdk.CameraImageProcess(hCamera, pRawData, pFrameBuffer, FrameHead)
-                mvsdk.CameraReleaseImageBuffer(hCamera, pRawData)
+                # 从采集线程取最新一帧
+                err = capture.pop_error()
+                if err is not None:
+                    raise err
+                captured = capture.read(0.2)
+                if captured is None:
+                    continue
+                # 环形缓冲槽位整帧处理完（包括中途异常或continue）之后才归还给采集线程
+                try:
+                    FrameHead = captured.head
+                    # 相机硬件时间戳（秒）和帧号，贯穿候选、轨迹点和落点
+                    frame_time = captured.timestamp
+                    frame_id = captured.frame_id
+                    
+                    # 环形缓冲上的零拷贝视图，整帧处理完之后才归还
+                    frame = captured.image
+                    frame_index += 1
+                    
+                    # 这一帧不显示也不录制时，raw模式跳过ISP，叠加信息画在不显示的草稿画布上
+                    render = recording or not reduced_display or frame_index % display_every == 0
+                    if raw_mode:
+                        raw_image = frame
+                        frame = raw_isp.process(captured) if render else None
+                    
+                    # 镜像翻转（左右翻转），ISP不支持时才在这里复制翻转
+                    if not isp_mirror and frame is not None:
+                        frame = cv2.flip(frame, 1)
 
-                if platform.system() == "Windows":
-                    mvsdk.CameraFlipFrameBuffer(pFrameBuffer, FrameHead, 1)
-                
-                # 转换为numpy数组
-                frame_data = (mvsdk.c_ubyte * FrameHead.uBytes).from_address(pFrameBuffer)
-                frame = np.frombuffer(frame_data, dtype=np.uint8)
-                frame = frame.reshape((FrameHead.iHeight, FrameHead.iWidth, 3))
-                
-                # 镜像翻转（左右翻转）
-                frame = cv2.flip(frame, 1)
-
-                # 如果起始区域还没有设置，创建为画面上半部分
-                if start_zone is None:
-                    # 矩形区域: 从画面顶部到中间，全宽
-                    start_zone = (0, 0, FrameHead.iWidth, FrameHead.iHeight // 2)
-                    print(f"起始区域已创建：画面上半部分 {start_zone}")
-
-                # 计算FPS
-                fps_counter += 1
-                if time.time() - fps_time > 1.0:
-                    fps = fps_counter
-                    fps_counter = 0
-                    fps_time = time.time()
-
-                # === 性能优化：缩小图像用于检测 ===
-                # 将图像缩小到1/2进行检测，大幅提升速度
-                detect_frame = cv2.resize(frame, (FrameHead.iWidth // 2, FrameHead.iHeight // 2), 
-                                         interpolation=cv2.INTER_LINEAR)
-                scale_factor = 2  # 缩放倍数
-
-                # 转换到HSV颜色空间（共用）
-                hsv = cv2.cvtColor(detect_frame, cv2.COLOR_BGR2HSV)
-                
-                # === 1. 绿色引导灯检测（优先） ===
-                green_mask = cv2.inRange(hsv, lower_green, upper_green)
-                
-                # 形态学操作去噪
-                kernel = np.ones((3, 3), np.uint8)
-                green_mask = cv2.morphologyEx(green_mask, cv2.MORPH_OPEN, kernel)
-                green_mask = cv2.morphologyEx(green_mask, cv2.MORPH_CLOSE, kernel)
-                
-                # 查找绿灯轮廓
-                green_contours, _ = cv2.findContours(green_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-                
-                green_light_detected = False
-                green_light_center = None
-                
-                for contour in green_contours:
-                    area = cv2.contourArea(contour)
-                    scaled_green_min = green_min_area / (scale_factor * scale_factor)
-                    scaled_green_max = green_max_area / (scale_factor * scale_factor)
+                    # 传感器ROI生效或BIN/SKIP缩小输出时帧比全幅小：检测在输出图像上做（坐标乘scale再加offset），
+                    # 显示和录制用放大贴回全幅的画布
+                    roi_x, roi_y = captured.offset
+                    roi_image = frame
+                    if not render:
+                        frame = display_scratch
+                    elif frame.shape[1] != full_width or frame.shape[0] != full_height:
+                        if roi_canvas is None:
+                            roi_canvas = np.zeros((full_height, full_width, 3), np.uint8)
+                        roi_canvas.fill(0)
+                        if out_scale > 1:
+                            frame = cv2.resize(frame, (frame.shape[1] * out_scale, frame.shape[0] * out_scale),
+                                               interpolation=cv2.INTER_NEAREST)
+                        roi_canvas[roi_y:roi_y + frame.shape[0], roi_x:roi_x + frame.shape[1]] = frame
+                        frame = roi_canvas
+
+                    # 如果起始区域还没有设置，创建为画面上半部分
+                    if start_zone is None:
+                        # 矩形区域: 从画面顶部到中间，全宽
+                        start_zone = (0, 0, full_width, full_height // 2)
+                        print(f"起始区域已创建：画面上半部分 {start_zone}")
+
+                    # 计算FPS
+                    fps_counter += 1
+                    if time.time() - fps_time > 1.0:
+                        fps = fps_counter
+                        fps_counter = 0
+                        fps_time = time.time()
+                        # 每秒检查一次绿灯配置文件，阈值变化时重建颜色查找表
+                        mtime = os.path.getmtime(green_config_file) if os.path.exists(green_config_file) else None
+                        if mtime != green_config_mtime:
+                            green_config_mtime = mtime
+                            green_config = load_green_led_config(green_config_file)
+                            if green_config:
+                                lower_green = np.array(green_config['hsv_lower'])
+                                upper_green = np.array(green_config['hsv_upper'])
+                                green_min_area = green_config['area_min']
+                                green_max_area = green_config['area_max']
+                                green_blobs.min_area, green_blobs.max_area = green_min_area, green_max_area
+                                green_tracker.invalidate()
+                                if color_classifier.update(green_range=(lower_green, upper_green)):
+                                    print("绿灯配置已更新，绿色阈值已应用")
+
+                    # 追踪中只在预测窗口里找飞镖；否则只处理飞行走廊（绿灯需要整图搜索的帧除外），None为全幅
+                    search_rect = None
+                    if search_window is not None and start_zone_triggered:
+                        search_rect = search_window.begin(trajectory_points, frame_time)
+                    crop_rect = search_rect
+                    if crop_rect is None and corridor is not None and not green_tracker.due:
+                        crop_rect = corridor.rect
+                    # 等待飞镖时只处理（走廊内）有运动的区域；画面静止时只在绿灯小块上核对，红色检测几乎没有开销
+                    # 追踪中、绿灯需要整图搜索、学习背景灯光时不门控（仍更新小图）
+                    if motion_gate is not None:
+                        gate = not (start_zone_triggered or green_tracker.due
+                                    or (static_lights is not None and static_lights.learning))
+                        crop_rect = motion_gate.update(raw_image if raw_mode else roi_image, out_scale, (roi_x, roi_y),
+                                                       crop_rect, mirrored=raw_mode, gate=gate)
+                        if not motion_gate.moving:
+                            crop_rect = green_tracker.patch_rect
+
+                    # === 性能优化：缩小图像用于检测 ===
+                    # 等待飞镖时缩小到1/4，追踪中1/2（或预测窗口内全分辨率），轨迹结束后回到1/4；坐标都按scale_factor换算
+                    # raw模式直接由Bayer 2x2像素块得到检测图，不经过ISP；传感器BIN/SKIP已经缩小输出时直接用输出图像
+                    # 只转换/缩小窗口内的像素（按块对齐，与整图处理后再裁剪的结果相同）
+                    source_image = raw_image if raw_mode else roi_image
+                    scale_factor = governor.select(start_zone_triggered, search_rect is not None)
+                    detect_frame, detect_offset, window = governor.prepare(source_image, crop_rect, (roi_x, roi_y), FrameHead)
+                    detect_width, detect_height = governor.size(source_image)
+
+                    # 颜色分类一次得到红色和绿色掩模（cvtColor(HSV) + inRange，workers>1时分条并行）
+                    red_mask, green_mask = detector.classify(detect_frame)
                     
-                    # 调试：打印所有绿色轮廓信息
-                    if area > 10:  # 只显示面积>10的
-                        print(f"[DEBUG] Green contour area: {int(area * scale_factor * scale_factor)} (min:{green_min_area}, max:{green_max_area})")
+                    # 背景静态灯光：没有飞镖在追踪时学习/适应，然后一次bitwise_and从红色掩模里去掉
+                    if static_lights is not None:
+                        if not start_zone_triggered and static_lights.observe(red_mask, scale_factor, detect_offset, frame_time):
+                            static_lights.save(static_config['file'])
+                            print(f"背景静态灯光学习完成: {static_lights.summary()}")
+                        static_lights.apply(red_mask, scale_factor, detect_offset)
                     
-                    if area >= scaled_green_min and area <= scaled_green_max:
-                        green_light_detected = True
-                        
-                        # 获取绿灯位置
-                        x, y, w, h = cv2.boundingRect(contour)
-                        x_orig, y_orig = x * scale_factor, y * scale_factor
-                        w_orig, h_orig = w * scale_factor, h * scale_factor
-                        
-                        # 绘制蓝色框标记绿灯
-                        cv2.rectangle(frame, (x_orig, y_orig), (x_orig + w_orig, y_orig + h_orig), (255, 255, 0), 2)
-                        
-                        cx = x_orig + w_orig // 2
-                        cy = y_orig + h_orig // 2
-                        green_light_center = (cx, cy)
-                        cv2.circle(frame, (cx, cy), 5, (255, 255, 0), -1)
-                        
-                        text = f"GREEN LED ({cx},{cy})"
-                        cv2.putText(frame, text, (x_orig, y_orig - 10),
-                                   cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 255, 0), 1)
+                    # === 1. 绿色引导灯检测（优先） ===
+                    # 检测图覆盖全幅时才可能整图搜索；预测窗口/走廊/传感器ROI帧只核对或沿用上一次的结果
+                    full_view = (window is None and detect_width * scale_factor >= full_width
+                                 and detect_height * scale_factor >= full_height)
+                    green_tracker.update(green_mask, scale_factor, detect_offset, full_view)
+                    
+                    green_light_detected = green_tracker.visible
+                    green_light_center = None
+                    
+                    if green_light_detected:
+                        green_light_center = green_tracker.center
                         
-                        # 更新绿灯位置缓存
-                        last_known_green_center = (cx, cy)
-                        break  # 只检测第一个绿灯
+                    # 更新绿灯位置缓存（灯灭或被遮挡时保留最后的位置）
+                    last_known_green_center = green_tracker.center
+                    
+                    # 起始区域或绿灯位置变化时重新计算飞行走廊（下一帧生效）
+                    if corridor is not None:
+                        corridor.update(start_zone, last_known_green_center)
 
-                # === 2. 红色发光飞镖头检测（仅在检测到绿灯时） ===
-                detected_objects = 0
-                dart_candidates = []
-                
-                if green_light_detected:
-                
-                    # 检测红色（两个范围的掩模合并）
-                    mask1 = cv2.inRange(hsv, lower_red1, upper_red1)
-                    mask2 = cv2.inRange(hsv, lower_red2, upper_red2)
-                    mask = cv2.bitwise_or(mask1, mask2)
-                    
-                    # 形态学操作，去除噪声
-                    kernel = np.ones((3, 3), np.uint8)
-                    mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel)
-                    mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel)
-                    
-                    # 查找轮廓
-                    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-                    
-                    # 分析轮廓，识别飞镖头
-                    for contour in contours:
-                        area = cv2.contourArea(contour)
-                        
-                        # 面积过滤（注意：面积也要除以scale_factor^2）
-                        scaled_min_area = min_area / (scale_factor * scale_factor)
-                        scaled_max_area = max_area / (scale_factor * scale_factor)
-                        if area < scaled_min_area or area > scaled_max_area:
-                            continue
-                    
-                        # 获取边界框（在缩小的图像上）
-                        x, y, w, h = cv2.boundingRect(contour)
-                        
-                        # 计算长宽比
-                        aspect_ratio = max(w, h) / (min(w, h) + 1e-5)
-                        
-                        # 计算圆形度（4*pi*area / perimeter^2，圆形接近1）
-                        perimeter = cv2.arcLength(contour, True)
-                        if perimeter > 0:
-                            circularity = 4 * np.pi * area / (perimeter * perimeter)
-                        else:
-                            circularity = 0
-                        
-                        detected_objects += 1
-                        
-                        # 长宽比过滤（几乎不过滤，只排除极端异常的）
-                        # 只有极端细长的才会被灰色框标记
-                        if aspect_ratio > 15.0:  # 只过滤极端异常的长宽比
-                            # 如果还未完成所有飞镖，才显示灰色框
-                            if len(completed_trajectories) < max_darts:
-                                # 映射回原图坐标并绘制灰色框
-                                x_orig, y_orig = x * scale_factor, y * scale_factor
-                                w_orig, h_orig = w * scale_factor, h * scale_factor
-                                cv2.rectangle(frame, (x_orig, y_orig), (x_orig + w_orig, y_orig + h_orig), (128, 128, 128), 1)
-                            continue
+                    # === 2. 红色发光飞镖头检测（仅在检测到绿灯时） ===
+                    # 预测窗口或跟踪ROI生效时绿灯可能不在检测图内，使用缓存的绿灯位置
+                    detected_objects = 0
+                    dart_candidates = np.empty(0, BLOB_DTYPE)  # 候选目标（结构化数组）
+                    searched = (0, 0, 0, 0)  # 本帧红色检测过的显示坐标范围，范围外的跟踪不计丢失
+                    
+                    if green_light_detected or (green_tracker.state == GREEN_HOLD and last_known_green_center is not None):
+                        searched = (detect_offset[0], detect_offset[1], detect_frame.shape[1] * scale_factor,
+                                    detect_frame.shape[0] * scale_factor)
+                    
+                        # 开运算+闭运算去除噪声，连通域 + 向量化过滤，得到候选数组（按面积从大到小）和长宽比超限的连通域
+                        # （红色掩模已由颜色分类得到，两段红色已合并；workers>1时分条并行，跨条的连通域合并）
+                        # 粗分辨率（等待飞镖）时只做闭运算
+                        dart_candidates, elongated = detector.extract(red_mask, scale_factor, detect_offset,
+                                                                      frame_time, frame_id, governor.morph_ops(detector.ops))
+                        detected_objects = len(dart_candidates) + len(elongated)
+                        # 等待飞镖时（没有预测窗口）走廊梯形内的候选排到前面，梯形外的候选保留
+                        if corridor is not None and search_rect is None:
+                            dart_candidates = corridor.rank(dart_candidates)
                         
-                        # 计算中心点（原图坐标）
-                        x_orig, y_orig = x * scale_factor, y * scale_factor
-                        w_orig, h_orig = w * scale_factor, h * scale_factor
-                        cx = x_orig + w_orig // 2
-                        cy = y_orig + h_orig // 2
+                        # 亚像素中心：全分辨率小块（raw模式为RAW Bayer小块去马赛克）上加权求质心，代替检测图的二值质心
+                        if subpixel is not None and len(dart_candidates) > 0:
+                            if raw_mode:
+                                subpixel.refine(dart_candidates, raw_image, out_scale, (roi_x, roi_y), True,
+                                                BAYER_CV_CODES[FrameHead.uiMediaType])
+                            else:
+                                subpixel.refine(dart_candidates, roi_image, out_scale, (roi_x, roi_y))
                         
                         # 只有还未完成所有飞镖追踪时才显示检测框和信息
                         if len(completed_trajectories) < max_darts:
-                            # 绘制绿色矩形框表示检测到的飞镖头
-                            cv2.rectangle(frame, (x_orig, y_orig), (x_orig + w_orig, y_orig + h_orig), (0, 255, 0), 2)
-                            cv2.circle(frame, (cx, cy), 5, (0, 0, 255), -1)
-                            
-                            # 显示详细信息
-                            text1 = f"DART ({cx},{cy})"
-                            text2 = f"A:{int(area * scale_factor * scale_factor)} R:{aspect_ratio:.2f}"
-                            cv2.putText(frame, text1, (x_orig, y_orig - 20),
-                                       cv2.FONT_HERSHEY_SIMPLEX, 0.4, (0, 255, 0), 1)
-                            cv2.putText(frame, text2, (x_orig, y_orig - 5),
-                                       cv2.FONT_HERSHEY_SIMPLEX, 0.3, (0, 255, 0), 1)
-                        
-                        dart_candidates.append({
-                            'center': (cx, cy),
-                            'area': area * scale_factor * scale_factor,
-                            'aspect_ratio': aspect_ratio,
-                            'circularity': circularity
-                        })
-                
-                # 检查飞镖是否进入起始区域（画面上半部分）
-                if start_zone is not None and not start_zone_triggered and detected_objects > 0 and dart_candidates:
-                    cx, cy = dart_candidates[0]['center']
-                    x1, y1, x2, y2 = start_zone
+                            # 极端细长的目标画灰色框
+                            for blob in elongated:
+                                x_orig, y_orig = int(blob['x']), int(blob['y'])
+                                cv2.rectangle(frame, (x_orig, y_orig), (x_orig + int(blob['w']), y_orig + int(blob['h'])),
+                                              (128, 128, 128), 1)
+                            for blob in dart_candidates:
+                                x_orig, y_orig = int(blob['x']), int(blob['y'])
+                                cx, cy = blob_center(blob)
+                                # 绘制绿色矩形框表示检测到的飞镖头
+                                cv2.rectangle(frame, (x_orig, y_orig), (x_orig + int(blob['w']), y_orig + int(blob['h'])),
+                                              (0, 255, 0), 2)
+                                cv2.circle(frame, (cx, cy), 5, (0, 0, 255), -1)
+                                
+                                # 显示详细信息
+                                text1 = f"DART ({cx},{cy})"
+                                text2 = f"A:{int(blob['area'])} R:{blob['aspect']:.2f}"
+                                cv2.putText(frame, text1, (x_orig, y_orig - 20),
+                                           cv2.FONT_HERSHEY_SIMPLEX, 0.4, (0, 255, 0), 1)
+                                cv2.putText(frame, text2, (x_orig, y_orig - 5),
+                                           cv2.FONT_HERSHEY_SIMPLEX, 0.3, (0, 255, 0), 1)
                     
-                    # 检查飞镖中心是否在矩形区域内
-                    if x1 <= cx <= x2 and y1 <= cy <= y2:
+                    # 绘制蓝色框标记绿灯（亚像素细化读取全分辨率图之后再画：process模式下frame就是采集图本身）
+                    if green_light_detected:
+                        x_orig, y_orig, w_orig, h_orig = green_tracker.rect
+                        cx, cy = green_light_center
+                        cv2.rectangle(frame, (x_orig, y_orig), (x_orig + w_orig, y_orig + h_orig), (255, 255, 0), 2)
+                        cv2.circle(frame, (cx, cy), 5, (255, 255, 0), -1)
+                        text = f"GREEN LED ({cx},{cy}) {green_tracker.confidence:.2f}"
+                        cv2.putText(frame, text, (x_orig, y_orig - 10),
+                                   cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 255, 0), 1)
+                    
+                    # 多目标跟踪：本帧所有候选和已有的跟踪关联；追踪中的飞镖的跟踪丢失后放弃当前轨迹
+                    if multi_tracker is not None:
+                        track_of = multi_tracker.update(dart_candidates, frame_time, frame_id, searched)
+                        if start_zone_triggered and not multi_tracker.alive(primary_track):
+                            print(f"飞镖跟踪 #{primary_track} 丢失（帧 {frame_id}），放弃当前轨迹")
+                            trajectory_points.clear()
+                            start_zone_triggered = False
+                            landing_forecast = first_forecast = None
+                            primary_track = None
+                    
+                    # 检查飞镖是否进入起始区域（画面上半部分），学习背景灯光期间不触发
+                    learning_background = static_lights is not None and static_lights.learning
+                    entry = None
+                    if start_zone is not None and not start_zone_triggered and not learning_background:
+                        x1, y1, x2, y2 = start_zone
+                        if multi_tracker is not None:
+                            # 轨迹进入过起始区域的确认跟踪（同一轮先进入的先追踪），轨迹从进入起始区域的点开始
+                            entry = multi_tracker.entered(start_zone)
+                        elif len(dart_candidates) > 0:
+                            # 检查面积最大的候选中心是否在矩形区域内
+                            dart = dart_candidates[0]
+                            cx, cy = blob_center(dart)
+                            if x1 <= cx <= x2 and y1 <= cy <= y2:
+                                entry = (None, np.array([(frame_time, dart['cx'], dart['cy'], dart['area'], frame_id)],
+                                                        TRAJECTORY_DTYPE))
+                    if entry is not None:
                         # 飞镖进入起始区域，开始追踪
                         start_zone_triggered = True
+                        primary_track, points = entry
                         trajectory_points.clear()
-                        trajectory_points.append((cx, cy))
-                        print(f"飞镖进入起始区域！开始追踪")
-                
-                # 更新轨迹点（只在触发后记录）
-                if start_zone_triggered and detected_objects > 0 and dart_candidates:
-                    # 添加当前帧的第一个飞镖头中心点
-                    cx, cy = dart_candidates[0]['center']
-                    trajectory_points.append((cx, cy))
-                    
-                    # 检查是否到达绿灯中心的水平线（轨迹结束条件）
-                    # 使用当前检测到的绿灯位置，如果未检测到则使用缓存位置
-                    target_green_center = green_light_center if green_light_detected else last_known_green_center
-                    
-                    if target_green_center is not None and len(completed_trajectories) < max_darts:
-                        gx, gy = target_green_center
-                        # 判断飞镖y坐标是否到达绿灯中心的水平线附近
-                        if abs(cy - gy) < landing_threshold and cy >= gy - landing_threshold:
-                            # 飞镖到达绿灯水平线，轨迹结束
-                            status = "(检测到)" if green_light_detected else "(使用缓存)"
-                            print(f"飞镖 #{len(completed_trajectories) + 1} 轨迹结束！落点: ({cx}, {cy})，绿灯y坐标: {gy} {status}")
-                            
-                            # 保存当前轨迹和落点
-                            completed_trajectories.append(trajectory_points.copy())
-                            dart_landing_points.append((cx, cy))
-                            
-                            # 重置当前轨迹，等待下一个飞镖
-                            trajectory_points.clear()
-                            start_zone_triggered = False
-                            
-                            if len(completed_trajectories) >= max_darts:
-                                print(f"已完成所有 {max_darts} 个飞镖追踪！")
+                        trajectory_points.extend(points)
+                        landing_forecast = first_forecast = None
+                        if ballistic is not None:
+                            ballistic.reset()
+                            for t, x, y in zip(points['t'], points['x'], points['y']):
+                                ballistic.update(float(t), float(x), float(y))
+                        track_text = f"，跟踪 #{primary_track}" if primary_track is not None else ""
+                        print(f"飞镖进入起始区域！开始追踪（帧 {frame_id}{track_text}）")
                     
-                    # 限制当前轨迹长度
-                    if len(trajectory_points) > max_trajectory_length:
-                        trajectory_points.pop(0)
-                
-                # 绘制已完成的轨迹和落点
-                for idx, completed_traj in enumerate(completed_trajectories):
-                    # 绘制已完成的轨迹（蓝色，半透明）
-                    if len(completed_traj) > 1:
-                        for i in range(1, len(completed_traj)):
-                            cv2.line(frame, completed_traj[i-1], completed_traj[i], (255, 0, 0), 1)
-                    
-                    # 绘制落点（紫色圆圈+编号）
-                    if idx < len(dart_landing_points):
-                        lx, ly = dart_landing_points[idx]
-                        cv2.circle(frame, (lx, ly), 10, (255, 0, 255), 2)
-                        cv2.circle(frame, (lx, ly), 3, (255, 0, 255), -1)
-                        cv2.putText(frame, f"#{idx+1}", (lx + 15, ly - 10),
-                                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 0, 255), 2)
-                
-                # 绘制绿灯水平参考线（如果有绿灯位置）
-                ref_green_center = green_light_center if green_light_detected else last_known_green_center
-                if ref_green_center is not None:
-                    gx, gy = ref_green_center
-                    line_color = (0, 255, 255) if green_light_detected else (128, 128, 128)
-                    cv2.line(frame, (0, gy), (FrameHead.iWidth, gy), line_color, 1, cv2.LINE_AA)
-                    cv2.putText(frame, f"Landing Line (y={gy})", (10, gy - 5),
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.4, line_color, 1)
-                
-                # 绘制当前轨迹线（只在触发后显示，红色）
-                if start_zone_triggered and len(trajectory_points) > 1:
-                    for i in range(1, len(trajectory_points)):
+                    # 本帧追踪中的飞镖对应的候选：它的跟踪配上的候选（关闭多目标跟踪时为面积最大的候选）
+                    primary = None
+                    if multi_tracker is not None:
+                        if start_zone_triggered:
+                            matched = np.flatnonzero(track_of == primary_track)
+                            primary = int(matched[0]) if len(matched) else None
+                    elif len(dart_candidates) > 0:
+                        primary = 0
+                    
+                    # 更新轨迹点（只在触发后记录）
+                    if start_zone_triggered and primary is not None:
+                        dart = dart_candidates[primary]
+                        cx, cy = blob_center(dart)
+                        if entry is None:
+                            # 添加当前帧的飞镖头中心点（带硬件时间戳）；触发的这一帧已经随进入起始区域的点加入
+                            trajectory_points.append(frame_time, dart['cx'], dart['cy'], dart['area'], frame_id)
+                            if ballistic is not None:
+                                # 滤波用亚像素中心（浮点）
+                                ballistic.update(frame_time, float(dart['cx']), float(dart['cy']))
+                        
+                        # 检查是否到达绿灯中心的水平线（轨迹结束条件）
+                        # 使用当前检测到的绿灯位置，如果未检测到则使用缓存位置
+                        target_green_center = green_light_center if green_light_detected else last_known_green_center
+                        
+                        if target_green_center is not None and len(completed_trajectories) < max_darts:
+                            gx, gy = target_green_center
+                            if ballistic is not None:
+                                # 飞行中的预测落点（标准差够小才用）
+                                forecast = ballistic.crossing(gy)
+                                landing_forecast = forecast if ballistic.error <= ballistic_config['max_error'] else None
+                                if landing_forecast is not None and first_forecast is None:
+                                    first_forecast = (frame_time, landing_forecast[1])
+                                # 进入阈值带或已经越过参考线（快的飞镖可能一帧跳过整个阈值带）
+                                reached = cy >= gy - landing_threshold
+                            else:
+                                # 判断飞镖y坐标是否到达绿灯中心的水平线附近
+                                reached = abs(cy - gy) < landing_threshold and cy >= gy - landing_threshold
+                            if reached:
+                                # 飞镖到达绿灯水平线，轨迹结束；有弹道估计时落点为参考线上的交点（越线时帧间插值，未越线时外推）
+                                land_time, lx, ly = frame_time, cx, cy
+                                land = ballistic.landing(gy) if ballistic is not None else None
+                                if land is not None:
+                                    land_time, lx, ly = land[0], int(round(land[1])), gy
+                                status = "(检测到)" if green_light_detected else "(使用缓存)"
+                                flight_time = land_time - trajectory_points.points['t'][0]
+                                print(f"飞镖 #{len(completed_trajectories) + 1} 轨迹结束！落点: ({lx}, {ly})，绿灯y坐标: {gy} {status}，"
+                                      f"飞行 {flight_time * 1000:.1f} ms / {len(trajectory_points)} 点")
+                                if land is not None and first_forecast is not None:
+                                    print(f"  提前 {(land_time - first_forecast[0]) * 1000:.0f} ms 预测落点，"
+                                          f"x偏差 {first_forecast[1] - land[1]:+.1f} 像素")
+                                
+                                # 保存当前轨迹和落点
+                                completed_trajectories.add(trajectory_points.points)
+                                dart_landing_points.append((land_time, lx, ly))
+                                
+                                # 重置当前轨迹，等待下一个飞镖
+                                trajectory_points.clear()
+                                start_zone_triggered = False
+                                landing_forecast = first_forecast = None
+                                if multi_tracker is not None:
+                                    multi_tracker.kill(primary_track)
+                                primary_track = None
+                                
+                                if len(completed_trajectories) >= max_darts:
+                                    print(f"已完成所有 {max_darts} 个飞镖追踪！")
+                    
+                    # 预测窗口：找到则下一帧继续用小窗口，没找到则放大，轨迹结束后回到全幅
+                    if search_window is not None:
+                        if primary is not None:
+                            search_window.hit()
+                        elif start_zone_triggered:
+                            search_window.miss()
+                        if not start_zone_triggered:
+                            search_window.reset()
+                    
+                    # 跟踪ROI：追踪中跟随飞镖预测位置，丢失或轨迹结束后恢复全幅
+                    if sensor_roi is not None:
+                        if start_zone_triggered and primary is not None:
+                            roi_changed = tracking_roi.track(trajectory_points, capture.frame_period)
+                        elif start_zone_triggered:
+                            roi_changed = tracking_roi.miss()
+                        else:
+                            roi_changed = tracking_roi.reset()
+                        if roi_changed:
+                            capture.request_roi(tracking_roi.rect)
+                    
+                    # 绘制已完成的轨迹（蓝色，所有轨迹一次 polylines）和落点
+                    if len(completed_trajectories) > 0:
+                        cv2.polylines(frame, completed_trajectories.polylines(), False, (255, 0, 0), 1)
+                    for idx in range(len(completed_trajectories)):
+                        # 绘制落点（紫色圆圈+编号）
+                        if idx < len(dart_landing_points):
+                            _, lx, ly = dart_landing_points[idx]
+                            cv2.circle(frame, (lx, ly), 10, (255, 0, 255), 2)
+                            cv2.circle(frame, (lx, ly), 3, (255, 0, 255), -1)
+                            cv2.putText(frame, f"#{idx+1}", (lx + 15, ly - 10),
+                                       cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 0, 255), 2)
+                    
+                    # 绘制绿灯水平参考线（如果有绿灯位置）
+                    ref_green_center = green_light_center if green_light_detected else last_known_green_center
+                    if ref_green_center is not None:
+                        gx, gy = ref_green_center
+                        line_color = (0, 255, 255) if green_light_detected else (128, 128, 128)
+                        cv2.line(frame, (0, gy), (full_width, gy), line_color, 1, cv2.LINE_AA)
+                        cv2.putText(frame, f"Landing Line (y={gy})", (10, gy - 5),
+                                   cv2.FONT_HERSHEY_SIMPLEX, 0.4, line_color, 1)
+                    
+                    # 绘制预测落点（参考线上的空心圆，标注预计到达的剩余时间）
+                    if start_zone_triggered and landing_forecast is not None and ref_green_center is not None:
+                        fx = int(round(landing_forecast[1]))
+                        cv2.circle(frame, (fx, ref_green_center[1]), 10, (255, 0, 255), 1, cv2.LINE_AA)
+                        cv2.putText(frame, f"ETA {max(0.0, landing_forecast[0] - frame_time) * 1000:.0f}ms",
+                                   (fx + 12, ref_green_center[1] + 18), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 0, 255), 1)
+                    
+                    # 绘制当前轨迹线（只在触发后显示，红色）
+                    if start_zone_triggered and len(trajectory_points) > 1:
                         # 绘制红色轨迹线，线条粗细为2
-                        cv2.line(frame, trajectory_points[i-1], trajectory_points[i], (0, 0, 255), 2)
-                
-                # 绘制起始区域矩形（画面上半部分）
-                if start_zone is not None:
-                    x1, y1, x2, y2 = start_zone
-                    color = (0, 255, 0) if start_zone_triggered else (0, 255, 255)
-                    # 绘制半透明矩形区域
-                    overlay = frame.copy()
-                    cv2.rectangle(overlay, (x1, y1), (x2, y2), color, -1)
-                    cv2.addWeighted(overlay, 0.2, frame, 0.8, 0, frame)
-                    # 绘制边框
-                    cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
-                    label = "ENTRY ZONE (OK)" if start_zone_triggered else "ENTRY ZONE (Waiting)"
-                    cv2.putText(frame, label, (x1 + 10, y1 + 30),
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
-                
-                # 在原图上绘制信息，避免缩放后文字模糊
-                cv2.putText(frame, f"FPS: {fps}", (10, 30), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
-                
-                # 绿灯状态显示
-                green_status = "GREEN: ON" if green_light_detected else "GREEN: OFF"
-                green_color = (0, 255, 0) if green_light_detected else (0, 0, 255)
-                cv2.putText(frame, green_status, (10, 60), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.7, green_color, 2)
-                
-                cv2.putText(frame, f"Darts: {detected_objects}", (10, 90), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-                cv2.putText(frame, f"Completed: {len(completed_trajectories)}/{max_darts}", (10, 120),
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 0, 255), 2)
-                cv2.putText(frame, f"Area: {min_area}-{max_area}", (10, 150), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
-                
-                # 显示录制状态
-                if recording:
-                    cv2.circle(frame, (FrameHead.iWidth - 30, 30), 10, (0, 0, 255), -1)
-                    cv2.putText(frame, "REC", (FrameHead.iWidth - 60, 35), 
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 2)
-                
-                # 录制视频
-                if recording and video_writer is not None:
-                    video_writer.write(frame)
-                
-                # 缩小显示窗口到320x240以提升显示性能
-                display_frame = cv2.resize(frame, (320, 240), interpolation=cv2.INTER_LINEAR)
-                
-                cv2.imshow(window_name, display_frame)
-                
-                # 键盘控制
-                key = cv2.waitKey(1) & 0xFF
-                
-                if key == ord('q'):
-                    break
-                elif key == ord('s'):
-                    filename = f"dart_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jpg"
-                    cv2.imwrite(filename, frame)
-                elif key == ord('c') or key == ord('C'):
-                    # 清空所有轨迹、落点和重置触发状态
-                    trajectory_points.clear()
-                    completed_trajectories.clear()
-                    dart_landing_points.clear()
-                    start_zone_triggered = False  # 重置为未触发状态，等待下一次飞镖进入
-                    print("已清空所有轨迹和落点，重置触发状态")
-                elif key == ord('r') or key == ord('R'):
-                    if not recording:
-                        record_filename = f"dart_video_{datetime.now().strftime('%Y%m%d_%H%M%S')}.mp4"
-                        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-                        # 使用固定帧率10
-                        video_writer = cv2.VideoWriter(record_filename, fourcc, 10, 
-                                                      (FrameHead.iWidth, FrameHead.iHeight))
-                        recording = True
-                    else:
-                        recording = False
-                        if video_writer is not None:
-                            video_writer.release()
-                            video_writer = None
+                        cv2.polylines(frame, [trajectory_points.polyline()], False, (0, 0, 255), 2)
+                    
+                    # 其他确认的跟踪（反光、同一轮的其他飞镖）画橙色细线
+                    if multi_tracker is not None:
+                        others = multi_tracker.polylines(primary_track)
+                        if others:
+                            cv2.polylines(frame, others, False, (0, 165, 255), 1)
+                    
+                    # 绘制起始区域矩形（画面上半部分），半透明叠加要整图拷贝，不显示的帧跳过
+                    if start_zone is not None and render:
+                        x1, y1, x2, y2 = start_zone
+                        color = (0, 255, 0) if start_zone_triggered else (0, 255, 255)
+                        # 绘制半透明矩形区域
+                        overlay = frame.copy()
+                        cv2.rectangle(overlay, (x1, y1), (x2, y2), color, -1)
+                        cv2.addWeighted(overlay, 0.2, frame, 0.8, 0, frame)
+                        # 绘制边框
+                        cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
+                        label = "ENTRY ZONE (OK)" if start_zone_triggered else "ENTRY ZONE (Waiting)"
+                        cv2.putText(frame, label, (x1 + 10, y1 + 30),
+                                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
+                    
+                    # 绘制当前ROI范围（灰色细框）
+                    if tracking_roi.active:
+                        rx, ry, rw, rh = tracking_roi.rect
+                        cv2.rectangle(frame, (rx, ry), (rx + rw, ry + rh), (200, 200, 200), 1)
+                    
+                    # 绘制飞行走廊（青色细框）和排序用的梯形（青色细线）
+                    if corridor is not None and corridor.rect is not None:
+                        kx, ky, kw, kh = corridor.rect
+                        cv2.rectangle(frame, (kx, ky), (kx + kw - 1, ky + kh - 1), (160, 160, 0), 1)
+                    if corridor is not None and corridor.polygon is not None:
+                        cv2.polylines(frame, [corridor.polygon], True, (160, 160, 0), 1)
+                    
+                    # 绘制本帧的搜索窗口（橙色细框，放大中为红色）
+                    if window is not None and search_rect is not None:
+                        wx, wy, ww, wh = search_rect
+                        cv2.rectangle(frame, (wx, wy), (wx + ww, wy + wh),
+                                      (0, 128, 255) if search_window.misses == 0 else (0, 0, 255), 1)
+                    
+                    # 在原图上绘制信息，避免缩放后文字模糊
+                    cv2.putText(frame, f"FPS: {fps}", (10, 30), 
+                               cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
+                    
+                    # 绿灯状态显示
+                    green_status = "GREEN: ON" if green_light_detected else "GREEN: OFF"
+                    if green_tracker.state == GREEN_HOLD and last_known_green_center is not None:
+                        green_status = "GREEN: HOLD"  # 本帧检测图不含绿灯，使用缓存位置
+                    green_color = (0, 255, 0) if green_light_detected else (0, 0, 255)
+                    cv2.putText(frame, green_status, (10, 60), 
+                               cv2.FONT_HERSHEY_SIMPLEX, 0.7, green_color, 2)
+                    
+                    cv2.putText(frame, f"Darts: {detected_objects}", (10, 90), 
+                               cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+                    cv2.putText(frame, f"Completed: {len(completed_trajectories)}/{max_darts}", (10, 120),
+                               cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 0, 255), 2)
+                    cv2.putText(frame, f"Area: {min_area}-{max_area}", (10, 150), 
+                               cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+                    if static_lights is not None and static_lights.learning:
+                        cv2.putText(frame, "LEARNING BACKGROUND", (10, 190),
+                                   cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 165, 255), 1)
+                    cv2.putText(frame, f"Drop: {capture.dropped}  Lat: {capture.latency(captured) * 1000:.1f}ms", (10, 170),
+                               cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+                    if motion_gate is not None:
+                        gate_text = "STILL" if not motion_gate.moving else "MOTION"
+                        cv2.putText(frame, f"Gate: {gate_text}  skip {motion_gate.skip_ratio:.0%}", (10, 210),
+                                   cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+                    cv2.putText(frame, f"Detect: 1/{scale_factor}", (10, 230),
+                               cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+                    
+                    # 显示录制状态
+                    if recording:
+                        cv2.circle(frame, (full_width - 30, 30), 10, (0, 0, 255), -1)
+                        cv2.putText(frame, "REC", (full_width - 60, 35), 
+                                   cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 2)
+                    
+                    # 录制视频
+                    if recording and video_writer is not None:
+                        video_writer.write(frame)
+                    
+                    # 缩小显示窗口到320x240以提升显示性能
+                    if render:
+                        display_frame = cv2.resize(frame, (320, 240), interpolation=cv2.INTER_LINEAR)
+                        cv2.imshow(window_name, display_frame)
+                    
+                    # 键盘控制
+                    key = cv2.waitKey(1) & 0xFF
+                    
+                    if key == ord('q'):
+                        break
+                    elif key == ord('s'):
+                        filename = f"dart_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jpg"
+                        cv2.imwrite(filename, frame)
+                    elif (key == ord('e') or key == ord('E')) and len(completed_trajectories) > 0:
+                        # 导出已完成的轨迹：points 为全部轨迹点，offsets 为每条轨迹的起点
+                        filename = f"dart_trajectories_{datetime.now().strftime('%Y%m%d_%H%M%S')}.npz"
+                        completed_trajectories.save(filename)
+                        print(f"已导出 {len(completed_trajectories)} 条轨迹: {filename}")
+                    elif key == ord('c') or key == ord('C'):
+                        # 清空所有轨迹、落点和重置触发状态
+                        trajectory_points.clear()
+                        completed_trajectories.clear()
+                        dart_landing_points.clear()
+                        start_zone_triggered = False  # 重置为未触发状态，等待下一次飞镖进入
+                        landing_forecast = first_forecast = None
+                        if multi_tracker is not None:
+                            multi_tracker.reset()
+                        primary_track = None
+                        if corridor is not None:
+                            corridor.reset()
+                        print("已清空所有轨迹和落点，重置触发状态")
+                    elif (key == ord('b') or key == ord('B')) and static_lights is not None:
+                        static_lights.start_learning()
+                        print(f"重新标定背景静态灯光 {static_lights.learn_seconds:.0f} 秒，画面中不要有飞镖")
+                    elif key == ord('r') or key == ord('R'):
+                        if not recording:
+                            record_filename = f"dart_video_{datetime.now().strftime('%Y%m%d_%H%M%S')}.mp4"
+                            fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+                            # 使用固定帧率10
+                            video_writer = cv2.VideoWriter(record_filename, fourcc, 10, 
+                                                          (full_width, full_height))
+                            recording = True
+                        else:
+                            recording = False
+                            if video_writer is not None:
+                                video_writer.release()
+                                video_writer = None
+                finally:
+                    capture.release(captured)
                 
             except mvsdk.CameraException as e:
                 if e.error_code != mvsdk.CAMERA_STATUS_TIME_OUT:
@@ -541,8 +969,41 @@ def main():
     finally:
         if video_writer is not None:
             video_writer.release()
-        mvsdk.CameraUnInit(hCamera)
-        mvsdk.CameraAlignFree(pFrameBuffer)
+        if capture is not None:
+            sdk = capture.sdk_stats()
+            capture.stop()
+            print(f"采集统计: 共 {capture.captured} 帧，丢帧 {capture.dropped}，错误 {capture.errors}；"
+                  f"SDK: 采集 {sdk['capture']}，丢帧 {sdk['lost']}，错帧 {sdk['error']}")
+        if search_window is not None:
+            print(f"预测窗口统计: {search_window.summary()}")
+        if green_tracker is not None:
+            print(f"绿灯跟踪统计: {green_tracker.summary()}")
+        if corridor is not None:
+            print(f"飞行走廊: {corridor.rect}，占全幅 {corridor.coverage:.0%}，计算 {corridor.compiles} 次，"
+                  f"梯形外的候选 {corridor.outside} 个（排在后面，未丢弃）")
+        if motion_gate is not None:
+            print(f"运动门控统计: {motion_gate.summary()}")
+        if subpixel is not None:
+            print(f"亚像素中心: {subpixel.summary()}")
+        if ballistic is not None:
+            print(f"弹道估计: {ballistic.summary()}")
+        if multi_tracker is not None:
+            print(f"多目标跟踪: {multi_tracker.summary()}")
+        if governor is not None:
+            print(f"检测分辨率: {governor.summary()}")
+        if detector is not None:
+            if detector.workers > 1:
+                print(f"分条并行检测: {detector.summary()}")
+            detector.close()
+        if workspace is not None:
+            print(f"检测缓冲: {workspace.nbytes / 1024.0:.0f} KB，分配 {workspace.allocations} 次")
+        if static_lights is not None:
+            # 保存慢速适应后的模型
+            static_lights.save(static_config['file'])
+            print(f"背景静态灯光: {static_lights.summary()}")
+        if raw_isp is not None:
+            raw_isp.close()
+        close_camera(hCamera, grabber)
         cv2.destroyAllWindows()
 
 if __name__ == '__main__':
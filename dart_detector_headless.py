@@ -11,6 +11,24 @@ import mvsdk
 import platform
 import time
 from datetime import datetime
+from frame_capture import FrameCapture, open_camera, close_camera
+from dart_detector import (load_capture_config, load_sensor_mode_config, load_search_window_config,
+                           load_static_lights_config, load_motion_gate_config, load_subpixel_config,
+                           load_parallel_config, load_resolution_config, load_multi_tracker_config,
+                           make_color_classifier)
+from sensor_mode import list_sensor_modes, choose_sensor_mode
+from bayer_detect import BayerHalf, BAYER_CV_CODES
+from color_lut import ColorLut
+from blob_extract import BlobExtractor, BLOB_DTYPE, blob_center
+from search_window import SearchWindow
+from static_lights import StaticLightMask
+from motion_gate import MotionGate
+from subpixel import SubpixelRefiner
+from stripe_detect import StripeDetector
+from resolution import ResolutionGovernor
+from workspace import DetectionWorkspace
+from trajectory_store import TrajectoryRing
+from multi_tracker import MultiTargetTracker
 
 def main():
     print("Dart detector starting (headless mode)...")
@@ -26,13 +44,23 @@ def main():
     DevInfo = DevList[0]
     print(f"Using camera: {DevInfo.GetFriendlyName()}")
 
-    # 打开相机
+    # 打开相机（grabber取帧方式由采集器打开相机）
+    capture_config = load_capture_config()
     try:
-        hCamera = mvsdk.CameraInit(DevInfo, -1, -1)
+        hCamera, grabber = open_camera(DevInfo, capture_config['backend'])
     except mvsdk.CameraException as e:
         print(f"Init failed: {e.message}")
         return
 
+    capture = None
+    search_window = None
+    static_lights = None
+    motion_gate = None
+    detector = None
+    governor = None
+    workspace = None
+    multi_tracker = None
+
     try:
         cap = mvsdk.CameraGetCapability(hCamera)
         monoCamera = (cap.sIspCapacity.bMonoSensor != 0)
@@ -44,42 +72,34 @@ def main():
         # 打印相机支持的分辨率范围
         print(f"Camera resolution range: {cap.sResolutionRange.iWidthMin}x{cap.sResolutionRange.iHeightMin} to {cap.sResolutionRange.iWidthMax}x{cap.sResolutionRange.iHeightMax}")
         
-        # 设置自定义分辨率640x480
+        # 设置自定义分辨率640x480（传感器输出模式与主程序共用配置，BIN/SKIP时传感器直接输出检测分辨率）
         target_width = 640
         target_height = 480
         
         try:
-            # 使用SDK的tSdkImageResolution结构体
-            custom_res = mvsdk.tSdkImageResolution()
-            custom_res.iIndex = 0xff  # 0xff表示自定义分辨率
-            custom_res.iWidth = target_width
-            custom_res.iHeight = target_height
-            custom_res.iWidthFOV = target_width
-            custom_res.iHeightFOV = target_height
-            custom_res.iHOffsetFOV = 0
-            custom_res.iVOffsetFOV = 0
-            custom_res.iWidthZoomSw = 0
-            custom_res.iHeightZoomSw = 0
-            custom_res.iWidthZoomHd = 0
-            custom_res.iHeightZoomHd = 0
-            custom_res.uBinSumMode = 0
-            custom_res.uBinAverageMode = 0
-            custom_res.uSkipMode = 0
-            custom_res.uResampleMask = 0
-            
-            mvsdk.CameraSetImageResolution(hCamera, custom_res)
-            print(f"✓ Set custom resolution: {target_width} x {target_height}")
+            sensor_modes = list_sensor_modes(cap, target_width, target_height)
+            sensor_mode = choose_sensor_mode(sensor_modes, load_sensor_mode_config()['mode'])
+            if mvsdk.CameraSetImageResolution(hCamera, sensor_mode.resolution) != mvsdk.CAMERA_STATUS_SUCCESS and sensor_mode.kind:
+                print(f"⚠ Sensor mode {sensor_mode.name} failed, falling back to crop")
+                sensor_mode = sensor_modes[0]
+                mvsdk.CameraSetImageResolution(hCamera, sensor_mode.resolution)
+            print(f"✓ Set custom resolution: {target_width} x {target_height} (sensor mode {sensor_mode.name}, output {sensor_mode.width} x {sensor_mode.height})")
             selected_width = target_width
             selected_height = target_height
+            out_scale = sensor_mode.scale
         except Exception as e:
             print(f"⚠ Failed to set custom resolution: {e}")
             print(f"  Using default resolution: {cap.sResolutionRange.iWidthMax} x {cap.sResolutionRange.iHeightMax}")
             selected_width = cap.sResolutionRange.iWidthMax
             selected_height = cap.sResolutionRange.iHeightMax
+            out_scale = 1
 
         # 设置输出格式为BGR8
         mvsdk.CameraSetIspOutFormat(hCamera, mvsdk.CAMERA_MEDIA_TYPE_BGR8)
 
+        # 镜像翻转交给ISP完成，省掉每帧一次cv2.flip整图拷贝
+        isp_mirror = (mvsdk.CameraSetMirror(hCamera, 0, 1) == mvsdk.CAMERA_STATUS_SUCCESS)
+
         # 连续采集模式
         mvsdk.CameraSetTriggerMode(hCamera, 0)
 
@@ -91,119 +111,229 @@ def main():
         # 开始采集
         mvsdk.CameraPlay(hCamera)
 
-        # 按实际分辨率分配缓存
+        # 按实际分辨率分配缓存（采集线程的环形缓冲，采集模式与主程序共用配置）
         FrameBufferSize = selected_width * selected_height * 3
-        pFrameBuffer = mvsdk.CameraAlignMalloc(FrameBufferSize, 16)
-        print(f"Buffer size: {selected_width} x {selected_height} x 3 = {FrameBufferSize} bytes")
+        capture = FrameCapture(hCamera, FrameBufferSize,
+                               num_buffers=capture_config['num_buffers'],
+                               mode=capture_config['mode'],
+                               backend=capture_config['backend'],
+                               grabber=grabber)
+        capture.start()
+        print(f"Capture mode: {capture.mode} ({capture.backend})")
+        # raw模式：检测直接用Bayer 2x2像素块，完全不跑ISP
+        # 检测中间缓冲按输出分辨率一次分配（与主程序相同）
+        workspace = DetectionWorkspace(selected_width // out_scale, selected_height // out_scale)
+        bayer_half = BayerHalf(mirror=True, workspace=workspace) if capture.mode == 'raw' else None
+        print(f"Buffer size: {selected_width} x {selected_height} x 3 = {FrameBufferSize} bytes (x{capture_config['num_buffers']} ring)")
 
         # 红色的HSV阈值范围
         lower_red1 = np.array([0, 100, 100])
         upper_red1 = np.array([10, 255, 255])
         lower_red2 = np.array([170, 100, 100])
         upper_red2 = np.array([180, 255, 255])
+        # 颜色分类（与主程序共用配置）：默认 cvtColor + inRange，color_lut.enabled 时用量化查找表
+        color_classifier = make_color_classifier([(lower_red1, upper_red1), (lower_red2, upper_red2)], workspace=workspace)
+        if isinstance(color_classifier, ColorLut):
+            print(f"Color LUT (bits={color_classifier.bits}) built in {color_classifier.build_time * 1000:.0f} ms")
         
         # 飞镖头的特征阈值
         min_area = 300
         max_area = 10000
+        # 连通域提取，面积/长宽比在统计数组上一次过滤
+        dart_blobs = BlobExtractor(min_area, max_area, max_aspect=15.0)
+        # 亚像素中心：候选在全分辨率小块上按红色程度加权求质心（与主程序共用配置）
+        subpixel_config = load_subpixel_config()
+        subpixel = (SubpixelRefiner(subpixel_config['margin'], subpixel_config['min_weight'], workspace=workspace)
+                    if subpixel_config['enabled'] else None)
+        # 分条并行：颜色分类、形态学（只做闭运算）、连通域按行分条在线程池里做（与主程序共用配置）
+        parallel_config = load_parallel_config()
+        detector = StripeDetector(color_classifier, dart_blobs, parallel_config['workers'], parallel_config['min_rows'],
+                                  ops=(cv2.MORPH_CLOSE,))
+        if detector.workers > 1:
+            print(f"Stripe-parallel detection: {detector.workers} workers, at least {detector.min_rows} rows per stripe")
+
+        # 预测窗口搜索：连续检测到飞镖后只处理预测位置附近的窗口（与主程序共用配置）
+        window_config = load_search_window_config()
+        if window_config['enabled']:
+            search_window = SearchWindow(selected_width, selected_height, window_config['width'],
+                                         window_config['height'], window_config['grow'], window_config['max_misses'])
+            print(f"Search window: {search_window.width}x{search_window.height}, grow {search_window.grow}x, "
+                  f"full frame after {search_window.max_misses} misses")
+        track_points = TrajectoryRing(3)  # 最近三次检测到的飞镖位置（外推只用最近三个点）
+
+        # 多目标跟踪（与主程序共用配置）：只跟同一条跟踪的候选，反光和其他飞镖不会混进外推的点
+        tracker_config = load_multi_tracker_config()
+        if tracker_config['enabled']:
+            multi_tracker = MultiTargetTracker(selected_width, selected_height, tracker_config['association'],
+                                               tracker_config['gate'], tracker_config['max_speed'],
+                                               tracker_config['max_misses'], tracker_config['confirm_hits'],
+                                               tracker_config['max_tracks'], tracker_config['velocity_gain'],
+                                               tracker_config['max_age'], 3, tracker_config['max_candidates'],
+                                               tracker_config['velocity_hits'])
+            print(f"Multi-target tracker: {multi_tracker.association} association, gate {multi_tracker.gate:.0f}px, "
+                  f"up to {len(multi_tracker.ids)} tracks")
+        followed = None   # 跟随的跟踪号
+
+        # 背景静态灯光排除（与主程序共用配置和模型文件）
+        static_config = load_static_lights_config()
+        if static_config['enabled']:
+            static_lights = StaticLightMask(selected_width, selected_height, static_config['learn_seconds'],
+                                            static_config['threshold'], static_config['adapt_rate'])
+            if static_lights.load(static_config['file']):
+                print(f"Static lights: loaded, {static_lights.sources} sources excluded")
+            else:
+                print(f"Static lights: learning for {static_lights.learn_seconds:.0f}s, keep darts out of view")
+
+        # 运动门控：没有跟踪目标时只在有运动的区域检测，画面静止的帧跳过检测（与主程序共用配置）
+        gate_config = load_motion_gate_config()
+        if gate_config['enabled']:
+            motion_gate = MotionGate(selected_width, selected_height, gate_config['proxy_scale'],
+                                     gate_config['threshold'], gate_config['min_area'], gate_config['margin'],
+                                     workspace)
+            print(f"Motion gate: 1/{motion_gate.proxy_scale} gray proxy, threshold {motion_gate.threshold}")
+
+        # 检测分辨率：没有跟踪目标时粗分辨率，跟踪中1/2（与主程序共用配置）
+        resolution_config = load_resolution_config()
+        if resolution_config['enabled']:
+            governor = ResolutionGovernor(out_scale, bayer_half, resolution_config['idle_scale'],
+                                          resolution_config['track_scale'], workspace)
+        else:
+            governor = ResolutionGovernor(out_scale, bayer_half, 2, 2, workspace)
+        print(f"Detection resolution: idle 1/{governor.idle_scale}, tracking 1/{governor.track_scale}"
+              f"{' (full resolution in search window)' if governor.roi_full else ''}")
 
         # 性能计数
         fps_time = time.time()
         fps_counter = 0
         fps = 0
+        # 采集到检测结果的延迟（按相机硬件时间戳计算），每秒统计一次
+        latency_sum = 0.0
+        latency_max = 0.0
+        latency_mean = 0.0
         
         print("\nDetection started - Press Ctrl+C to exit")
         print("=" * 60)
 
         while True:
             try:
-                # 获取图像
-                pRawData, FrameHead = mvsdk.CameraGetImageBuffer(hCamera, 200)
-                mvsdk.CameraImageProcess(hCamera, pRawData, pFrameBuffer, FrameHead)
-                mvsdk.CameraReleaseImageBuffer(hCamera, pRawData)
-
-                if platform.system() == "Windows":
-                    mvsdk.CameraFlipFrameBuffer(pFrameBuffer, FrameHead, 1)
-                
-                # 转换为numpy数组
-                frame_data = (mvsdk.c_ubyte * FrameHead.uBytes).from_address(pFrameBuffer)
-                frame = np.frombuffer(frame_data, dtype=np.uint8)
-                frame = frame.reshape((FrameHead.iHeight, FrameHead.iWidth, 3))
-                
-                # 镜像翻转
-                frame = cv2.flip(frame, 1)
-
-                # 计算FPS
-                fps_counter += 1
-                if time.time() - fps_time > 1.0:
-                    fps = fps_counter
-                    fps_counter = 0
-                    fps_time = time.time()
-
-                # === 性能优化：缩小图像用于检测 ===
-                # 将图像缩小到1/2进行检测
-                detect_frame = cv2.resize(frame, (FrameHead.iWidth // 2, FrameHead.iHeight // 2), 
-                                         interpolation=cv2.INTER_LINEAR)
-                scale_factor = 2
-
-                # === 红色发光飞镖头检测 ===
-                
-                # 1. 转换到HSV颜色空间
-                hsv = cv2.cvtColor(detect_frame, cv2.COLOR_BGR2HSV)
-                
-                # 2. 检测红色（两个范围的掩模合并）
-                mask1 = cv2.inRange(hsv, lower_red1, upper_red1)
-                mask2 = cv2.inRange(hsv, lower_red2, upper_red2)
-                mask = cv2.bitwise_or(mask1, mask2)
-                
-                # 3. 形态学操作（简化：只做一次）
-                kernel = np.ones((3, 3), np.uint8)
-                mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel)
-                
-                # 4. 查找轮廓
-                contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-                
-                # 5. 分析轮廓
-                detected_objects = 0
-                dart_positions = []
-                
-                for contour in contours:
-                    area = cv2.contourArea(contour)
-                    
-                    scaled_min_area = min_area / (scale_factor * scale_factor)
-                    scaled_max_area = max_area / (scale_factor * scale_factor)
-                    if area < scaled_min_area or area > scaled_max_area:
-                        continue
-                    
-                    x, y, w, h = cv2.boundingRect(contour)
-                    aspect_ratio = max(w, h) / (min(w, h) + 1e-5)
+                # 从采集线程取最新一帧
+                err = capture.pop_error()
+                if err is not None:
+                    raise err
+                captured = capture.read(0.2)
+                if captured is None:
+                    continue
+                # 环形缓冲槽位处理完（包括中途异常）之后才归还给采集线程
+                try:
+                    FrameHead = captured.head
                     
-                    if aspect_ratio > 15.0:
-                        continue
+                    # 环形缓冲上的零拷贝视图，处理完之后才归还
+                    frame = captured.image
                     
-                    detected_objects += 1
+                    # 镜像翻转（ISP不支持时才复制翻转）
+                    if not isp_mirror and bayer_half is None:
+                        frame = cv2.flip(frame, 1)
+
+                    # 计算FPS
+                    fps_counter += 1
+                    if time.time() - fps_time > 1.0:
+                        fps = fps_counter
+                        fps_counter = 0
+                        fps_time = time.time()
+                        latency_mean = latency_sum / max(fps, 1)
+                        latency_sum = 0.0
+
+                    # === 性能优化：缩小图像用于检测 ===
+                    # 没有跟踪目标时缩小到1/4，跟踪中1/2（或预测窗口内全分辨率），坐标都按scale_factor换算回640x480
+                    # 传感器BIN/SKIP已经缩小输出时直接用输出图像，raw模式由Bayer 2x2像素块得到
+                    # 连续检测到飞镖时只处理预测窗口（None为全幅）
+                    rect = None
+                    if search_window is not None:
+                        rect = search_window.begin(track_points, captured.timestamp)
+                    # 学习背景灯光期间按空闲处理（背景灯光模型的网格固定为空闲时的分辨率）
+                    learning = static_lights is not None and static_lights.learning
+                    scale_factor = governor.select(bool(track_points) and not learning, rect is not None)
+                    # 没有跟踪目标时只处理有运动的区域，画面静止时本帧不检测（学习背景灯光期间不门控）
+                    still = False
+                    searched = (0, 0, 0, 0)  # 本帧检测过的范围，范围外的跟踪不计丢失
+                    if motion_gate is not None:
+                        gate = not track_points and not learning
+                        motion_rect = motion_gate.update(frame, out_scale, (0, 0), mirrored=bayer_half is not None,
+                                                         gate=gate)
+                        still = not motion_gate.moving
+                        if gate and motion_rect is not None:
+                            rect = motion_rect
+                    if still:
+                        # 画面静止：没有运动的飞镖头，不做颜色检测
+                        dart_positions = np.empty(0, BLOB_DTYPE)
+                    else:
+                        # 只转换/缩小窗口内的像素
+                        detect_frame, detect_offset, _ = governor.prepare(frame, rect, (0, 0), FrameHead)
+                        searched = (detect_offset[0], detect_offset[1], detect_frame.shape[1] * scale_factor,
+                                    detect_frame.shape[0] * scale_factor)
+
+                        # === 红色发光飞镖头检测 ===
                     
-                    # 映射回原图坐标
-                    x_orig, y_orig = x * scale_factor, y * scale_factor
-                    w_orig, h_orig = w * scale_factor, h * scale_factor
+                        # 1-2. 颜色分类得到红色掩模（HSV inRange，两段红色已合并，workers>1时分条并行）
+                        mask, _ = detector.classify(detect_frame)
+
+                        # 背景静态灯光：学习期间每帧累计，之后没有跟踪目标时慢速适应，然后一次bitwise_and去掉
+                        if static_lights is not None:
+                            if (static_lights.learning or not track_points) and static_lights.observe(mask, scale_factor, detect_offset, captured.timestamp):
+                                static_lights.save(static_config['file'])
+                                print(f"Static lights: learned, {static_lights.sources} sources excluded "
+                                      f"({static_lights.excluded:.1%} of frame)")
+                            static_lights.apply(mask, scale_factor, detect_offset)
                     
-                    # 计算中心点
-                    cx = x_orig + w_orig // 2
-                    cy = y_orig + h_orig // 2
+                        # 3-5. 形态学操作（简化：只做一次闭运算）+ 连通域 + 向量化过滤（候选按面积从大到小）
+                        dart_positions, _ = detector.extract(mask, scale_factor, detect_offset,
+                                                             captured.timestamp, captured.frame_id)
+
+                        # 6. 亚像素中心（raw模式在RAW Bayer小块上去马赛克后求）
+                        if subpixel is not None and len(dart_positions) > 0:
+                            if bayer_half is not None:
+                                subpixel.refine(dart_positions, frame, out_scale, (0, 0), True,
+                                                BAYER_CV_CODES[FrameHead.uiMediaType])
+                            else:
+                                subpixel.refine(dart_positions, frame, out_scale)
+                    detected_objects = len(dart_positions)
+
+                    # 跟踪面积最大的候选（开启多目标跟踪时跟随它的跟踪，跟踪删除后再换成当时面积最大的候选），
+                    # 连续丢失退回全幅后清空轨迹
+                    primary = 0 if detected_objects > 0 else None
+                    if multi_tracker is not None:
+                        track_of = multi_tracker.update(dart_positions, captured.timestamp, captured.frame_id, searched)
+                        if not multi_tracker.alive(followed):
+                            followed = int(track_of[0]) if detected_objects > 0 and track_of[0] >= 0 else None
+                        matched = np.flatnonzero(track_of == followed) if followed is not None else []
+                        primary = int(matched[0]) if len(matched) else None
+                    if search_window is not None:
+                        if primary is not None:
+                            search_window.hit()
+                            dart = dart_positions[primary]
+                            track_points.append(captured.timestamp, dart['cx'], dart['cy'], dart['area'], captured.frame_id)
+                        else:
+                            search_window.miss()
+                            if search_window.lost or not search_window.active:
+                                track_points.clear()
                     
-                    dart_positions.append({
-                        'center': (cx, cy),
-                        'area': int(area * scale_factor * scale_factor),
-                        'aspect_ratio': aspect_ratio
-                    })
+                    latency = capture.latency(captured)
+                    latency_sum += latency
+                    latency_max = max(latency_max, latency)
+                finally:
+                    capture.release(captured)
                 
                 # 打印结果（每秒一次）
                 if fps_counter == 1:
-                    print(f"[{datetime.now().strftime('%H:%M:%S')}] FPS: {fps:2d} | Darts: {detected_objects}", end="")
+                    print(f"[{datetime.now().strftime('%H:%M:%S')}] FPS: {fps:2d} | Drop: {capture.dropped} | "
+                          f"Lat: {latency_mean * 1000:.1f}/{latency_max * 1000:.1f}ms | Darts: {detected_objects}", end="")
+                    latency_max = 0.0
                     if detected_objects > 0:
                         print(" | Pos: ", end="")
                         for dart in dart_positions[:3]:  # 只显示前3个
-                            cx, cy = dart['center']
+                            cx, cy = blob_center(dart)
                             print(f"({cx},{cy})", end=" ")
+                        print(f"@ frame {dart_positions[0]['frame_id']} t={dart_positions[0]['t']:.4f}s", end="")
                     print()
                 
             except mvsdk.CameraException as e:
@@ -214,8 +344,37 @@ def main():
                 break
 
     finally:
-        mvsdk.CameraUnInit(hCamera)
-        mvsdk.CameraAlignFree(pFrameBuffer)
+        if capture is not None:
+            sdk = capture.sdk_stats()
+            capture.stop()
+            print(f"Capture stats: {capture.captured} frames, {capture.dropped} dropped, {capture.errors} errors; "
+                  f"SDK: {sdk['capture']} captured, {sdk['lost']} lost, {sdk['error']} errors")
+        if static_lights is not None:
+            static_lights.save(static_config['file'])
+        if detector is not None:
+            if detector.workers > 1:
+                print(f"Stripe-parallel detection: {detector.parallel_frames}/{detector.frames} frames in parallel, "
+                      f"{detector.merges} blobs merged across stripes")
+            detector.close()
+        if governor is not None:
+            print(f"Detection resolution: {governor.idle_frames} idle frames at 1/{governor.idle_scale}, "
+                  f"{governor.track_frames} tracking frames ({governor.roi_frames} full-res window), "
+                  f"{governor.switches} switches")
+        if workspace is not None:
+            print(f"Detection buffers: {workspace.nbytes / 1024.0:.0f} KB, {workspace.allocations} allocations")
+        if motion_gate is not None:
+            print(f"Motion gate: {motion_gate.frames} gated frames, {motion_gate.hits} with motion "
+                  f"(avg {motion_gate.coverage:.1%} of frame), {motion_gate.skips} skipped "
+                  f"({motion_gate.skip_ratio:.0%}), {motion_gate.bypassed} not gated")
+        if search_window is not None:
+            print(f"Search window: {search_window.frames} frames, {search_window.hits} hits, "
+                  f"{search_window.grows} grown, {search_window.resets} reset to full frame, "
+                  f"avg window {search_window.coverage:.1%} of frame")
+        if multi_tracker is not None:
+            print(f"Multi-target tracker: {multi_tracker.births} tracks created, {multi_tracker.deaths} deleted, "
+                  f"{multi_tracker.matches} points associated, at most {multi_tracker.max_alive} alive, "
+                  f"{multi_tracker.capped} candidates over the cap, {multi_tracker.gated} kept inside a gate")
+        close_camera(hCamera, grabber)
         print("Camera closed")
 
 if __name__ == '__main__':
@@ -0,0 +1,496 @@
+#coding=utf-8
+"""
+相机采集线程 + 预分配帧环形缓冲
+采集和ISP在独立线程中运行，检测线程只取最新的一帧
+被新帧覆盖、没来得及处理的帧计为丢帧
+
+采集模式：
+  process - CameraGetImageBuffer -> CameraImageProcess -> CameraReleaseImageBuffer（三次调用）
+  fused   - CameraGetImageBufferPriorityEx3 一次调用，ISP结果直接写入NumPy持有的对齐内存，同时返回时间戳
+  raw     - 只把RAW Bayer数据拷进环形缓冲，不跑ISP（检测用bayer_detect，显示时再按需ISP）
+逐帧SDK调用走 mvsdk_fast（预绑定原型、复用结构体、返回状态码），超时不再抛异常
+
+取帧方式（backend）：
+  poll     - 本模块的采集线程循环调用取图函数（默认）
+  callback - CameraSetCallbackFunction，SDK取图线程每帧回调，回调里只做ISP/拷贝并交给环形缓冲
+  grabber  - CameraGrabber 帧监听（FrameListener），采集器自己取图和ISP，回调里只拷贝到环形缓冲；
+             统计来自 tSdkGrabberStat（Capture/Lost/Error）
+回调后端不阻塞SDK线程：没有空闲槽位时直接丢弃该帧，不做显示、不等检测线程
+"""
+import sys
+sys.path.append('python_demo')
+import ctypes
+import mvsdk
+import numpy as np
+import platform
+import threading
+import time
+from frame_view import FrameViewCache
+from mvsdk_fast import FastCamera, pointer
+
+CAPTURE_MODES = ('process', 'fused', 'raw')
+CAPTURE_BACKENDS = ('poll', 'callback', 'grabber')
+
+
+def aligned_empty(size, align=16):
+    """NumPy持有的对齐内存（uint8一维数组，首地址按align对齐）"""
+    raw = np.empty(size + align, dtype=np.uint8)
+    offset = (-raw.ctypes.data) % align
+    return raw[offset:offset + size]
+
+
+def media_type_bytes_per_pixel(media_type):
+    """图像格式每像素字节数（按OCCUPY位数计算）"""
+    bits = (media_type & mvsdk.CAMERA_MEDIA_TYPE_EFFECTIVE_PIXEL_SIZE_MASK) >> mvsdk.CAMERA_MEDIA_TYPE_EFFECTIVE_PIXEL_SIZE_SHIFT
+    return max(bits // 8, 1)
+
+
+class CapturedFrame(object):
+    """
+    环形缓冲中的一帧：槽位、序号、帧头、缓冲地址、缓冲上的ndarray视图
+    offset 是该帧左上角在全幅画面中的位置（传感器ROI生效时不为(0, 0)）
+    frame_id 来自CameraGetFrameID，timestamp 是相机硬件时间戳（秒，来自帧头uiTimeStamp），
+    host_time 是采集线程拿到该帧时的 time.perf_counter()
+    """
+    __slots__ = ('slot', 'seq', 'head', 'buffer', 'image', 'offset', 'frame_id', 'timestamp', 'host_time')
+
+    def __init__(self, slot, seq, head, buffer, image, offset=(0, 0), frame_id=0, timestamp=0.0, host_time=0.0):
+        self.slot = slot
+        self.seq = seq
+        self.head = head
+        self.buffer = buffer
+        self.image = image
+        self.offset = offset
+        self.frame_id = frame_id
+        self.timestamp = timestamp
+        self.host_time = host_time
+
+
+class FrameRing(object):
+    """
+    N个CameraAlignMalloc缓冲组成的环
+    生产者写入空闲槽位后发布为最新帧，消费者取走最新帧并在用完后归还
+    """
+
+    def __init__(self, num_buffers, buffer_size, align=16, numpy_owned=False):
+        if num_buffers < 3:
+            # 至少需要：一个正在写、一个最新帧、一个正在读
+            raise ValueError("num_buffers 至少为3")
+        self.buffer_size = buffer_size
+        self.numpy_owned = numpy_owned
+        if numpy_owned:
+            self._arrays = [aligned_empty(buffer_size, align) for _ in range(num_buffers)]
+            self.buffers = [a.ctypes.data for a in self._arrays]
+        else:
+            self._arrays = []
+            self.buffers = [mvsdk.CameraAlignMalloc(buffer_size, align) for _ in range(num_buffers)]
+        self.views = FrameViewCache()  # 每个槽位的零拷贝视图只构建一次
+        self._cond = threading.Condition()
+        self._held = set()        # 消费者正在使用的槽位
+        self._latest = None       # 最新发布的帧（尚未被取走）
+        self._next_slot = 0
+        self._seq = 0
+        self.published = 0        # 已发布的帧数
+        self.dropped = 0          # 被覆盖、未被处理的帧数
+        self.stalls = 0           # 所有槽位都被占用、取不到写入槽位的次数
+
+    def acquire_write_slot(self, timeout=0.0):
+        """
+        选一个既没被消费者持有、也不是最新帧的槽位用于写入
+        没有时最多等timeout秒（消费者归还槽位时唤醒），仍没有返回None
+        """
+        with self._cond:
+            slot = self._free_slot()
+            if slot is None and timeout > 0:
+                self._cond.wait(timeout)
+                slot = self._free_slot()
+            if slot is None:
+                self.stalls += 1
+            return slot
+
+    def _free_slot(self):
+        n = len(self.buffers)
+        latest_slot = self._latest.slot if self._latest is not None else -1
+        for i in range(n):
+            slot = (self._next_slot + i) % n
+            if slot not in self._held and slot != latest_slot:
+                self._next_slot = (slot + 1) % n
+                return slot
+        return None
+
+    def publish(self, slot, head, offset=(0, 0), frame_id=0, timestamp=0.0, host_time=0.0):
+        """发布写好的槽位为最新帧，返回该帧序号"""
+        with self._cond:
+            self._seq += 1
+            if self._latest is not None:
+                # 上一帧还没被取走就被新帧替换
+                self.dropped += 1
+            buffer = self.buffers[slot]
+            self._latest = CapturedFrame(slot, self._seq, head, buffer, self.views.get(buffer, head), offset,
+                                         frame_id, timestamp, host_time)
+            self.published += 1
+            self._cond.notify()
+            return self._seq
+
+    def get_latest(self, timeout=None):
+        """等待并取走最新帧（超时返回None），用完后必须调用release"""
+        with self._cond:
+            if self._latest is None:
+                self._cond.wait(timeout)
+            frame = self._latest
+            if frame is None:
+                return None
+            self._latest = None
+            self._held.add(frame.slot)
+            return frame
+
+    def release(self, frame):
+        """归还消费者持有的槽位（唤醒等待写入槽位的生产者）"""
+        with self._cond:
+            self._held.discard(frame.slot)
+            self._cond.notify_all()
+
+    def wakeup(self):
+        """唤醒等待中的消费者（停止采集时使用）"""
+        with self._cond:
+            self._cond.notify_all()
+
+    def drop(self):
+        """没有空闲槽位、直接丢弃的帧（回调后端）"""
+        with self._cond:
+            self.dropped += 1
+
+    def close(self):
+        self.views.clear()
+        if not self.numpy_owned:
+            for buf in self.buffers:
+                mvsdk.CameraAlignFree(buf)
+        self._arrays = []
+        self.buffers = []
+
+
+def open_camera(DevInfo, backend='poll'):
+    """
+    打开相机，返回 (hCamera, grabber)
+    grabber后端由 CameraGrabber_Create 打开相机（采集器持有相机句柄），其余后端 grabber 为None
+    """
+    if backend == 'grabber':
+        grabber = mvsdk.CameraGrabber_Create(DevInfo)
+        return mvsdk.CameraGrabber_GetCameraHandle(grabber), grabber
+    return mvsdk.CameraInit(DevInfo, -1, -1), None
+
+
+def close_camera(hCamera, grabber=None):
+    """关闭open_camera打开的相机"""
+    if grabber:
+        mvsdk.CameraGrabber_Destroy(grabber)
+    else:
+        mvsdk.CameraUnInit(hCamera)
+
+
+class FrameCapture(object):
+    """
+    按backend取帧、按mode做ISP（见模块说明）
+    输出写入FrameRing，检测线程通过read()/release()取最新帧
+    """
+
+    def __init__(self, hCamera, buffer_size, num_buffers=4, timeout_ms=200,
+                 mode='process', out_format=mvsdk.CAMERA_MEDIA_TYPE_BGR8, sensor_roi=None,
+                 backend='poll', grabber=None):
+        if mode not in CAPTURE_MODES:
+            raise ValueError(f"未知采集模式: {mode}，可选 {CAPTURE_MODES}")
+        if backend not in CAPTURE_BACKENDS:
+            raise ValueError(f"未知取帧方式: {backend}，可选 {CAPTURE_BACKENDS}")
+        if backend != 'poll' and mode == 'fused':
+            raise ValueError("fused模式是一次轮询调用，只能用poll取帧")
+        if backend == 'grabber' and not grabber:
+            raise ValueError("grabber取帧需要采集器句柄（open_camera(DevInfo, 'grabber')）")
+        self.hCamera = hCamera
+        self.timeout_ms = timeout_ms
+        self.mode = mode
+        self.backend = backend
+        self.grabber = grabber
+        self.out_format = out_format
+        self.ring = FrameRing(num_buffers, buffer_size, numpy_owned=(mode == 'fused'))
+        self.sdk = FastCamera(hCamera)
+        self._buffer_ptrs = [pointer(buf) for buf in self.ring.buffers]
+        # 每个槽位一个帧头，SDK直接写入，随该槽位的帧一起发布
+        self._heads = [FastCamera.new_head() for _ in range(num_buffers)]
+        self._grab = {'process': self._grab_process,
+                      'fused': self._grab_fused,
+                      'raw': self._grab_raw}[mode]
+        self.errors = 0            # 非超时的相机错误次数
+        self.last_error = None
+        self.failure = None        # 采集线程意外退出的异常，read() 时抛出
+        # Windows下ISP输出是上下颠倒的，RAW数据不需要翻转
+        self._flip = (platform.system() == "Windows" and mode != 'raw')
+        self._stop = threading.Event()
+        self._thread = None
+        # 回调后端：回调函数对象必须保持引用；回调处理一帧期间持有_event_lock，停止时用它等回调返回
+        self._event_proc = None
+        self._event_lock = threading.Lock()
+        self._event_raw = ctypes.c_void_p()
+        # 传感器ROI（tracking_roi.SensorRoi），只在采集线程里切换，保证每帧的offset准确
+        self.sensor_roi = sensor_roi
+        self._roi_lock = threading.Lock()
+        self._roi_pending = False
+        self._roi_rect = None
+        self._offset = (0, 0)
+        # 硬件时间戳（uiTimeStamp为32位、0.1ms，约5天回绕一次）
+        self._last_stamp = None
+        self._stamp_wraps = 0
+        self.frame_period = 0.0      # 相邻两帧硬件时间间隔的滑动平均（秒），与处理速度无关
+        self.clock_offset = None     # 主机时钟 - 相机时钟 的最小值，用于估计采集到结果的延迟
+
+    def start(self):
+        self._stop.clear()
+        if self.backend == 'callback':
+            self._event_proc = mvsdk.CAMERA_SNAP_PROC(self._on_snap)
+            mvsdk.CameraSetCallbackFunction(self.hCamera, self._event_proc, 0)
+        elif self.backend == 'grabber':
+            self._event_proc = mvsdk.pfnCameraGrabberFrameListener(self._on_grabber_frame)
+            mvsdk.CameraGrabber_SetFrameListener(self.grabber, self._event_proc, 0)
+            mvsdk.CameraGrabber_StartLive(self.grabber)
+        else:
+            self._thread = threading.Thread(target=self._run, name="FrameCapture")
+            self._thread.daemon = True
+            self._thread.start()
+
+    def stop(self):
+        """停止采集线程（或注销回调），释放所有缓冲"""
+        self._stop.set()
+        self.ring.wakeup()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self.backend == 'callback':
+            mvsdk.CameraSetCallbackFunction(self.hCamera, None, 0)
+        elif self.backend == 'grabber':
+            mvsdk.CameraGrabber_StopLive(self.grabber)
+            mvsdk.CameraGrabber_SetFrameListener(self.grabber, None, 0)
+        with self._event_lock:
+            # 等正在执行的回调返回，之后才能释放缓冲
+            self._event_proc = None
+        self.ring.close()
+
+    def read(self, timeout=0.2):
+        """
+        取最新帧（CapturedFrame），超时返回None
+        frame.image 直接指向环形缓冲，release之前该槽位不会被覆盖
+        """
+        if self.sensor_roi is not None and self.backend != 'poll':
+            # 回调后端没有自己的线程，ROI在检测线程取帧前切换（不能在SDK回调里改分辨率）
+            self._apply_pending_roi()
+        self._check_thread()
+        frame = self.ring.get_latest(timeout)
+        if frame is None:
+            self._check_thread()
+        return frame
+
+    def _check_thread(self):
+        """采集线程已经退出（而不是在等帧）时抛出，不让检测线程一直等超时"""
+        if self.failure is not None:
+            raise RuntimeError(f"采集线程异常退出: {self.failure!r}") from self.failure
+        if self._thread is not None and not self._thread.is_alive():
+            raise RuntimeError("采集线程已退出")
+
+    def release(self, frame):
+        self.ring.release(frame)
+
+    def request_roi(self, rect):
+        """请求切换传感器ROI（None为全幅），在采集线程下一次取图前生效"""
+        with self._roi_lock:
+            self._roi_rect = rect
+            self._roi_pending = True
+
+    def pop_error(self):
+        """取出并清除采集线程最近一次的相机错误（没有则返回None）"""
+        e, self.last_error = self.last_error, None
+        return e
+
+    def latency(self, frame):
+        """从相机采集该帧到现在的时间（秒）"""
+        if self.clock_offset is None:
+            return 0.0
+        return time.perf_counter() - (frame.timestamp + self.clock_offset)
+
+    @property
+    def captured(self):
+        return self.ring.published
+
+    @property
+    def dropped(self):
+        return self.ring.dropped
+
+    def sdk_stats(self):
+        """
+        SDK侧的帧统计 {'capture', 'lost', 'error', 'fps'}
+        grabber后端来自 tSdkGrabberStat（fps为采集器的CapFps），其余来自 tSdkFrameStatistic（没有fps，为0）
+        """
+        if self.grabber:
+            stat = mvsdk.CameraGrabber_GetStat(self.grabber)
+            return {'capture': stat.Capture, 'lost': stat.Lost, 'error': stat.Error, 'fps': stat.CapFps}
+        stat = mvsdk.CameraGetFrameStatistic(self.hCamera)
+        return {'capture': stat.iCapture, 'lost': stat.iLost, 'error': max(stat.iTotal - stat.iCapture, 0), 'fps': 0.0}
+
+    def _grab_process(self, slot):
+        """三次调用：取RAW -> 软件ISP -> 归还RAW，返回状态码"""
+        sdk = self.sdk
+        head_ref = self._heads[slot][1]
+        status = sdk.get_buffer(head_ref, self.timeout_ms)
+        if status != mvsdk.CAMERA_STATUS_SUCCESS:
+            return status
+        pRawData = sdk.raw
+        status = sdk.process(pRawData, self._buffer_ptrs[slot], head_ref)
+        sdk.release(pRawData)
+        return status
+
+    def _grab_fused(self, slot):
+        """一次调用：ISP输出直接写入槽位缓冲，并返回时间戳（0.1ms）"""
+        sdk = self.sdk
+        status = sdk.get_buffer_ex3(self._buffer_ptrs[slot], self.out_format, self.timeout_ms,
+                                    mvsdk.CAMERA_GET_IMAGE_PRIORITY_OLDEST)
+        if status != mvsdk.CAMERA_STATUS_SUCCESS:
+            return status
+        # Ex3不返回帧头，这里补一个下游需要的最小帧头
+        width, height, timestamp = sdk.ex3_result
+        FrameHead = self._heads[slot][0]
+        FrameHead.uiMediaType = self.out_format
+        FrameHead.iWidth = width
+        FrameHead.iHeight = height
+        FrameHead.uBytes = width * height * media_type_bytes_per_pixel(self.out_format)
+        FrameHead.uiTimeStamp = timestamp
+        return status
+
+    def _grab_raw(self, slot):
+        """只拷贝RAW数据，不跑ISP（帧头保持RAW格式）"""
+        sdk = self.sdk
+        FrameHead, head_ref = self._heads[slot]
+        status = sdk.get_buffer(head_ref, self.timeout_ms)
+        if status != mvsdk.CAMERA_STATUS_SUCCESS:
+            return status
+        pRawData = sdk.raw
+        ctypes.memmove(self.ring.buffers[slot], pRawData, FrameHead.uBytes)
+        sdk.release(pRawData)
+        return status
+
+    def _apply_pending_roi(self):
+        with self._roi_lock:
+            if not self._roi_pending:
+                return
+            rect = self._roi_rect
+            self._roi_pending = False
+        try:
+            self._offset = self.sensor_roi.apply(rect)
+        except mvsdk.CameraException as e:
+            self.errors += 1
+            self.last_error = e
+            return
+        # 丢弃按旧窗口采集、还在SDK缓存里的帧，避免offset对不上
+        mvsdk.CameraClearBuffer(self.hCamera)
+
+    def _timestamp(self, FrameHead):
+        """帧头uiTimeStamp -> 单调递增的秒数，同时更新帧间隔和时钟偏差"""
+        stamp = FrameHead.uiTimeStamp
+        if self._last_stamp is not None and stamp < self._last_stamp:
+            self._stamp_wraps += 1
+        last = self._last_stamp
+        self._last_stamp = stamp
+        t = (self._stamp_wraps * (1 << 32) + stamp) * 1e-4
+        if last is not None and stamp != last:
+            dt = ((stamp - last) % (1 << 32)) * 1e-4
+            self.frame_period = dt if self.frame_period == 0.0 else 0.9 * self.frame_period + 0.1 * dt
+        return t
+
+    def _run(self):
+        try:
+            while not self._stop.is_set():
+                if self.sensor_roi is not None:
+                    self._apply_pending_roi()
+                # 检测线程占着所有槽位时等它归还，不写入正在使用的缓冲
+                slot = self.ring.acquire_write_slot(self.timeout_ms / 1000.0)
+                if slot is None:
+                    continue
+                try:
+                    status = self._grab(slot)
+                except mvsdk.CameraException as e:
+                    status = e.error_code
+                if status != mvsdk.CAMERA_STATUS_SUCCESS:
+                    if status != mvsdk.CAMERA_STATUS_TIME_OUT:
+                        self._record_error(status)
+                    continue
+                self._publish(slot)
+        except Exception as e:
+            # 其他异常：记下并唤醒检测线程，read() 抛出而不是一直超时
+            print(f"采集线程异常退出: {e!r}")
+            self.failure = e
+            self.ring.wakeup()
+
+    def _record_error(self, status):
+        self.errors += 1
+        self.last_error = mvsdk.CameraException(status)
+
+    def _publish(self, slot):
+        """槽位写好之后：帧号、Windows翻转、硬件时间戳和时钟偏差，然后发布为最新帧"""
+        host_time = time.perf_counter()
+        frame_id = self.sdk.frame_id()
+        FrameHead, head_ref = self._heads[slot]
+
+        if self._flip:
+            self.sdk.flip(self._buffer_ptrs[slot], head_ref, 1)
+
+        timestamp = self._timestamp(FrameHead)
+        offset = host_time - timestamp
+        if self.clock_offset is None or offset < self.clock_offset:
+            self.clock_offset = offset
+
+        self.ring.publish(slot, FrameHead, self._offset, frame_id, timestamp, host_time)
+
+    def _deliver(self, pData, pFrameHead, isp, isp_done=False):
+        """
+        回调后端：把SDK给的一帧写入空闲槽位并发布，isp为True时pData是RAW、由CameraImageProcess写入槽位，
+        否则直接拷贝（RAW帧，或isp_done时采集器已经ISP过的图像）。没有空闲槽位时丢弃，不等待
+        """
+        slot = self.ring.acquire_write_slot()
+        if slot is None:
+            self.ring.drop()
+            return
+        FrameHead, head_ref = self._heads[slot]
+        ctypes.memmove(ctypes.addressof(FrameHead), pFrameHead, ctypes.sizeof(FrameHead))
+        if isp_done:
+            # 采集器ISP之后帧头仍是RAW格式，按ISP输出格式修正（只改槽位里的副本）
+            FrameHead.uiMediaType = self.out_format
+            FrameHead.uBytes = FrameHead.iWidth * FrameHead.iHeight * media_type_bytes_per_pixel(self.out_format)
+        if isp:
+            self._event_raw.value = pData
+            status = self.sdk.process(self._event_raw, self._buffer_ptrs[slot], head_ref)
+            if status != mvsdk.CAMERA_STATUS_SUCCESS:
+                self._record_error(status)
+                return
+        else:
+            ctypes.memmove(self.ring.buffers[slot], pData, min(FrameHead.uBytes, self.ring.buffer_size))
+        self._publish(slot)
+
+    def _on_snap(self, hCamera, pRawData, pFrameHead, pContext):
+        """CameraSetCallbackFunction 回调（SDK取图线程）：ISP或拷贝RAW后立即归还RAW缓冲"""
+        with self._event_lock:
+            if not self._stop.is_set():
+                self._deliver(pRawData, pFrameHead, isp=(self.mode != 'raw'))
+            self._event_raw.value = pRawData
+            self.sdk.release(self._event_raw)
+
+    def _on_grabber_frame(self, Grabber, Phase, pFrameBuffer, pFrameHead, Context):
+        """
+        采集器帧监听：Phase 0 为ISP之前的RAW帧，1 为ISP之后，2 为显示之前
+        返回0表示到此为止（raw模式在Phase 0就拿走RAW，跳过采集器的ISP；其余模式在Phase 1拿走ISP结果，不显示）
+        """
+        with self._event_lock:
+            if self._stop.is_set():
+                return 0
+            if Phase == 0:
+                if self.mode != 'raw':
+                    return 1
+                self._deliver(pFrameBuffer, pFrameHead, isp=False)
+            elif Phase == 1:
+                self._deliver(pFrameBuffer, pFrameHead, isp=False, isp_done=True)
+            return 0
@@ -11,6 +11,8 @@ sys.path.append('python_demo')
 import mvsdk
 import platform
 import json
+from frame_view import frame_view
+from sensor_mode import custom_resolution
 
 def save_green_config(h_min, h_max, s_min, s_max, v_min, v_max, area_min, area_max):
     """保存绿色LED检测参数到配置文件"""
@@ -57,20 +59,7 @@ def main():
         cap = mvsdk.CameraGetCapability(hCamera)
         
         # 设置640x480分辨率（与主程序一致）
-        custom_res = mvsdk.tSdkImageResolution()
-        custom_res.iIndex = 0xff
-        custom_res.iWidth = 640
-        custom_res.iHeight = 480
-        custom_res.iWidthFOV = 640
-        custom_res.iHeightFOV = 480
-        custom_res.iHOffsetFOV = 0
-        custom_res.iVOffsetFOV = 0
-        custom_res.iWidthZoomSw = 0
-        custom_res.iHeightZoomSw = 0
-        custom_res.uSkipMode = 0
-        custom_res.uResampleMask = 0
-        custom_res.iVSubSample = 0
-        custom_res.iHSubSample = 0
+        custom_res = custom_resolution(640, 480)
         
         mvsdk.CameraSetImageResolution(hCamera, custom_res)
         print("Resolution set to 640x480")
@@ -80,6 +69,9 @@ def main():
         mvsdk.CameraSetExposureTime(hCamera, 20000)
         print("Auto-exposure disabled, manual exposure: 20ms")
         
+        # 镜像翻转交给ISP完成（与主程序一致）
+        isp_mirror = (mvsdk.CameraSetMirror(hCamera, 0, 1) == mvsdk.CAMERA_STATUS_SUCCESS)
+        
         # 设置为连续采集模式
         mvsdk.CameraSetTriggerMode(hCamera, 0)
         
@@ -127,11 +119,10 @@ def main():
                 if platform.system() == "Windows":
                     mvsdk.CameraFlipFrameBuffer(pFrameBuffer, FrameHead, 1)
                 
-                # 转换为numpy数组
-                frame_data = (mvsdk.c_ubyte * FrameHead.uBytes).from_address(pFrameBuffer)
-                frame = np.frombuffer(frame_data, dtype=np.uint8)
-                frame = frame.reshape((FrameHead.iHeight, FrameHead.iWidth, 3))
-                frame = cv2.flip(frame, 1)
+                # 帧缓存的零拷贝视图
+                frame = frame_view(pFrameBuffer, FrameHead)
+                if not isp_mirror:
+                    frame = cv2.flip(frame, 1)
                 
                 # 缩小图像用于检测（与主程序一致）
                 detect_frame = cv2.resize(frame, (FrameHead.iWidth // 2, FrameHead.iHeight // 2), 
@@ -0,0 +1,183 @@
+#coding=utf-8
+"""
+绿灯跟踪：绿色引导灯位置固定，不需要每帧做 开运算+闭运算+连通域 的整图搜索
+  - 启动时、灯丢失时、每 refresh_every 帧做一次整图搜索（BlobExtractor取面积最大的绿色连通域）
+  - 其余帧只在缓存位置附近的小块上核对：绿色像素数与搜索时相比的比例、小块质心的偏移，得到置信度
+  - 核对失败（被遮挡、灯灭、移动）立即在本帧做整图搜索，搜索也没找到则为熄灭（OFF）
+  - 本帧检测图只是画面的一部分（预测窗口、飞行走廊、传感器ROI）时只核对，不包含灯的位置时保持上一次的结果（HOLD），
+    置信度逐帧衰减；需要整图搜索时 due 为True，调用方下一帧提供全幅检测图
+位置和外接框都是全幅显示坐标
+"""
+import cv2
+import numpy as np
+from workspace import DetectionWorkspace
+
+GREEN_SEARCH = 'search'
+GREEN_VERIFY = 'verify'
+GREEN_HOLD = 'hold'
+
+
+class GreenLedTracker(object):
+    """
+    update() 每帧调用一次，之后读取：
+      on          - 绿灯是否亮（最近一次搜索/核对的结果）
+      center      - 绿灯中心（整数显示坐标，整图搜索时更新，灯灭后保留最后的位置，从未找到时为None）
+      rect        - 最近一次找到时的外接框 (x, y, w, h)
+      confidence  - 0~1，整图搜索找到为1，核对时按像素数比例和质心偏移计算，HOLD时逐帧衰减
+      state       - 本帧做了什么：search / verify / hold
+    统计：searches 整图搜索次数、verifies 核对次数、verify_failures 核对失败次数
+    """
+
+    def __init__(self, extractor, refresh_every=30, margin=8, min_confidence=0.5, refine_confidence=0.8,
+                 hold_decay=0.98, workspace=None):
+        self.extractor = extractor          # 绿灯的BlobExtractor（面积阈值随绿灯配置更新）
+        self.workspace = workspace if workspace is not None else DetectionWorkspace()   # 形态学、标签图缓冲
+        self.refresh_every = refresh_every
+        self.margin = margin                # 核对小块 = 外接框四周各扩大margin（显示坐标）
+        self.min_confidence = min_confidence      # 低于此值核对失败，本帧整图搜索
+        self.refine_confidence = refine_confidence  # 核对通过但低于此值（部分遮挡、遮挡刚结束），下一帧整图搜索
+        self.hold_decay = hold_decay
+        self._kernel = np.ones((3, 3), np.uint8)
+        self.on = False
+        self.center = None
+        self.rect = None
+        self.confidence = 0.0
+        self.state = GREEN_SEARCH
+        self._ref_count = 0                 # 搜索时核对小块内的绿色像素数（乘 scale^2 换算到显示像素，检测分辨率切换后仍可比较）
+        self._since_search = 0
+        # 统计
+        self.searches = 0
+        self.verifies = 0
+        self.verify_failures = 0
+
+    @property
+    def visible(self):
+        """本帧确认绿灯亮着（不是HOLD沿用的结果）"""
+        return self.on and self.state != GREEN_HOLD
+
+    @property
+    def due(self):
+        """下一次update需要整图搜索（调用方本帧应提供全幅检测图）"""
+        return self.rect is None or not self.on or self._since_search >= self.refresh_every
+
+    @property
+    def patch_rect(self):
+        """核对小块的显示坐标矩形 (x, y, w, h)（外接框四周扩大margin），还没找到过绿灯时为None"""
+        if self.rect is None:
+            return None
+        x, y, w, h = self.rect
+        m = self.margin
+        return x - m, y - m, w + 2 * m, h + 2 * m
+
+    def invalidate(self):
+        """阈值改变后调用：下一帧整图搜索"""
+        self._since_search = self.refresh_every
+
+    def update(self, green_mask, scale=1, offset=(0, 0), full=True):
+        """
+        green_mask: 检测图的绿色掩模（未做形态学），scale/offset 为检测图到显示坐标的换算
+        full=False 表示检测图只是画面的一部分（预测窗口、飞行走廊），不做整图搜索
+        """
+        self._since_search += 1
+        if not full:
+            # 局部检测图：小块完整在图内时核对，否则沿用上一次的结果；核对失败时下一帧整图搜索
+            patch = self._patch(green_mask.shape, scale, offset, clip=False)
+            if patch is not None and self.on:
+                if self._verify(green_mask, scale, offset, patch):
+                    return self.state
+                self.verify_failures += 1
+                self.invalidate()
+            return self._hold()
+        patch = self._patch(green_mask.shape, scale, offset)
+        if patch is None or self.due:
+            return self._search(green_mask, scale, offset)
+        if self._verify(green_mask, scale, offset, patch):
+            return self.state
+        self.verify_failures += 1
+        return self._search(green_mask, scale, offset)
+
+    def _patch(self, shape, scale, offset, clip=True):
+        """
+        核对小块在检测图中的范围 (x0, y0, x1, y1)，裁剪到检测图内；没有缓存位置、不在检测图内，
+        或 clip=False 时有一部分在检测图外，返回None
+        """
+        if self.rect is None:
+            return None
+        x, y, w, h = self.rect
+        ox, oy = offset
+        m = self.margin
+        x0 = (x - m - ox) // scale
+        y0 = (y - m - oy) // scale
+        x1 = -(-(x + w + m - ox) // scale)
+        y1 = -(-(y + h + m - oy) // scale)
+        if not clip and (x0 < 0 or y0 < 0 or x1 > shape[1] or y1 > shape[0]):
+            return None
+        x0, y0 = max(0, x0), max(0, y0)
+        x1, y1 = min(shape[1], x1), min(shape[0], y1)
+        if x1 <= x0 or y1 <= y0:
+            return None
+        return x0, y0, x1, y1
+
+    def _hold(self):
+        self.state = GREEN_HOLD
+        self.confidence *= self.hold_decay
+        return self.state
+
+    def _search(self, green_mask, scale, offset):
+        self.state = GREEN_SEARCH
+        self.searches += 1
+        self._since_search = 0
+        ws = self.workspace
+        shape = green_mask.shape
+        opened = cv2.morphologyEx(green_mask, cv2.MORPH_OPEN, self._kernel, dst=ws.buffer('green_morph0', shape))
+        mask = cv2.morphologyEx(opened, cv2.MORPH_CLOSE, self._kernel, dst=ws.buffer('green_morph1', shape))
+        labels = ws.buffer('green_labels', shape, self.extractor.label_dtype(mask))
+        found, _ = self.extractor.extract(mask, scale, offset, labels=labels)
+        if len(found) == 0:
+            self.on = False
+            self.confidence = 0.0
+            return self.state
+        led = found[0]
+        self.on = True
+        self.confidence = 1.0
+        self.rect = (int(led['x']), int(led['y']), int(led['w']), int(led['h']))
+        self.center = int(round(float(led['cx']))), int(round(float(led['cy'])))
+        # 核对基准：新外接框小块内的原始绿色像素数（与核对时同样不做形态学）
+        patch = self._patch(green_mask.shape, scale, offset)
+        if patch is not None:
+            x0, y0, x1, y1 = patch
+            self._ref_count = cv2.countNonZero(green_mask[y0:y1, x0:x1]) * scale * scale
+        return self.state
+
+    def _verify(self, green_mask, scale, offset, patch):
+        """
+        小块核对：绿色像素数与基准的比例、质心偏移都在范围内时返回True
+        中心保持整图搜索的结果（落点参考线不随核对抖动），核对只更新置信度
+        """
+        self.verifies += 1
+        x0, y0, x1, y1 = patch
+        m = cv2.moments(green_mask[y0:y1, x0:x1], binaryImage=True)
+        count = m['m00']
+        if count <= 0 or self._ref_count <= 0:
+            return False
+        area = count * scale * scale
+        ratio = min(area / self._ref_count, self._ref_count / area)
+        ox, oy = offset
+        cx = (x0 + m['m10'] / count + 0.5) * scale - 0.5 + ox
+        cy = (y0 + m['m01'] / count + 0.5) * scale - 0.5 + oy
+        # 质心偏移按外接框半径归一化
+        radius = max(self.rect[2], self.rect[3]) / 2.0 + 1.0
+        shift = np.hypot(cx - self.center[0], cy - self.center[1]) / radius
+        confidence = ratio * max(0.0, 1.0 - shift)
+        if confidence < self.min_confidence:
+            return False
+        self.state = GREEN_VERIFY
+        self.on = True
+        self.confidence = confidence
+        if confidence < self.refine_confidence:
+            self._since_search = self.refresh_every
+        return True
+
+    def summary(self):
+        """统计字符串（打印用）"""
+        return f"整图搜索 {self.searches} 次，小块核对 {self.verifies} 次（失败 {self.verify_failures}）"
@@ -0,0 +1,136 @@
+#coding=utf-8
+"""
+运动门控：亮着的飞镖头既是红色的也是运动的，等待飞镖时颜色检测只在与上一帧有变化的区域里做
+  - 每帧把采集图缩小到全幅的 1/proxy_scale（默认1/8，640x480 -> 80x60）的灰度小图，与上一帧小图做 absdiff + 阈值
+  - 变化像素的连通域（面积不小于min_area）外接框合并、四周加margin，得到本帧的检测范围
+  - 没有变化（画面静止）时本帧不需要做红色检测，空闲帧只剩一次缩小和一次80x60的差分
+小图由采集图直接缩小（BGR或RAW Bayer）：INTER_LINEAR缩小8倍时每个小图像素是块中心2x2像素的平均，
+RAW Bayer正好是一个RGGB块（即亮度），比INTER_AREA整块平均快约20倍，噪声也已平均掉一半
+矩形都是全幅显示坐标 (x, y, w, h)
+"""
+import cv2
+import numpy as np
+from workspace import DetectionWorkspace
+
+
+class MotionGate(object):
+    """
+    update() 每帧检测前调用（不门控的帧也要调用，保持上一帧小图最新），返回本帧的检测范围（None为全幅），
+    moving 为False表示画面静止，本帧可以跳过红色检测
+    统计：frames 门控帧数、hits 有运动、skips 静止跳过、bypassed 未门控帧数（追踪中、需要整图的帧）、
+          coverage 门控帧平均检测面积占全幅的比例（跳过的帧为0）
+    """
+
+    def __init__(self, full_width, full_height, proxy_scale=8, threshold=12, min_area=2, margin=16, workspace=None):
+        self.full_width = full_width
+        self.full_height = full_height
+        self.proxy_scale = proxy_scale
+        self.threshold = threshold
+        self.min_area = min_area      # 变化连通域的最小面积（小图像素），去掉单个噪点
+        self.margin = margin          # 运动框四周扩大的显示像素（飞镖边缘、形态学需要的邻域）
+        self.workspace = workspace if workspace is not None else DetectionWorkspace()   # 小图、差分、标签图缓冲
+        self.rect = None
+        self.moving = True
+        self._prev = None
+        self._key = None              # 上一帧小图对应的 (尺寸, offset)，ROI变化时不能差分
+        self._turn = 0                # 本帧小图写入 proxy0/proxy1 中的哪一块（另一块是上一帧小图）
+        # 统计
+        self.frames = 0
+        self.hits = 0
+        self.skips = 0
+        self.bypassed = 0
+        self._area_sum = 0.0
+
+    @property
+    def skip_ratio(self):
+        """门控帧中静止跳过的比例"""
+        return self.skips / self.frames if self.frames else 0.0
+
+    @property
+    def coverage(self):
+        return self._area_sum / self.frames if self.frames else 0.0
+
+    def _proxy(self, image, scale, mirrored):
+        """采集图缩小为灰度小图（scale为采集图一个像素对应的显示像素数）"""
+        k = self.proxy_scale
+        w = max(1, image.shape[1] * scale // k)
+        h = max(1, image.shape[0] * scale // k)
+        ws = self.workspace
+        small = cv2.resize(image, (w, h), interpolation=cv2.INTER_LINEAR,
+                           dst=ws.buffer('proxy_resize', (h, w) + image.shape[2:], full=False))
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY, dst=ws.buffer('proxy_gray', (h, w), full=False))
+        # 上一帧小图还要用来差分，两块缓冲轮流写
+        proxy = ws.buffer(f'proxy{self._turn}', (h, w), full=False)
+        self._turn ^= 1
+        if mirrored:
+            return cv2.flip(small, 1, dst=proxy)
+        proxy[...] = small
+        return proxy
+
+    def update(self, image, scale=1, offset=(0, 0), within=None, mirrored=False, gate=True):
+        """
+        image: 本帧采集图（BGR或RAW Bayer），scale/offset 为采集图到显示坐标的换算，mirrored 表示采集图是镜像之前的
+        within: 本帧本来要处理的范围（飞行走廊等，None为全幅），只看范围内的运动，返回范围与运动框的交集
+        gate=False 时只更新小图，原样返回within
+        """
+        proxy = self._proxy(image, scale, mirrored)
+        key = (proxy.shape, tuple(offset))
+        prev, self._prev = self._prev, proxy
+        primed = key == self._key
+        self._key = key
+        self.moving = True
+        self.rect = within
+        if not gate or not primed:
+            self.bypassed += 1
+            return within
+
+        self.frames += 1
+        k = self.proxy_scale
+        ox, oy = offset
+        # 检测范围换算到小图坐标，只差分范围内的像素
+        if within is None:
+            x0, y0, x1, y1 = 0, 0, proxy.shape[1], proxy.shape[0]
+        else:
+            x, y, w, h = within
+            x0, y0 = max(0, (x - ox) // k), max(0, (y - oy) // k)
+            x1 = min(proxy.shape[1], -(-(x + w - ox) // k))
+            y1 = min(proxy.shape[0], -(-(y + h - oy) // k))
+        if x1 <= x0 or y1 <= y0:
+            self.moving = False
+            self.rect = None
+            self.skips += 1
+            return None
+        ws = self.workspace
+        diff = ws.buffer('motion_diff', (y1 - y0, x1 - x0), full=False)
+        cv2.absdiff(proxy[y0:y1, x0:x1], prev[y0:y1, x0:x1], dst=diff)
+        cv2.threshold(diff, self.threshold, 255, cv2.THRESH_BINARY, dst=diff)
+
+        labels = ws.buffer('motion_labels', diff.shape, np.int32, full=False)
+        n, _, stats, _ = cv2.connectedComponentsWithStats(diff, labels, connectivity=8)
+        stats = stats[1:n]
+        stats = stats[stats[:, cv2.CC_STAT_AREA] >= self.min_area]
+        if len(stats) == 0:
+            self.moving = False
+            self.rect = None
+            self.skips += 1
+            return None
+
+        # 所有运动框的并集外接框（小图坐标 -> 显示坐标，加边距，裁剪到within）
+        m = self.margin
+        left = (x0 + int(stats[:, cv2.CC_STAT_LEFT].min())) * k + ox - m
+        top = (y0 + int(stats[:, cv2.CC_STAT_TOP].min())) * k + oy - m
+        right = (x0 + int((stats[:, cv2.CC_STAT_LEFT] + stats[:, cv2.CC_STAT_WIDTH]).max())) * k + ox + m
+        bottom = (y0 + int((stats[:, cv2.CC_STAT_TOP] + stats[:, cv2.CC_STAT_HEIGHT]).max())) * k + oy + m
+        bx, by, bw, bh = within if within is not None else (0, 0, self.full_width, self.full_height)
+        left, top = max(left, bx), max(top, by)
+        right, bottom = min(right, bx + bw), min(bottom, by + bh)
+        self.rect = (left, top, right - left, bottom - top)
+        self.hits += 1
+        self._area_sum += (right - left) * (bottom - top) / float(self.full_width * self.full_height)
+        return self.rect
+
+    def summary(self):
+        """统计字符串（打印用）"""
+        return (f"门控 {self.frames} 帧，有运动 {self.hits}（平均 {self.coverage:.1%} 全幅），"
+                f"静止跳过 {self.skips}（{self.skip_ratio:.0%}），未门控 {self.bypassed} 帧")
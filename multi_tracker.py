@@ -0,0 +1,359 @@
+#coding=utf-8
+"""
+多目标跟踪：每帧所有飞镖头候选都参与关联，追踪的飞镖只跟自己的跟踪，不再取 dart_candidates[0]（面积最大的候选），
+反光或同一轮的其他飞镖成为别的跟踪，不会抢走正在追踪的轨迹
+  - 每条跟踪的状态（位置、速度、最近观测时间、命中/丢失次数）按槽位存放在数组里（最多 max_tracks 条），
+    预测、代价矩阵、门限对所有跟踪和候选一次算完
+  - 先关联确认的跟踪，剩下的候选再关联未确认的跟踪（杂点刚出生的跟踪门限大，不能和飞镖的跟踪抢候选）；
+    代价为预测位置到候选中心的距离 / 该跟踪的门限半径：有速度的跟踪为 gate，只有一个点（速度未知）的跟踪为
+    gate + max_speed x 经过的时间（与帧率无关）；命中 velocity_hits 次后算作有速度；
+    代价超过1的配对不允许。丢失的帧不放大门限：预测按实际经过的时间外推，静止的杂点跟踪门限变大反而会吞掉路过的飞镖
+  - 候选超过 max_candidates 个时，落在任一跟踪预测门限内的候选照常关联（小的飞镖不会因为面积排不上而被挤掉），
+    门限外的只有面积最大的几个补足上限，其余的不关联也不出生（满屏杂点时每帧耗时有上限），下标记在 dropped 里
+  - 关联：hungarian 为总代价最小的一一匹配（Kuhn-Munkres，O(n^3)；跟踪或候选不配对各计0.5，门限内的配对才会被选），
+    按门限内配对的连通块分别求解；greedy 为门限内按代价从小到大依次配对的最近邻，按轮向量化，整个矩阵一次算完；
+    门限内没有冲突（每条跟踪附近只有一个候选）时两者都不用求解
+  - 没配上的候选新建跟踪（出生），命中 confirm_hits 次后确认；未确认的跟踪在本帧检测过的范围内丢失一次即删除，
+    确认的跟踪连续 max_misses 帧没配上，或预测位置出了画面时删除（死亡）；预测窗口、走廊、运动门控只检测了部分画面时，范围外的跟踪不计丢失，
+    但超过 max_age 秒没配上的跟踪不管在不在范围内都删除（被背景灯光模型去掉的灯光等不会一直留着）
+  - 速度为 alpha-beta 滤波：位置取观测，速度按预测残差 / dt 乘 velocity_gain 修正（出生后的第二个点直接取两点差）
+每条跟踪的轨迹点存放在各自预分配的 TrajectoryRing 里；坐标为显示坐标，时间为硬件时间戳（秒）
+"""
+import numpy as np
+from trajectory_store import TrajectoryRing
+
+ASSOCIATIONS = ('greedy', 'hungarian')
+
+
+def hungarian(cost):
+    """
+    最小总代价的一一匹配（行数和列数可以不同，匹配 min(行, 列) 对），返回 (行下标, 列下标)，按行排序
+    最短增广路实现，内层对所有列向量化
+    """
+    cost = np.asarray(cost, np.float64)
+    if cost.shape[0] > cost.shape[1]:
+        cols, rows = hungarian(cost.T)
+        order = np.argsort(rows)
+        return rows[order], cols[order]
+    n, m = cost.shape
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    match = np.zeros(m + 1, np.intp)    # 列 j（从1起）匹配的行（从1起），0为未匹配
+    way = np.zeros(m + 1, np.intp)
+    for i in range(1, n + 1):
+        match[0] = i
+        j0 = 0
+        minv = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, bool)
+        while True:
+            used[j0] = True
+            i0 = match[j0]
+            reduced = cost[i0 - 1] - u[i0] - v[1:]
+            better = ~used[1:] & (reduced < minv[1:])
+            minv[1:][better] = reduced[better]
+            way[1:][better] = j0
+            free = np.where(used[1:], np.inf, minv[1:])
+            j1 = int(np.argmin(free)) + 1
+            delta = free[j1 - 1]
+            u[match[used]] += delta
+            v[used] -= delta
+            minv[~used] -= delta
+            j0 = j1
+            if match[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            match[j0] = match[j1]
+            j0 = j1
+    cols = np.flatnonzero(match[1:])
+    rows = match[1:][cols] - 1
+    order = np.argsort(rows)
+    return rows[order], cols[order]
+
+
+def greedy(cost):
+    """
+    代价不超过1的配对按代价从小到大依次选取（行、列各用一次），返回 (行下标, 列下标)，按行排序
+    按轮向量化：每轮互为最近（行内最小且列内最小，同代价时下标小的优先）的配对一定会被依次选取的写法选中，
+    一次全部选上后去掉它们的行列再来一轮，轮数不超过配对数（通常一两轮）
+    """
+    cost = np.where(cost <= 1.0, cost, np.inf)
+    rows, cols = [], []
+    while cost.size:
+        best_col = np.argmin(cost, axis=1)
+        best_row = np.argmin(cost, axis=0)
+        r = np.flatnonzero((best_row[best_col] == np.arange(cost.shape[0]))
+                           & np.isfinite(cost[np.arange(cost.shape[0]), best_col]))
+        if len(r) == 0:
+            break
+        c = best_col[r]
+        rows.append(r)
+        cols.append(c)
+        cost[r, :] = np.inf
+        cost[:, c] = np.inf
+    if not rows:
+        return np.zeros(0, np.intp), np.zeros(0, np.intp)
+    rows, cols = np.concatenate(rows), np.concatenate(cols)
+    order = np.argsort(rows)
+    return rows[order], cols[order]
+
+
+class MultiTargetTracker(object):
+    """
+    update(candidates, t, frame_id, rect) 每帧检测后调用（候选为 BLOB_DTYPE 数组），返回每个候选的跟踪号（没有跟踪为-1）；
+    entered(rect) 找出轨迹进入过矩形的确认跟踪，kill(track_id) 在轨迹结束时删除跟踪
+    统计：births 新建、deaths 删除（含 kill）、matches 关联成功的点数、max_alive 同时存在的最多跟踪数、
+    capped 超过 max_candidates 没参与关联的候选数、gated 面积排在上限之外但在门限内照常关联的候选数；
+    dropped 为最近一次 update() 没参与关联的候选下标
+    """
+
+    def __init__(self, width, height, association='greedy', gate=40.0, max_speed=3000.0, max_misses=5,
+                 confirm_hits=2, max_tracks=16, velocity_gain=0.5, max_age=0.5, capacity=100,
+                 max_candidates=32, velocity_hits=2):
+        if association not in ASSOCIATIONS:
+            raise ValueError(f"未知关联方式: {association}，可选 {ASSOCIATIONS}")
+        self.width = width
+        self.height = height
+        self.association = association
+        self.gate = float(gate)                 # 有速度的跟踪的门限半径（预测位置的允许误差，显示像素）
+        self.max_speed = float(max_speed)       # 飞镖在画面上的最大速度（像素/秒），只有一个点的跟踪按它放大门限
+        self.max_misses = max_misses
+        self.confirm_hits = confirm_hits
+        self.velocity_gain = velocity_gain
+        self.max_age = max_age                  # 超过这么多秒没配上的跟踪删除（秒）
+        self.max_candidates = max_candidates    # 每帧门限外参与关联的候选数上限（面积大的先）
+        self.velocity_hits = velocity_hits      # 命中这么多次的跟踪算有速度，门限取 gate
+        # 按槽位的跟踪状态，ids 为-1的槽位空闲
+        self.ids = np.full(max_tracks, -1, np.int64)
+        self.pos = np.zeros((max_tracks, 2))
+        self.vel = np.zeros((max_tracks, 2))
+        self.t = np.zeros(max_tracks)
+        self.hits = np.zeros(max_tracks, np.int32)
+        self.misses = np.zeros(max_tracks, np.int32)
+        self.rings = [TrajectoryRing(capacity) for _ in range(max_tracks)]
+        self._next_id = 0
+        self._now = None                        # 最近一次 update() 的时间戳
+        # 统计
+        self.births = 0
+        self.deaths = 0
+        self.matches = 0
+        self.max_alive = 0
+        self.capped = 0
+        self.gated = 0
+        self.dropped = np.zeros(0, np.intp)
+
+    @property
+    def count(self):
+        """当前跟踪数"""
+        return int(np.count_nonzero(self.ids >= 0))
+
+    def alive(self, track_id):
+        return track_id is not None and track_id >= 0 and bool(np.any(self.ids == track_id))
+
+    def predict(self, t):
+        """所有槽位在t时刻的预测位置 (max_tracks, 2)"""
+        return self.pos + self.vel * (t - self.t)[:, None]
+
+    def update(self, candidates, t, frame_id=0, rect=None):
+        """
+        candidates: 本帧的候选（BLOB_DTYPE，按面积从大到小），t: 硬件时间戳，
+        rect: 本帧检测过的显示坐标矩形 (x, y, w, h)，None为全幅；返回每个候选的跟踪号（没有空槽位、被 max_candidates 去掉时为-1）
+        """
+        result = np.full(len(candidates), -1, np.int64)
+        self._now = t
+        live = np.flatnonzero(self.ids >= 0)
+        elapsed = t - self.t[live]
+        pred = self.pos[live] + self.vel[live] * elapsed[:, None]
+        gates = np.where(self.hits[live] >= self.velocity_hits, self.gate, self.gate + self.max_speed * elapsed)
+        z = np.empty((len(candidates), 2))
+        z[:, 0] = candidates['cx']
+        z[:, 1] = candidates['cy']
+        kept = slice(None)
+        self.dropped = np.zeros(0, np.intp)
+        if len(candidates) > self.max_candidates:
+            # 门限内的候选都保留，门限外的只留面积最大的几个补足上限：满屏杂点的帧代价矩阵和关联的耗时有上限，
+            # 跟踪中的小飞镖也不会被大的杂点挤掉
+            diff = pred[:, None, :] - z[None, :, :]
+            inside = np.any(np.einsum('ijk,ijk->ij', diff, diff) <= (gates * gates)[:, None], axis=0)
+            spare = max(self.max_candidates - int(np.count_nonzero(inside)), 0)
+            outside = np.flatnonzero(~inside)
+            inside[outside[:spare]] = True
+            kept = np.flatnonzero(inside)
+            self.dropped = outside[spare:]
+            self.gated += int(np.count_nonzero(kept >= self.max_candidates))
+            self.capped += len(self.dropped)
+            candidates, z = candidates[kept], z[kept]
+        n = len(candidates)
+        track_of = np.full(n, -1, np.int64)
+        if len(live) == 0 and n == 0:
+            return result
+        area = candidates['area']
+        matched = np.zeros(len(live), bool)
+        if len(live) and n:
+            confirmed = self.hits[live] >= self.confirm_hits
+            # 先关联确认的跟踪，剩下的候选再给未确认的跟踪：刚出生的杂点跟踪（门限大）不会抢走飞镖的候选
+            for group in (np.flatnonzero(confirmed), np.flatnonzero(~confirmed)):
+                free = np.flatnonzero(track_of < 0)
+                if len(group) == 0 or len(free) == 0:
+                    continue
+                diff = pred[group, None, :] - z[None, free, :]
+                cost = np.sqrt(np.einsum('ijk,ijk->ij', diff, diff)) / gates[group, None]
+                rows, cols = self._associate(cost)
+                g, c = group[rows], free[cols]
+                slots = live[g]
+                self._correct(slots, z[c], pred[g], t)
+                for s, k in zip(slots, c):
+                    self.rings[s].append(t, z[k, 0], z[k, 1], area[k], frame_id)
+                track_of[c] = self.ids[slots]
+                matched[g] = True
+                self.matches += len(slots)
+        # 没配上的跟踪：预测位置在本帧检测过的范围内才计丢失；未确认的（杂点、闪烁）丢失一次就删除，
+        # 确认的连续丢失超过 max_misses 帧才删除；预测位置出了画面、超过 max_age 秒没配上的删除
+        lost = live[~matched]
+        if len(lost):
+            p = pred[~matched]
+            if rect is None:
+                self.misses[lost] += 1
+            else:
+                x, y, w, h = rect
+                seen = (p[:, 0] >= x) & (p[:, 0] < x + w) & (p[:, 1] >= y) & (p[:, 1] < y + h)
+                self.misses[lost[seen]] += 1
+            misses = self.misses[lost]
+            margin = self.gate
+            outside = np.any((p < -margin) | (p > (self.width + margin, self.height + margin)), axis=1)
+            stale = elapsed[~matched] > self.max_age
+            dead = lost[(misses > self.max_misses) | ((self.hits[lost] < self.confirm_hits) & (misses > 0))
+                        | outside | stale]
+            self.ids[dead] = -1
+            self.deaths += len(dead)
+        # 出生：没配上的候选（面积大的先）占空闲槽位
+        born = np.flatnonzero(track_of < 0)
+        if len(born):
+            slots = np.flatnonzero(self.ids < 0)[:len(born)]
+            born = born[:len(slots)]
+            ids = self._next_id + np.arange(len(born))
+            self.ids[slots] = ids
+            self.pos[slots] = z[born]
+            self.vel[slots] = 0.0
+            self.t[slots] = t
+            self.hits[slots] = 1
+            self.misses[slots] = 0
+            track_of[born] = ids
+            for s, k in zip(slots, born):
+                self.rings[s].clear()
+                self.rings[s].append(t, z[k, 0], z[k, 1], area[k], frame_id)
+            self._next_id += len(born)
+            self.births += len(born)
+            self.max_alive = max(self.max_alive, self.count)
+        result[kept] = track_of
+        return result
+
+    def _associate(self, cost):
+        """代价矩阵（跟踪 x 候选）-> 门限内的配对 (行下标, 列下标)"""
+        gated = cost <= 1.0
+        # 门限内没有冲突的配对（跟踪和候选在门限内都只有对方，通常的情况：每支飞镖附近只有自己的候选）唯一，不用求解
+        single = gated & (gated.sum(axis=1) == 1)[:, None] & (gated.sum(axis=0) == 1)[None, :]
+        rows, cols = np.nonzero(single)
+        if len(rows) == np.count_nonzero(gated):
+            return rows, cols
+        if self.association == 'greedy':
+            # 依次选取的结果与分块无关，整个矩阵一次算完
+            return greedy(cost)
+        # 有冲突的配对按连通块分别求解（冲突通常只有两三条跟踪和候选）
+        pairs_r, pairs_c = [rows], [cols]
+        for r_idx, c_idx in self._blocks(gated & ~single):
+            sub = cost[np.ix_(r_idx, c_idx)]
+            if len(r_idx) == 1 or len(c_idx) == 1:
+                # 一条跟踪对多个候选（或反过来）：取代价最小的一对
+                k = int(np.argmin(sub))
+                rows, cols = np.array([k // sub.shape[1]]), np.array([k % sub.shape[1]])
+            else:
+                rows, cols = hungarian(self._augment(sub))
+                keep = (rows < sub.shape[0]) & (cols < sub.shape[1])
+                rows, cols = rows[keep], cols[keep]
+            ok = sub[rows, cols] <= 1.0
+            pairs_r.append(r_idx[rows[ok]])
+            pairs_c.append(c_idx[cols[ok]])
+        return np.concatenate(pairs_r), np.concatenate(pairs_c)
+
+    @staticmethod
+    def _blocks(gated):
+        """
+        门限内配对组成的连通块 [(行下标, 列下标)]：所有块一起做最小标号传播（行标号 -> 列取相连行的最小标号 -> 行取相连列的
+        最小标号），迭代次数为块的直径（通常一两次），不再逐块逐行扩张
+        """
+        k = gated.shape[0]
+        row_label = np.where(gated.any(axis=1), np.arange(k), k)
+        while True:
+            col_label = np.where(gated, row_label[:, None], k).min(axis=0)
+            grown = np.minimum(row_label, np.where(gated, col_label[None, :], k).min(axis=1))
+            if np.array_equal(grown, row_label):
+                break
+            row_label = grown
+        return [(np.flatnonzero(row_label == b), np.flatnonzero(col_label == b))
+                for b in np.unique(row_label[row_label < k])]
+
+    @staticmethod
+    def _augment(cost):
+        """
+        加上"不配对"的行列：跟踪或候选不配对各计 0.5，一对配对的代价不超过1（门限内）时才比两边都不配对好，
+        不会为了多配一对而让别的配对变差；门限外的配对代价取比任何可行解都大的常数
+        """
+        k, m = cost.shape
+        big = k + m + 1.0
+        aug = np.full((k + m, m + k), big)
+        aug[:k, :m] = np.where(cost <= 1.0, cost, big)
+        aug[np.arange(k), m + np.arange(k)] = 0.5
+        aug[k + np.arange(m), np.arange(m)] = 0.5
+        aug[k:, m:] = 0.0
+        return aug
+
+    def _correct(self, slots, z, pred, t):
+        """配上的跟踪：位置取观测，速度 alpha-beta 修正"""
+        dt = np.maximum(t - self.t[slots], 1e-6)[:, None]
+        first = (self.hits[slots] == 1)[:, None]
+        self.vel[slots] = np.where(first, (z - self.pos[slots]) / dt,
+                                   self.vel[slots] + self.velocity_gain * (z - pred) / dt)
+        self.pos[slots] = z
+        self.t[slots] = t
+        self.hits[slots] += 1
+        self.misses[slots] = 0
+
+    def entered(self, rect):
+        """
+        最近一次 update() 配上了候选、轨迹点进入过显示坐标矩形 (x1, y1, x2, y2) 的确认跟踪中最早进入的一条：
+        (跟踪号, 从进入的点开始的轨迹点)，没有时为None；轨迹点是跟踪自己的缓冲视图，下一次 update() 之前要拷走
+        """
+        x1, y1, x2, y2 = rect
+        best = None
+        for s in np.flatnonzero((self.ids >= 0) & (self.hits >= self.confirm_hits) & (self.t == self._now)):
+            points = self.rings[s].points
+            inside = (points['x'] >= x1) & (points['x'] <= x2) & (points['y'] >= y1) & (points['y'] <= y2)
+            if inside.any():
+                k = int(np.argmax(inside))
+                if best is None or points['t'][k] < best[1]['t'][0]:
+                    best = (int(self.ids[s]), points[k:])
+        return best
+
+    def kill(self, track_id):
+        """删除一条跟踪（轨迹结束时调用）"""
+        dead = self.ids == track_id
+        self.deaths += int(np.count_nonzero(dead))
+        self.ids[dead] = -1
+
+    def reset(self):
+        self.ids[:] = -1
+
+    def polylines(self, exclude=None):
+        """除 exclude 以外的确认跟踪的 cv2.polylines 点数组列表"""
+        lines = []
+        for s in np.flatnonzero((self.ids >= 0) & (self.hits >= self.confirm_hits)):
+            if self.ids[s] != exclude and len(self.rings[s]) > 1:
+                lines.append(self.rings[s].polyline())
+        return lines
+
+    def summary(self):
+        """统计字符串（打印用）"""
+        return (f"{self.association} 关联，新建 {self.births} 条，删除 {self.deaths} 条，关联 {self.matches} 点，"
+                f"最多同时 {self.max_alive} 条，超出上限的候选 {self.capped} 个，"
+                f"面积在上限外但在门限内照常关联 {self.gated} 个")
@@ -2,6 +2,7 @@
 import cv2
 import numpy as np
 import mvsdk
+from frame_view import frame_view
 import time
 import platform
 
@@ -91,9 +92,8 @@ class App(object):
 		
 		# 此时图片已经存储在pFrameBuffer中，对于彩色相机pFrameBuffer=RGB数据，黑白相机pFrameBuffer=8位灰度数据
 		# 把pFrameBuffer转换成opencv的图像格式以进行后续算法处理
-		frame_data = (mvsdk.c_ubyte * FrameHead.uBytes).from_address(pFrameBuffer)
-		frame = np.frombuffer(frame_data, dtype=np.uint8)
-		frame = frame.reshape((FrameHead.iHeight, FrameHead.iWidth, 1 if FrameHead.uiMediaType == mvsdk.CAMERA_MEDIA_TYPE_MONO8 else 3) )
+		# 缓冲上的零拷贝视图（每个缓冲和尺寸只构建一次，不再每帧创建ctypes数组类型）
+		frame = frame_view(pFrameBuffer, FrameHead)
 
 		frame = cv2.resize(frame, (640,480), interpolation = cv2.INTER_LINEAR)
 		cv2.imshow("Press q to end", frame)
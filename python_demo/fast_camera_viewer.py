@@ -12,6 +12,7 @@
 import cv2
 import numpy as np
 import mvsdk
+from frame_view import frame_view
 import platform
 import time
 from datetime import datetime
@@ -128,10 +129,8 @@ def main():
                     mvsdk.CameraFlipFrameBuffer(pFrameBuffer, FrameHead, 1)
                 
                 # 转换为numpy
-                frame_data = (mvsdk.c_ubyte * FrameHead.uBytes).from_address(pFrameBuffer)
-                frame = np.frombuffer(frame_data, dtype=np.uint8)
-                frame = frame.reshape((FrameHead.iHeight, FrameHead.iWidth, 
-                                      1 if FrameHead.uiMediaType == mvsdk.CAMERA_MEDIA_TYPE_MONO8 else 3))
+                # 缓冲上的零拷贝视图（每个缓冲和尺寸只构建一次，不再每帧创建ctypes数组类型）
+                frame = frame_view(pFrameBuffer, FrameHead)
 
                 # 计算FPS
                 fps_counter += 1
@@ -0,0 +1,49 @@
+#coding=utf-8
+"""
+SDK帧缓存的零拷贝NumPy视图
+每个 (缓冲地址, 宽, 高, 图像格式) 只构建一次ndarray视图，之后每帧直接复用，
+避免每帧重新创建ctypes数组类型 + np.frombuffer + reshape
+"""
+import ctypes
+import numpy as np
+
+
+class FrameViewCache(object):
+    """按 (缓冲地址, 宽, 高, 格式) 缓存的ndarray视图"""
+
+    def __init__(self):
+        self._views = {}
+
+    def get(self, pFrameBuffer, FrameHead):
+        """返回pFrameBuffer上与FrameHead尺寸一致的 (H, W) 或 (H, W, C) 视图"""
+        key = (pFrameBuffer, FrameHead.iWidth, FrameHead.iHeight, FrameHead.uiMediaType)
+        view = self._views.get(key)
+        if view is None:
+            view = self._views[key] = self._build(pFrameBuffer, FrameHead)
+        return view
+
+    def _build(self, pFrameBuffer, FrameHead):
+        width, height = FrameHead.iWidth, FrameHead.iHeight
+        channels = FrameHead.uBytes // (width * height)
+        nbytes = width * height * channels
+        data = (ctypes.c_ubyte * nbytes).from_address(pFrameBuffer)
+        view = np.ctypeslib.as_array(data)
+        if channels == 1:
+            return view.reshape((height, width))
+        return view.reshape((height, width, channels))
+
+    def forget(self, pFrameBuffer):
+        """缓冲被释放前调用，丢弃该地址上的所有视图"""
+        for key in [k for k in self._views if k[0] == pFrameBuffer]:
+            del self._views[key]
+
+    def clear(self):
+        self._views.clear()
+
+
+# 默认全局缓存，供单缓冲的简单脚本直接使用
+_default_cache = FrameViewCache()
+
+def frame_view(pFrameBuffer, FrameHead):
+    """pFrameBuffer的零拷贝ndarray视图（使用全局缓存）"""
+    return _default_cache.get(pFrameBuffer, FrameHead)
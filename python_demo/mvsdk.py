@@ -1,5 +1,7 @@
 #coding=utf-8
+import os
 import platform
+import sys
 from ctypes import *
 from threading import local
 
@@ -9,10 +11,30 @@ CALLBACK_FUNC_TYPE = None
 # SDK动态库
 _sdk = None
 
+def _sim_config():
+	"""模拟相机：环境变量 MVSDK_SIM/MVSDK_SIM_OPTS，或命令行 --sim=来源 --sim-opts=选项（从sys.argv中移除）"""
+	source = os.environ.get("MVSDK_SIM", "")
+	options = os.environ.get("MVSDK_SIM_OPTS", "")
+	for arg in list(sys.argv[1:]):
+		if arg.startswith("--sim="):
+			source = arg[len("--sim="):]
+			sys.argv.remove(arg)
+		elif arg.startswith("--sim-opts="):
+			options = arg[len("--sim-opts="):]
+			sys.argv.remove(arg)
+	return source, options
+
 def _Init():
 	global _sdk
 	global CALLBACK_FUNC_TYPE
 
+	sim_source, sim_options = _sim_config()
+	if sim_source:
+		import mvsdk_sim
+		_sdk = mvsdk_sim.SimSdk(sim_source, sim_options)
+		CALLBACK_FUNC_TYPE = CFUNCTYPE
+		return
+
 	is_win = (platform.system() == "Windows")
 	is_x86 = (platform.architecture()[0] == '32bit')
 
@@ -229,6 +251,11 @@ IOMODE_GP_INPUT = 2
 IOMODE_GP_OUTPUT = 3
 IOMODE_PWM_OUTPUT = 4
 
+# 取图优先级（CameraGetImageBufferPriority系列）
+CAMERA_GET_IMAGE_PRIORITY_OLDEST = 0	# 获取缓存中最旧的一帧
+CAMERA_GET_IMAGE_PRIORITY_NEWEST = 1	# 获取缓存中最新的一帧（比此帧旧的将全部丢弃）
+CAMERA_GET_IMAGE_PRIORITY_NEXT = 2		# 丢弃缓存中的所有帧，等待接收下一帧
+
 
 # 相机操作异常信息
 class CameraException(Exception):
@@ -0,0 +1,111 @@
+#coding=utf-8
+"""
+逐帧调用的低开销SDK绑定（取图/ISP/归还/翻转/帧号/时间戳）
+与mvsdk.py的区别：
+  - 函数指针和restype只在构造时绑定一次，不再每次 _sdk.Foo 属性查找、每次改restype
+  - 缓冲地址由调用方预先转换成 c_void_p（pointer()），输出结构体（帧头、指针、宽高、帧号、时间戳）
+    预先分配并复用，byref也只做一次，每帧调用不再分配ctypes对象
+  - 返回状态码，不写线程局部的last_error，超时也不抛CameraException
+argtypes 默认不绑定：实测ctypes按argtypes逐个from_param转换比直接传ctypes对象慢约一半
+（bench_sdk_binding.py），checked=True 时绑定完整原型用于调试
+绑定使用独立的函数指针（_sdk[name]），不影响mvsdk.py里同名函数的调用方式
+"""
+from ctypes import c_int, c_uint, c_uint32, c_void_p, byref, POINTER
+import mvsdk
+
+CAMERA_STATUS_SUCCESS = mvsdk.CAMERA_STATUS_SUCCESS
+CAMERA_STATUS_TIME_OUT = mvsdk.CAMERA_STATUS_TIME_OUT
+
+_PHEAD = POINTER(mvsdk.tSdkFrameHead)
+
+
+def _bind(name, argtypes, checked, restype=c_int):
+    fn = mvsdk._sdk[name]
+    if checked:
+        fn.argtypes = argtypes
+    fn.restype = restype
+    return fn
+
+
+def pointer(address):
+    """缓冲地址 -> c_void_p，每个缓冲转换一次后重复使用"""
+    return c_void_p(address)
+
+
+class FastCamera(object):
+    """
+    单个相机的逐帧调用，只在采集线程里使用（输出结构体不加锁）
+    帧头由调用方提供（每个缓冲槽位一个，见 new_head），缓冲参数都是 pointer() 转换后的 c_void_p，
+    取图得到的RAW缓冲在 raw（c_void_p，可以直接传给 process/release）
+    """
+
+    def __init__(self, hCamera, checked=False):
+        self.hCamera = hCamera
+        self._get = _bind('CameraGetImageBuffer', [c_int, _PHEAD, POINTER(c_void_p), c_uint], checked)
+        self._process = _bind('CameraImageProcess', [c_int, c_void_p, c_void_p, _PHEAD], checked)
+        self._release = _bind('CameraReleaseImageBuffer', [c_int, c_void_p], checked)
+        self._flip = _bind('CameraFlipFrameBuffer', [c_void_p, _PHEAD, c_int], checked)
+        self._frame_id = _bind('CameraGetFrameID', [c_int, POINTER(c_uint)], checked)
+        self._timestamp = _bind('CameraGetFrameTimeStamp', [c_int, POINTER(c_uint32), POINTER(c_uint32)], checked)
+        self._get_ex3 = _bind('CameraGetImageBufferPriorityEx3',
+                              [c_int, c_void_p, c_uint, POINTER(c_int), POINTER(c_int), POINTER(c_uint), c_uint, c_uint],
+                              checked)
+
+        # 复用的输出参数
+        self._raw = c_void_p()
+        self._raw_ref = byref(self._raw)
+        self._id = c_uint()
+        self._id_ref = byref(self._id)
+        self._ts_low = c_uint32()
+        self._ts_high = c_uint32()
+        self._ts_refs = (byref(self._ts_low), byref(self._ts_high))
+        self._width = c_int()
+        self._height = c_int()
+        self._stamp = c_uint()
+        self._ex3_refs = (byref(self._width), byref(self._height), byref(self._stamp))
+
+    @staticmethod
+    def new_head():
+        """新建一个帧头，返回 (帧头, 它的byref)，byref可以在每次调用时复用"""
+        head = mvsdk.tSdkFrameHead()
+        return head, byref(head)
+
+    @property
+    def raw(self):
+        """最近一次 get_buffer 成功时的RAW缓冲（c_void_p，下一次get_buffer时被覆盖）"""
+        return self._raw
+
+    def get_buffer(self, head_ref, timeout_ms):
+        """CameraGetImageBuffer，帧头写入head_ref指向的结构体，返回状态码"""
+        return self._get(self.hCamera, head_ref, self._raw_ref, timeout_ms)
+
+    def process(self, pRaw, pOut, head_ref):
+        return self._process(self.hCamera, pRaw, pOut, head_ref)
+
+    def release(self, pRaw):
+        return self._release(self.hCamera, pRaw)
+
+    def flip(self, pBuffer, head_ref, flags=1):
+        return self._flip(pBuffer, head_ref, flags)
+
+    def get_buffer_ex3(self, pOut, out_format, timeout_ms, priority):
+        """CameraGetImageBufferPriorityEx3，返回状态码，宽高时间戳见 ex3_result"""
+        w, h, t = self._ex3_refs
+        return self._get_ex3(self.hCamera, pOut, out_format, w, h, t, timeout_ms, priority)
+
+    @property
+    def ex3_result(self):
+        """(宽, 高, 时间戳0.1ms)"""
+        return self._width.value, self._height.value, self._stamp.value
+
+    def frame_id(self):
+        """最近一帧的帧号（失败时返回-1）"""
+        if self._frame_id(self.hCamera, self._id_ref) != CAMERA_STATUS_SUCCESS:
+            return -1
+        return self._id.value
+
+    def timestamp(self):
+        """CameraGetFrameTimeStamp 的64位时间戳（失败时返回-1）"""
+        if self._timestamp(self.hCamera, *self._ts_refs) != CAMERA_STATUS_SUCCESS:
+            return -1
+        return (self._ts_high.value << 32) | self._ts_low.value
@@ -0,0 +1,589 @@
+#coding=utf-8
+"""
+模拟相机后端：不需要 libMVSDK.so 和相机，就能运行 dart_detector.py / dart_detector_headless.py /
+green_led_tuner.py / python_demo 示例和 benchmarks 里的脚本
+启用方式（mvsdk.py 导入时检查）：
+  环境变量  MVSDK_SIM=<来源>   MVSDK_SIM_OPTS="fps=60,timeout_rate=0.01"
+  命令行    --sim=<来源>  --sim-opts=fps=60,error_rate=0.001
+来源：
+  视频文件         录制的视频（output/videos/*.mp4），按BayerGR8重新马赛克
+  图片目录         *.png / *.jpg / *.bmp，按文件名排序
+  RAW目录/.npy     (H, W) 或 (N, H, W) 的uint8 BayerGR8数组（bench_bayer_detect的RAW帧）
+  .raw/.bin 文件   连续存放的BayerGR8帧，需要 width= / height= 选项
+  synthetic        合成画面：底部绿灯 + 从上往下飞的红色飞镖头
+取图方式：轮询（CameraGetImageBuffer）、SDK回调（CameraSetCallbackFunction）、采集器帧监听（CameraGrabber_*）
+选项（逗号分隔）：
+  fps=60            出帧速率，0表示有请求就出帧（不限速）
+  loop=1            播放完后从头循环，0表示结束后一直超时
+  mirrored=1        视频/图片是镜像后的显示画面（检测程序录的视频），先翻回传感器方向
+  max_frames=300    最多预加载的帧数（按RAW存放，640x480每帧300KB）
+  timeout_rate=0    每次取图随机丢帧并超时的概率
+  error_rate=0      每次取图随机返回错误码的概率
+  error_code=-26    注入的错误码（默认 CAMERA_STATUS_LOST_DATA）
+  seed=0            随机数种子
+  width= height=    .raw 文件的帧尺寸
+  lamps=0           synthetic 画面中绿灯高度以上的静态红色背景灯数量
+实现方式：替换 mvsdk._sdk，按C接口的参数（byref/c_void_p/地址）实现用到的函数，
+其余函数直接返回成功，所以 mvsdk.py 和 mvsdk_fast.py 的封装都不需要改
+"""
+import ctypes
+import glob
+import os
+import random
+import threading
+import time
+import cv2
+import numpy as np
+import mvsdk  # 导入时mvsdk还没加载完，这里只在调用时访问其中的类型和常量
+
+SIM_HANDLE = 1
+SIM_GRABBER = 0x51
+_BAYER_TO_BGR = cv2.COLOR_BayerGB2BGR  # OpenCV的Bayer命名错开一行，BayerGR8对应BayerGB
+_OPTION_DEFAULTS = {
+    'fps': 60.0, 'loop': 1, 'mirrored': 1, 'max_frames': 300,
+    'timeout_rate': 0.0, 'error_rate': 0.0, 'error_code': -26, 'seed': 0,
+    'width': 0, 'height': 0, 'lamps': 0,
+}
+
+
+def parse_options(text):
+    """'fps=60,loop=0' -> dict（未给出的用默认值）"""
+    options = dict(_OPTION_DEFAULTS)
+    for item in filter(None, (s.strip() for s in (text or '').split(','))):
+        key, _, value = item.partition('=')
+        if key not in options:
+            raise ValueError(f"未知模拟相机选项: {key}，可选 {sorted(options)}")
+        options[key] = type(options[key])(float(value)) if isinstance(options[key], int) else float(value)
+    return options
+
+
+def mosaic_gr(bgr):
+    """BGR -> BayerGR8（第一行 G R，第二行 B G），宽高截成偶数"""
+    h, w = bgr.shape[0] & ~1, bgr.shape[1] & ~1
+    raw = np.empty((h, w), np.uint8)
+    raw[0::2, 0::2] = bgr[0:h:2, 0:w:2, 1]
+    raw[0::2, 1::2] = bgr[0:h:2, 1:w:2, 2]
+    raw[1::2, 0::2] = bgr[1:h:2, 0:w:2, 0]
+    raw[1::2, 1::2] = bgr[1:h:2, 1:w:2, 1]
+    return raw
+
+
+def synthetic_frames(count=240, width=640, height=480, lamps=0):
+    """合成的显示画面（镜像后）：绿灯固定在底部，红色飞镖头每隔一段时间从顶部飞到绿灯高度，可选静态红色背景灯"""
+    rng = np.random.default_rng(0)
+    background = rng.integers(0, 25, (height, width, 3), dtype=np.uint8)
+    led = (width // 2, height - 60)
+    for k in range(lamps):
+        # 背景灯沿画面两侧排列，避开飞镖飞行路线
+        x = 40 if k % 2 == 0 else width - 40
+        cv2.circle(background, (x, 60 + (k // 2) * 70 % (led[1] - 60)), 11, (40, 40, 240), -1)
+    period = max(count // 2, 1)
+    frames = []
+    for i in range(count):
+        bgr = background.copy()
+        cv2.circle(bgr, led, 28, (40, 220, 40), -1)
+        t = (i % period) / period
+        if t < 0.8:
+            k = t / 0.8
+            x = int(width * 0.2 + width * 0.35 * k)
+            y = int(20 + (led[1] - 20) * k * k)
+            cv2.circle(bgr, (x, y), 12, (30, 30, 230), -1)
+            cv2.circle(bgr, (x, y), 4, (200, 200, 255), -1)
+        frames.append(bgr)
+    return frames
+
+
+def load_raw_frames(source, options):
+    """加载来源，返回传感器方向的BayerGR8帧列表"""
+    limit = int(options['max_frames'])
+    mirrored = bool(options['mirrored'])
+
+    def from_bgr(bgr):
+        return mosaic_gr(cv2.flip(bgr, 1) if mirrored else bgr)
+
+    if source == 'synthetic':
+        return [from_bgr(f) for f in synthetic_frames(lamps=int(options['lamps']))][:limit]
+    if os.path.isdir(source):
+        npys = sorted(glob.glob(os.path.join(source, '*.npy')))
+        if npys:
+            return [np.ascontiguousarray(np.load(p), np.uint8) for p in npys[:limit]]
+        images = sorted(p for ext in ('*.png', '*.jpg', '*.jpeg', '*.bmp')
+                        for p in glob.glob(os.path.join(source, ext)))
+        return [from_bgr(cv2.imread(p, cv2.IMREAD_COLOR)) for p in images[:limit]]
+    if source.endswith('.npy'):
+        data = np.load(source)
+        data = data[None] if data.ndim == 2 else data
+        return [np.ascontiguousarray(f, np.uint8) for f in data[:limit]]
+    if source.endswith(('.raw', '.bin')):
+        w, h = int(options['width']), int(options['height'])
+        if w <= 0 or h <= 0:
+            raise ValueError("RAW文件需要 width= 和 height= 选项")
+        data = np.fromfile(source, np.uint8)
+        n = min(len(data) // (w * h), limit)
+        return [data[i * w * h:(i + 1) * w * h].reshape(h, w) for i in range(n)]
+    video = cv2.VideoCapture(source)
+    frames = []
+    while len(frames) < limit:
+        ok, bgr = video.read()
+        if not ok:
+            break
+        frames.append(from_bgr(bgr))
+    video.release()
+    return frames
+
+
+def _obj(arg):
+    """byref(x) -> x"""
+    return getattr(arg, '_obj', arg)
+
+
+def _addr(arg):
+    """int / c_void_p / byref / ctypes对象 -> 地址"""
+    if arg is None or isinstance(arg, int):
+        return arg or 0
+    if isinstance(arg, ctypes.c_void_p):
+        return arg.value or 0
+    return ctypes.addressof(_obj(arg))
+
+
+def _view(address, shape):
+    n = int(np.prod(shape))
+    return np.ctypeslib.as_array((ctypes.c_ubyte * n).from_address(address)).reshape(shape)
+
+
+class _SimFunction(object):
+    """可以设置 restype/argtypes 的可调用对象（与ctypes函数指针的用法一致）"""
+
+    def __init__(self, fn):
+        self.fn = fn
+        self.restype = None
+        self.argtypes = None
+
+    def __call__(self, *args):
+        return self.fn(*args)
+
+
+class SimSdk(object):
+    """模拟的 libMVSDK：按名字查找 Camera* 方法，未实现的函数返回 CAMERA_STATUS_SUCCESS"""
+
+    def __init__(self, source, options=''):
+        self.source = source
+        self.options = parse_options(options)
+        self.frames = load_raw_frames(source, self.options)
+        if not self.frames:
+            raise ValueError(f"模拟相机来源没有可用的帧: {source}")
+        self.sensor_height, self.sensor_width = self.frames[0].shape
+        self.fps = self.options['fps']
+        self._random = random.Random(int(self.options['seed']))
+        self._functions = {}
+        self._allocs = {}
+        self._lock = threading.Lock()
+
+        self._resolution = None   # tSdkImageResolution，第一次用到时创建（mvsdk此时已加载完）
+        self._capability = None
+        self.mirror = False
+        self.out_format = None
+        self.playing = False
+        self._t0 = 0.0
+        self._last_index = -1     # 最近一次交出去的帧序号
+        self._frame_id = 0
+        self._buffers = [None, None, None]  # 交给调用方的RAW缓冲（轮流使用，Release之前保持有效）
+        self._next_buffer = 0
+        # 帧统计（tSdkFrameStatistic / tSdkGrabberStat），来不及取走、被下一帧覆盖的帧计为丢帧
+        self.stat_capture = 0
+        self.stat_lost = 0
+        self.stat_error = 0
+        # 回调采集：SDK回调 或 采集器帧监听，由同一个推帧线程调用
+        self._callback = None         # (CAMERA_SNAP_PROC, context)
+        self._listener = None         # (pfnCameraGrabberFrameListener, context)
+        self._grabber_live = False
+        self._grabber_isp = None      # 采集器ISP输出缓冲
+        self._delivery_thread = None
+
+    # ---- 函数查找 ----
+    def __getattribute__(self, name):
+        # _sdk.CameraXxx 返回可以设置restype的包装（已实现的函数也一样）
+        if name.startswith('Camera'):
+            return self[name]
+        return object.__getattribute__(self, name)
+
+    def __getitem__(self, name):
+        fn = self._functions.get(name)
+        if fn is None:
+            impl = getattr(type(self), name, None)
+            fn = _SimFunction(impl.__get__(self) if impl is not None else self._not_simulated)
+            self._functions[name] = fn
+        return fn
+
+    def _not_simulated(self, *args):
+        return mvsdk.CAMERA_STATUS_SUCCESS
+
+    # ---- 设备 ----
+    def CameraEnumerateDevice(self, pCameraList, piNums):
+        info = pCameraList[0]
+        info.acProductSeries = b"SIM"
+        info.acProductName = b"MV-SIM"
+        info.acFriendlyName = b"Simulated Camera"
+        info.acSn = b"SIM0001"
+        _obj(piNums).value = 1
+        return mvsdk.CAMERA_STATUS_SUCCESS
+
+    def CameraInit(self, pCameraInfo, emParamLoadMode, emTeam, pCameraHandle):
+        _obj(pCameraHandle).value = SIM_HANDLE
+        return mvsdk.CAMERA_STATUS_SUCCESS
+
+    def CameraUnInit(self, hCamera):
+        self.playing = False
+        self._callback = None
+        self._grabber_live = False
+        self._stop_delivery()
+        return mvsdk.CAMERA_STATUS_SUCCESS
+
+    def CameraGetCapability(self, hCamera, pCameraInfo):
+        cap = _obj(pCameraInfo)
+        if self._capability is None:
+            presets = (mvsdk.tSdkImageResolution * 1)()
+            presets[0].iIndex = 0
+            presets[0].acDescription = b"Full"
+            presets[0].iWidthFOV = presets[0].iWidth = self.sensor_width
+            presets[0].iHeightFOV = presets[0].iHeight = self.sensor_height
+            self._capability = presets
+        cap.pImageSizeDesc = ctypes.cast(self._capability, ctypes.POINTER(mvsdk.tSdkImageResolution))
+        cap.iImageSizeDesc = 1
+        rng = cap.sResolutionRange
+        rng.iWidthMax, rng.iHeightMax = self.sensor_width, self.sensor_height
+        rng.iWidthMin, rng.iHeightMin = 16, 16
+        # 支持2x2的求均值BIN、求和BIN和SKIP
+        rng.uBinAverageModeMask = rng.uBinSumModeMask = rng.uSkipModeMask = 1
+        cap.sIspCapacity.bMonoSensor = 0
+        return mvsdk.CAMERA_STATUS_SUCCESS
+
+    def CameraGetErrorString(self, iStatusCode):
+        return f"simulated status {iStatusCode}".encode()
+
+    # ---- 分辨率 ----
+    def _current(self):
+        if self._resolution is None:
+            self._resolution = self._capability_preset()
+        return self._resolution
+
+    def _capability_preset(self):
+        res = mvsdk.tSdkImageResolution()
+        res.iWidthFOV = res.iWidth = self.sensor_width
+        res.iHeightFOV = res.iHeight = self.sensor_height
+        return res
+
+    def CameraGetImageResolution(self, hCamera, pImageResolution):
+        ctypes.memmove(ctypes.addressof(_obj(pImageResolution)), ctypes.addressof(self._current()),
+                       ctypes.sizeof(mvsdk.tSdkImageResolution))
+        return mvsdk.CAMERA_STATUS_SUCCESS
+
+    def CameraSetImageResolution(self, hCamera, pImageResolution):
+        res = _obj(pImageResolution)
+        if res.iIndex != 0xff:
+            res = self._capability_preset()
+        if not self._valid(res.iHOffsetFOV, res.iVOffsetFOV, res.iWidthFOV, res.iHeightFOV, res.iWidth, res.iHeight):
+            return mvsdk.CAMERA_STATUS_PARAMETER_INVALID
+        with self._lock:
+            self._resolution = res.clone()
+        return mvsdk.CAMERA_STATUS_SUCCESS
+
+    def CameraSetImageResolutionEx(self, hCamera, iIndex, Mode, ModeSize, x, y, width, height, ZoomWidth, ZoomHeight):
+        res = mvsdk.tSdkImageResolution()
+        res.iIndex = 0xff
+        res.iHOffsetFOV, res.iVOffsetFOV, res.iWidthFOV, res.iHeightFOV = x, y, width, height
+        res.iWidth = ZoomWidth or width
+        res.iHeight = ZoomHeight or height
+        return self.CameraSetImageResolution(hCamera, res)
+
+    def _valid(self, x, y, w, h, out_w, out_h):
+        return (w > 0 and h > 0 and out_w > 0 and out_h > 0 and x >= 0 and y >= 0
+                and x + w <= self.sensor_width and y + h <= self.sensor_height)
+
+    # ---- ISP设置 ----
+    def CameraSetMirror(self, hCamera, iDir, bEnable):
+        if iDir == 0:
+            self.mirror = bool(bEnable)
+        return mvsdk.CAMERA_STATUS_SUCCESS
+
+    def CameraSetIspOutFormat(self, hCamera, uFormat):
+        self.out_format = uFormat
+        return mvsdk.CAMERA_STATUS_SUCCESS
+
+    def CameraGetExposureTime(self, hCamera, pfExposureTime):
+        _obj(pfExposureTime).value = 1e6 / self.fps if self.fps > 0 else 1000.0
+        return mvsdk.CAMERA_STATUS_SUCCESS
+
+    # ---- 采集 ----
+    def CameraPlay(self, hCamera):
+        if not self.playing:
+            self.playing = True
+            self._t0 = time.perf_counter() - (self._last_index + 1) / self.fps if self.fps > 0 else 0.0
+        return mvsdk.CAMERA_STATUS_SUCCESS
+
+    def CameraPause(self, hCamera):
+        self.playing = False
+        return mvsdk.CAMERA_STATUS_SUCCESS
+
+    def CameraStop(self, hCamera):
+        return self.CameraPause(hCamera)
+
+    def CameraClearBuffer(self, hCamera):
+        if self.fps > 0 and self.playing:
+            self._last_index = max(self._last_index, int((time.perf_counter() - self._t0) * self.fps) - 1)
+        return mvsdk.CAMERA_STATUS_SUCCESS
+
+    def _wait_frame(self, timeout_ms):
+        """等到下一帧，返回 (状态码, 帧序号)"""
+        timeout = timeout_ms / 1000.0
+        if not self.playing:
+            time.sleep(timeout)
+            return mvsdk.CAMERA_STATUS_TIME_OUT, -1
+        if self.fps > 0:
+            now = time.perf_counter()
+            index = int((now - self._t0) * self.fps)
+            if index <= self._last_index:
+                index = self._last_index + 1
+                wait = self._t0 + index / self.fps - now
+                if wait > timeout:
+                    time.sleep(timeout)
+                    return mvsdk.CAMERA_STATUS_TIME_OUT, -1
+                time.sleep(max(wait, 0.0))
+        else:
+            index = self._last_index + 1
+        if not self.options['loop'] and index >= len(self.frames):
+            time.sleep(timeout)
+            return mvsdk.CAMERA_STATUS_TIME_OUT, -1
+        self.stat_lost += max(index - self._last_index - 1, 0)
+        self._last_index = index
+
+        # 注入丢帧超时和错误
+        if self._random.random() < self.options['timeout_rate']:
+            self.stat_lost += 1
+            time.sleep(timeout)
+            return mvsdk.CAMERA_STATUS_TIME_OUT, -1
+        if self._random.random() < self.options['error_rate']:
+            self.stat_error += 1
+            return int(self.options['error_code']), -1
+        self.stat_capture += 1
+        return mvsdk.CAMERA_STATUS_SUCCESS, index
+
+    def _sensor_frame(self, index):
+        """按当前分辨率（视场裁剪 + BIN/SKIP）输出RAW帧，写入轮流使用的缓冲"""
+        full = self.frames[index % len(self.frames)]
+        with self._lock:
+            res = self._current()
+            x, y = res.iHOffsetFOV & ~1, res.iVOffsetFOV & ~1
+            w, h = res.iWidthFOV & ~1, res.iHeightFOV & ~1
+            out_w, out_h = res.iWidth & ~1, res.iHeight & ~1
+        raw = full[y:y + h, x:x + w]
+        if (out_w, out_h) != (w, h):
+            bgr = cv2.resize(cv2.cvtColor(np.ascontiguousarray(raw), _BAYER_TO_BGR), (out_w, out_h),
+                             interpolation=cv2.INTER_AREA)
+            raw = mosaic_gr(bgr)
+        slot = self._next_buffer
+        self._next_buffer = (slot + 1) % len(self._buffers)
+        buf = self._buffers[slot]
+        if buf is None or buf.shape != raw.shape:
+            buf = self._buffers[slot] = np.empty(raw.shape, np.uint8)
+        np.copyto(buf, raw)
+        return buf
+
+    def _fill_head(self, head, raw, index):
+        ctypes.memset(ctypes.addressof(head), 0, ctypes.sizeof(head))
+        head.uiMediaType = mvsdk.CAMERA_MEDIA_TYPE_BAYGR8
+        head.iHeight, head.iWidth = raw.shape
+        head.uBytes = raw.size
+        if self.fps > 0:
+            stamp = index / self.fps
+        else:
+            stamp = time.perf_counter()
+        head.uiTimeStamp = int(stamp * 1e4) & 0xffffffff
+        head.uiExpTime = int(1e6 / self.fps) if self.fps > 0 else 1000
+        head.fAnalogGain = 1.0
+        head.fRgain = head.fGgain = head.fBgain = 1.0
+        self._frame_id = index
+
+    def CameraGetImageBuffer(self, hCamera, pFrameInfo, pbyBuffer, wTimes):
+        status, index = self._wait_frame(wTimes)
+        if status != mvsdk.CAMERA_STATUS_SUCCESS:
+            return status
+        raw = self._sensor_frame(index)
+        self._fill_head(_obj(pFrameInfo), raw, index)
+        _obj(pbyBuffer).value = raw.ctypes.data
+        return mvsdk.CAMERA_STATUS_SUCCESS
+
+    def CameraReleaseImageBuffer(self, hCamera, pbyBuffer):
+        return mvsdk.CAMERA_STATUS_SUCCESS
+
+    def CameraImageProcess(self, hCamera, pbyIn, pbyOut, pFrInfo):
+        head = _obj(pFrInfo)
+        w, h = head.iWidth, head.iHeight
+        raw = _view(_addr(pbyIn), (h, w))
+        out_format = self.out_format or mvsdk.CAMERA_MEDIA_TYPE_BGR8
+        if out_format == mvsdk.CAMERA_MEDIA_TYPE_MONO8:
+            out = _view(_addr(pbyOut), (h, w))
+            cv2.cvtColor(cv2.cvtColor(raw, _BAYER_TO_BGR), cv2.COLOR_BGR2GRAY, dst=out)
+            channels = 1
+        else:
+            out = _view(_addr(pbyOut), (h, w, 3))
+            bgr = cv2.cvtColor(raw, _BAYER_TO_BGR)
+            if out_format == mvsdk.CAMERA_MEDIA_TYPE_RGB8:
+                cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB, dst=bgr)
+            np.copyto(out, bgr)
+            channels = 3
+        if self.mirror:
+            out[...] = out[:, ::-1].copy()
+        head.uiMediaType = out_format
+        head.uBytes = w * h * channels
+        return mvsdk.CAMERA_STATUS_SUCCESS
+
+    def CameraGetImageBufferPriorityEx3(self, hCamera, pImageData, uOutFormat, piWidth, piHeight, puTimeStamp,
+                                        wTimes, Priority):
+        head = mvsdk.tSdkFrameHead()
+        pRaw = ctypes.c_void_p()
+        status = self.CameraGetImageBuffer(hCamera, head, pRaw, wTimes)
+        if status != mvsdk.CAMERA_STATUS_SUCCESS:
+            return status
+        saved, self.out_format = self.out_format, uOutFormat
+        self.CameraImageProcess(hCamera, pRaw, pImageData, head)
+        self.out_format = saved
+        _obj(piWidth).value = head.iWidth
+        _obj(piHeight).value = head.iHeight
+        _obj(puTimeStamp).value = head.uiTimeStamp
+        return mvsdk.CAMERA_STATUS_SUCCESS
+
+    def CameraFlipFrameBuffer(self, pFrameBuffer, pFrameHead, Flags):
+        head = _obj(pFrameHead)
+        channels = max(head.uBytes // max(head.iWidth * head.iHeight, 1), 1)
+        shape = (head.iHeight, head.iWidth, channels)
+        view = _view(_addr(pFrameBuffer), shape)
+        view[...] = view[::-1].copy() if Flags == 1 else view[:, ::-1].copy()
+        return mvsdk.CAMERA_STATUS_SUCCESS
+
+    def CameraGetFrameID(self, hCamera, pFrameID):
+        _obj(pFrameID).value = self._frame_id
+        return mvsdk.CAMERA_STATUS_SUCCESS
+
+    def CameraGetFrameTimeStamp(self, hCamera, pTimeStampL, pTimeStampH):
+        stamp = int(self._frame_id / self.fps * 1e6) if self.fps > 0 else int(time.perf_counter() * 1e6)
+        _obj(pTimeStampL).value = stamp & 0xffffffff
+        _obj(pTimeStampH).value = stamp >> 32
+        return mvsdk.CAMERA_STATUS_SUCCESS
+
+    def CameraGetFrameStatistic(self, hCamera, psFrameStatistic):
+        stat = _obj(psFrameStatistic)
+        stat.iTotal = self.stat_capture + self.stat_error
+        stat.iCapture = self.stat_capture
+        stat.iLost = self.stat_lost
+        return mvsdk.CAMERA_STATUS_SUCCESS
+
+    # ---- 回调采集 ----
+    def CameraSetCallbackFunction(self, hCamera, pCallBack, pContext, pCallbackOld):
+        if pCallBack:
+            self._callback = (pCallBack, _addr(pContext))
+            self._start_delivery(hCamera)
+        else:
+            self._callback = None
+            self._stop_delivery()
+        return mvsdk.CAMERA_STATUS_SUCCESS
+
+    def _delivering(self):
+        return self._callback is not None or (self._grabber_live and self._listener is not None)
+
+    def _start_delivery(self, hCamera):
+        if self._delivery_thread is None:
+            self._delivery_thread = threading.Thread(target=self._delivery_loop, args=(hCamera,), name="SimDelivery")
+            self._delivery_thread.daemon = True
+            self._delivery_thread.start()
+
+    def _stop_delivery(self):
+        thread = self._delivery_thread
+        if thread is not None and not self._delivering() and thread is not threading.current_thread():
+            thread.join()
+            self._delivery_thread = None
+
+    def _delivery_loop(self, hCamera):
+        """推帧线程：取图后调用SDK回调或采集器帧监听（与真实SDK一样在SDK自己的线程里）"""
+        head = mvsdk.tSdkFrameHead()
+        pRaw = ctypes.c_void_p()
+        while self._delivering():
+            status = self.CameraGetImageBuffer(hCamera, head, pRaw, 200)
+            if status != mvsdk.CAMERA_STATUS_SUCCESS:
+                continue
+            callback, listener = self._callback, self._listener
+            if self._grabber_live and listener is not None:
+                self._grabber_frame(hCamera, listener, head, pRaw)
+            elif callback is not None:
+                fn, context = callback
+                fn(hCamera, pRaw.value, ctypes.pointer(head), context)
+
+    # ---- 采集器 CameraGrabber ----
+    def CameraGrabber_Create(self, Grabber, pDevInfo):
+        _obj(Grabber).value = SIM_GRABBER
+        return mvsdk.CAMERA_STATUS_SUCCESS
+
+    def CameraGrabber_CreateByIndex(self, Grabber, Index):
+        return self.CameraGrabber_Create(Grabber, None)
+
+    def CameraGrabber_Destroy(self, Grabber):
+        self.CameraGrabber_StopLive(Grabber)
+        return self.CameraUnInit(SIM_HANDLE)
+
+    def CameraGrabber_GetCameraHandle(self, Grabber, hCamera):
+        _obj(hCamera).value = SIM_HANDLE
+        return mvsdk.CAMERA_STATUS_SUCCESS
+
+    def CameraGrabber_SetFrameListener(self, Grabber, Listener, Context):
+        self._listener = (Listener, _addr(Context)) if Listener else None
+        if not Listener:
+            self._stop_delivery()
+        return mvsdk.CAMERA_STATUS_SUCCESS
+
+    def CameraGrabber_StartLive(self, Grabber):
+        self.CameraPlay(SIM_HANDLE)
+        self._grabber_live = True
+        self._start_delivery(SIM_HANDLE)
+        return mvsdk.CAMERA_STATUS_SUCCESS
+
+    def CameraGrabber_StopLive(self, Grabber):
+        self._grabber_live = False
+        self._stop_delivery()
+        return mvsdk.CAMERA_STATUS_SUCCESS
+
+    def CameraGrabber_GetStat(self, Grabber, stat):
+        stat = _obj(stat)
+        res = self._current()
+        stat.Width, stat.Height = res.iWidth, res.iHeight
+        stat.Disp = 0
+        stat.Capture = self.stat_capture
+        stat.Lost = self.stat_lost
+        stat.Error = self.stat_error
+        stat.CapFps = self.fps
+        stat.DispFps = 0.0
+        return mvsdk.CAMERA_STATUS_SUCCESS
+
+    def _grabber_frame(self, hCamera, listener, head, pRaw):
+        """采集器的一帧：Phase 0 RAW -> ISP -> Phase 1 -> Phase 2（显示前），监听返回0时到此为止"""
+        fn, context = listener
+        if not fn(SIM_GRABBER, 0, pRaw.value, ctypes.pointer(head), context):
+            return
+        size = head.iWidth * head.iHeight * 3
+        if self._grabber_isp is None or self._grabber_isp.size < size:
+            self._grabber_isp = np.empty(size, np.uint8)
+        out = self._grabber_isp.ctypes.data
+        self.CameraImageProcess(hCamera, pRaw, out, head)
+        if fn(SIM_GRABBER, 1, out, ctypes.pointer(head), context):
+            fn(SIM_GRABBER, 2, out, ctypes.pointer(head), context)
+
+    # ---- 内存 ----
+    def CameraAlignMalloc(self, size, align):
+        buf = ctypes.create_string_buffer(size + align)
+        address = ctypes.addressof(buf)
+        address += (-address) % align
+        self._allocs[address] = buf
+        return address
+
+    def CameraAlignFree(self, membuffer):
+        self._allocs.pop(_addr(membuffer), None)
+        return mvsdk.CAMERA_STATUS_SUCCESS
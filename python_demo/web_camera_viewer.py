@@ -7,6 +7,7 @@
 import cv2
 import numpy as np
 import mvsdk
+from frame_view import frame_view
 import platform
 import time
 from datetime import datetime
@@ -120,11 +121,8 @@ class CameraHandler:
                 if platform.system() == "Windows":
                     mvsdk.CameraFlipFrameBuffer(self.pFrameBuffer, FrameHead, 1)
                 
-                # 转换为numpy数组
-                frame_data = (mvsdk.c_ubyte * FrameHead.uBytes).from_address(self.pFrameBuffer)
-                frame = np.frombuffer(frame_data, dtype=np.uint8)
-                frame = frame.reshape((FrameHead.iHeight, FrameHead.iWidth, 
-                                      1 if FrameHead.uiMediaType == mvsdk.CAMERA_MEDIA_TYPE_MONO8 else 3))
+                # 转换为numpy数组：缓冲上的零拷贝视图（每个缓冲和尺寸只构建一次，不再每帧创建ctypes数组类型）
+                frame = frame_view(self.pFrameBuffer, FrameHead)
                 
                 # 检查图像是否全黑
                 if self.fps_counter == 1:  # 只在第一帧打印
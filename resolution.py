@@ -0,0 +1,122 @@
+#coding=utf-8
+"""
+检测分辨率调节：等待飞镖（没有追踪目标）时在粗分辨率（默认1/4）上检测，追踪开始后换到原来的1/2
+（或预测窗口内直接用全分辨率），轨迹结束后回到粗分辨率
+  - 空闲时检测只需要发现进入画面的飞镖、核对绿灯，飞镖头（面积下限300）和绿灯在1/4图上仍有二十个以上像素；
+    颜色分类、形态学、连通域处理的像素只有1/2时的1/4
+  - 追踪中的分辨率与原来相同（track_scale=2），飞行中的中心仍由亚像素细化在全分辨率上求；
+    track_scale=1 时预测窗口内用全分辨率（窗口只有128x128左右，像素数与1/2全幅相当），窗口为全幅的帧仍用1/2
+  - 形态学的3x3核是检测图像素，粗分辨率下开运算相当于显示坐标12x12，会把飞镖头的红色圆环整个去掉，
+    所以粗分辨率帧只做闭运算（小噪点由面积下限去掉）
+  - 缩小倍数 scale 始终是检测图一个像素对应的显示像素数，BlobExtractor、绿灯跟踪、背景灯光模型都按它换算，
+    切换分辨率不影响任何坐标
+输出图像已经缩小（BIN/SKIP）时检测图不会比输出图更细；raw模式的检测图由Bayer 2x2块（再缩小）得到，
+全分辨率窗口只对窗口内的RAW小块去马赛克
+"""
+import cv2
+from workspace import DetectionWorkspace
+from search_window import detect_rect
+
+
+class ResolutionGovernor(object):
+    """
+    select() 每帧检测前调用，按是否在追踪选择本帧的缩小倍数（返回值即 scale_factor），
+    prepare() 按本帧的缩小倍数由采集图生成检测图（只处理矩形范围内的像素）
+    统计：idle_frames 空闲（粗分辨率）帧、track_frames 追踪帧、roi_frames 其中全分辨率窗口帧、switches 切换次数
+    """
+
+    def __init__(self, out_scale=1, bayer_half=None, idle_scale=4, track_scale=2, workspace=None):
+        self.out_scale = out_scale          # 视场 / 传感器输出（BIN/SKIP缩小输出时大于1）
+        self.bayer_half = bayer_half        # raw模式的Bayer 2x2块转换（None为BGR输出图）
+        self.workspace = workspace if workspace is not None else DetectionWorkspace()   # 缩小图的缓冲
+        # 原来固定的检测缩小倍数：BGR图缩小1/2，BIN/SKIP输出直接用，raw为2x2块
+        self.base_scale = 2 * out_scale if bayer_half is not None else max(2, out_scale)
+        self.idle_scale = self._round(idle_scale)
+        self.track_scale = self._round(track_scale)
+        # 追踪中预测窗口内用全分辨率（输出图本身）；BIN/SKIP输出时输出图就是1/2，不会更细
+        self.roi_full = track_scale == 1 and out_scale < self.base_scale
+        self.scale = self.idle_scale
+        # 统计
+        self.idle_frames = 0
+        self.track_frames = 0
+        self.roi_frames = 0
+        self.switches = 0
+
+    def _round(self, scale):
+        """缩小倍数取 base_scale 的整数倍（raw模式每个检测像素必须是整数个2x2块），不足 base_scale 时取 base_scale"""
+        return max(1, int(scale) // self.base_scale) * self.base_scale
+
+    def select(self, tracking, window=False):
+        """tracking: 本帧是否在追踪飞镖，window: 本帧是否只检测预测窗口；返回本帧的缩小倍数"""
+        if not tracking:
+            scale = self.idle_scale
+            self.idle_frames += 1
+        elif window and self.roi_full:
+            scale = self.out_scale
+            self.track_frames += 1
+            self.roi_frames += 1
+        else:
+            scale = self.track_scale
+            self.track_frames += 1
+        if scale != self.scale:
+            self.switches += 1
+            self.scale = scale
+        return scale
+
+    def morph_ops(self, ops):
+        """本帧的形态学操作：不比原来粗时不变，粗分辨率时去掉开运算"""
+        if self.scale <= self.base_scale:
+            return ops
+        return tuple(op for op in ops if op != cv2.MORPH_OPEN)
+
+    def size(self, image):
+        """本帧缩小倍数下整幅检测图的尺寸 (宽, 高)，image 为传感器输出图（BGR或RAW）"""
+        r = self.scale // self.out_scale
+        return image.shape[1] // r, image.shape[0] // r
+
+    def prepare(self, image, rect=None, offset=(0, 0), FrameHead=None):
+        """
+        image: 传感器输出图（BGR，raw模式为镜像之前的RAW Bayer图），rect: 只检测的显示坐标矩形（None为全幅），
+        offset: 输出图左上角的显示坐标；返回 (检测图, 检测图左上角的显示坐标, 检测图坐标的窗口或None)
+        """
+        r = self.scale // self.out_scale
+        width, height = image.shape[1] // r, image.shape[0] // r
+        window = detect_rect(rect, self.scale, offset, width, height)
+        x0, y0, x1, y1 = window if window is not None else (0, 0, width, height)
+        if self.bayer_half is not None and r == 1:
+            # RAW小块去马赛克：Bayer排列按2x2块对齐
+            x0, y0 = x0 & ~1, y0 & ~1
+            x1, y1 = min(width, (x1 + 1) & ~1), min(height, (y1 + 1) & ~1)
+            if window is not None:
+                window = (x0, y0, x1, y1)
+        detect_frame = self._frame(image, r, x0, y0, x1, y1, FrameHead)
+        ox, oy = offset
+        return detect_frame, (ox + x0 * self.scale, oy + y0 * self.scale), window
+
+    def _frame(self, image, r, x0, y0, x1, y1, FrameHead):
+        """检测图坐标的矩形 -> 检测图（r 为一个检测像素对应的输出图像素数），只转换/缩小矩形内的像素"""
+        if self.bayer_half is not None:
+            if self.bayer_half.mirror:
+                # RAW图是镜像之前的，列坐标要翻转回去
+                w = image.shape[1]
+                raw = image[r * y0:r * y1, w - r * x1:w - r * x0]
+            else:
+                raw = image[r * y0:r * y1, r * x0:r * x1]
+            if r == 1:
+                return self.bayer_half.demosaic(raw, FrameHead)
+            detect_frame = self.bayer_half.convert(raw, FrameHead)
+            if r == 2:
+                return detect_frame
+        elif r == 1:
+            return image[y0:y1, x0:x1]
+        else:
+            detect_frame = image[r * y0:r * y1, r * x0:r * x1]
+        return cv2.resize(detect_frame, (x1 - x0, y1 - y0), interpolation=cv2.INTER_LINEAR,
+                          dst=self.workspace.buffer('detect', (y1 - y0, x1 - x0, 3)))
+
+    def summary(self):
+        """统计字符串（打印用）"""
+        frames = self.idle_frames + self.track_frames
+        idle = self.idle_frames / frames if frames else 0.0
+        return (f"空闲 1/{self.idle_scale} {self.idle_frames} 帧（{idle:.0%}），追踪 1/{self.track_scale} "
+                f"{self.track_frames} 帧（其中全分辨率窗口 {self.roi_frames}），切换 {self.switches} 次")
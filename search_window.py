@@ -0,0 +1,228 @@
+#coding=utf-8
+"""
+检测的软件处理范围（不改相机设置，与 tracking_roi.py 的传感器ROI可以同时使用）
+  SearchWindow - 预测窗口：飞镖开始追踪后，红色检测只在预测位置附近的小窗口里做（颜色分类、形态学、连通域都只处理窗口），
+                 窗口内没找到时按 grow 倍放大窗口，连续 max_misses 帧没找到后退回全幅扫描，全幅重新找到后再回到窗口
+  Corridor     - 飞行走廊：检测只处理起始区域到落点参考线之间的矩形（四周加 margin），走廊外的灯光不参与检测；
+                 矩形内入口横向范围收窄到绿灯两侧的梯形只用来给候选排序（梯形内的排前面），不丢候选
+矩形都是 (x, y, w, h)，以全幅显示画面为坐标系
+"""
+import numpy as np
+
+
+def _align_down(v, align):
+    return (v // align) * align
+
+
+def detect_rect(rect, scale, offset, width, height):
+    """
+    显示坐标的矩形换算到检测图坐标 (x0, y0, x1, y1)：scale为检测图缩小倍数，offset为检测图左上角的显示坐标，
+    width/height为检测图尺寸；矩形为None或不在检测图内时返回None（本帧全幅）
+    """
+    if rect is None:
+        return None
+    x, y, w, h = rect
+    ox, oy = offset
+    x0 = max(0, (x - ox) // scale)
+    y0 = max(0, (y - oy) // scale)
+    x1 = min(width, -(-(x + w - ox) // scale))
+    y1 = min(height, -(-(y + h - oy) // scale))
+    if x1 <= x0 or y1 <= y0:
+        return None
+    return x0, y0, x1, y1
+
+
+class SearchWindow(object):
+    """
+    begin() 每帧检测前调用，返回本帧的搜索窗口（None表示全幅）；检测后调用 hit()/miss()，轨迹结束调用 reset()
+    统计：frames 窗口帧数、hits 窗口内命中、grows 放大次数、resets 退回全幅次数、coverage 窗口平均占全幅的比例
+    """
+
+    def __init__(self, full_width, full_height, width=128, height=128, grow=1.5, max_misses=3,
+                 min_points=2, align=8):
+        self.full_width = full_width
+        self.full_height = full_height
+        self.width = width
+        self.height = height
+        self.grow = grow
+        self.max_misses = max_misses
+        self.min_points = min_points
+        self.align = align
+        self.rect = None       # 本帧的搜索窗口，None表示全幅
+        self.misses = 0        # 窗口内连续没找到的帧数
+        self.lost = False      # 连续丢失后退回全幅，全幅重新找到前不再开窗口
+        # 统计
+        self.frames = 0
+        self.hits = 0
+        self.grows = 0
+        self.resets = 0
+        self._area_sum = 0.0
+
+    @property
+    def active(self):
+        return self.rect is not None
+
+    @property
+    def coverage(self):
+        """窗口帧的平均面积 / 全幅面积"""
+        return self._area_sum / self.frames if self.frames else 0.0
+
+    @staticmethod
+    def predict(points, t):
+        """
+        用最近三个轨迹点 (t, x, y) 按硬件时间做匀加速外推（两个点时匀速），预测时刻t的位置
+        """
+        t2, x2, y2 = points[-1]
+        if len(points) < 2:
+            return float(x2), float(y2)
+        t1, x1, y1 = points[-2]
+        dt = t - t2
+        span = t2 - t1
+        if span <= 0:
+            return float(x2), float(y2)
+        vx, vy = (x2 - x1) / span, (y2 - y1) / span
+        ax = ay = 0.0
+        if len(points) >= 3:
+            t0, x0, y0 = points[-3]
+            span0 = t1 - t0
+            if span0 > 0:
+                # 相邻两段的平均速度之差 / 两段中点的时间差
+                ax = (vx - (x1 - x0) / span0) * 2.0 / (span + span0)
+                ay = (vy - (y1 - y0) / span0) * 2.0 / (span + span0)
+                # 末点速度：平均速度加半段的加速度
+                vx += ax * span / 2.0
+                vy += ay * span / 2.0
+        return x2 + vx * dt + ax * dt * dt / 2.0, y2 + vy * dt + ay * dt * dt / 2.0
+
+    def begin(self, points, t):
+        """本帧检测前调用：points为当前轨迹，t为本帧硬件时间戳，返回搜索窗口（None表示全幅）"""
+        if self.lost or len(points) < self.min_points:
+            self.rect = None
+            return None
+        x, y = self.predict(points, t)
+        k = self.grow ** self.misses
+        w = min(_align_down(int(self.width * k), self.align), self.full_width)
+        h = min(_align_down(int(self.height * k), self.align), self.full_height)
+        rx = max(0, min(int(x - w / 2), self.full_width - w))
+        ry = max(0, min(int(y - h / 2), self.full_height - h))
+        self.rect = (_align_down(rx, self.align), _align_down(ry, self.align), w, h)
+        self.frames += 1
+        self._area_sum += w * h / float(self.full_width * self.full_height)
+        return self.rect
+
+    def hit(self):
+        """找到飞镖（窗口内或全幅）：清零丢失计数，全幅重新找到后恢复窗口搜索"""
+        if self.rect is not None:
+            self.hits += 1
+        self.misses = 0
+        self.lost = False
+
+    def miss(self):
+        """窗口内没找到：下一帧放大窗口，连续max_misses帧后退回全幅"""
+        if self.rect is None:
+            return
+        self.misses += 1
+        if self.misses >= self.max_misses:
+            self.lost = True
+            self.misses = 0
+            self.resets += 1
+        else:
+            self.grows += 1
+
+    def reset(self):
+        """轨迹结束（或清空）：回到全幅，统计保留"""
+        self.rect = None
+        self.misses = 0
+        self.lost = False
+
+    def detect_rect(self, scale, offset, width, height):
+        """当前窗口换算到检测图坐标 (x0, y0, x1, y1)，见 detect_rect()"""
+        return detect_rect(self.rect, scale, offset, width, height)
+
+    def summary(self):
+        """统计字符串（打印用）"""
+        hit_rate = self.hits / self.frames if self.frames else 0.0
+        return (f"窗口帧 {self.frames}，命中 {self.hits}（{hit_rate:.0%}），放大 {self.grows}，"
+                f"退回全幅 {self.resets}，平均窗口 {self.coverage:.1%} 全幅")
+
+
+class Corridor(object):
+    """
+    飞行走廊：update() 传入起始区域 (x1, y1, x2, y2) 和落点参考点（绿灯中心 (x, y)），只有两者变化时才重新计算
+    rect 为起始区域和参考线之间的范围四周加 margin（按 align 对齐，检测只处理这个矩形），没有参考点（还没找到绿灯）时
+    为None（全幅）；梯形为起始区域顶边上的横向范围 entry_span（全幅宽度的比例 (左, 右)，默认整个顶边）收窄到参考点 x
+    两侧各 margin，参考线以下 margin 行内保持这个宽度：rank() 把中心在梯形内的候选排到前面，梯形外的候选保留
+    （从画面边上进来、落在绿灯旁边较远处的飞镖照样是候选，漏检要由落点判断报告，不能在这里丢掉）
+    """
+
+    def __init__(self, full_width, full_height, margin=40, align=16, entry_span=(0.0, 1.0)):
+        self.full_width = full_width
+        self.full_height = full_height
+        self.margin = margin
+        self.align = align
+        self.entry_span = tuple(entry_span)
+        self.rect = None
+        self.polygon = None     # 梯形顶点（int32 (4, 2)，画图用），None为没有梯形
+        self.compiles = 0       # 重新计算次数
+        self.outside = 0        # 梯形外（排到后面）的候选数
+        self._key = None
+        self._edges = None      # (顶边y, 参考线y, 顶边左右x, 参考线左右x)
+
+    @property
+    def coverage(self):
+        """走廊面积 / 全幅面积"""
+        if self.rect is None:
+            return 1.0
+        return self.rect[2] * self.rect[3] / float(self.full_width * self.full_height)
+
+    def update(self, start_zone, landing):
+        """起始区域或参考点变化时重新计算走廊，返回矩形是否变化"""
+        key = (start_zone, landing)
+        if key == self._key:
+            return False
+        self._key = key
+        rect = None
+        self.polygon = self._edges = None
+        if start_zone is not None and landing is not None:
+            x1, y1, x2, y2 = start_zone
+            lx, ly = landing
+            m, a = self.margin, self.align
+            left = max(0, _align_down(min(x1, x2) - m, a))
+            top = max(0, _align_down(min(y1, y2, ly) - m, a))
+            right = min(self.full_width, -(-(max(x1, x2) + m) // a) * a)
+            bottom = min(self.full_height, -(-(max(y2, ly) + m) // a) * a)
+            rect = (left, top, right - left, bottom - top)
+            if rect == (0, 0, self.full_width, self.full_height):
+                rect = None
+            entry_top = min(y1, y2)
+            if ly > entry_top:
+                entry = (self.full_width * self.entry_span[0], self.full_width * self.entry_span[1])
+                bottom_span = (lx - m, lx + m)
+                self._edges = (entry_top, ly, entry, bottom_span)
+                self.polygon = np.array([[entry[0], entry_top], [entry[1], entry_top], [bottom_span[1], ly + m],
+                                         [bottom_span[0], ly + m]], np.int32)
+        changed = rect != self.rect
+        self.rect = rect
+        self.compiles += 1
+        return changed
+
+    def contains(self, blobs):
+        """候选数组（BLOB_DTYPE）中心是否在梯形内，返回布尔数组；没有梯形时全为True"""
+        if self._edges is None:
+            return np.ones(len(blobs), bool)
+        top, ly, (e0, e1), (b0, b1) = self._edges
+        k = np.clip((blobs['cy'] - top) / float(ly - top), 0.0, 1.0)
+        cx = blobs['cx']
+        return (cx >= e0 + (b0 - e0) * k) & (cx <= e1 + (b1 - e1) * k) & (blobs['cy'] <= ly + self.margin)
+
+    def rank(self, blobs):
+        """梯形内的候选排到前面（各自保持原来按面积的顺序），梯形外的排在后面（计入 outside），不丢候选"""
+        inside = self.contains(blobs)
+        if inside.all():
+            return blobs
+        self.outside += len(blobs) - int(np.count_nonzero(inside))
+        return blobs[np.argsort(~inside, kind='stable')]
+
+    def reset(self):
+        """清空（按c键）后下一次update重新计算"""
+        self._key = None
@@ -0,0 +1,199 @@
+#coding=utf-8
+"""
+传感器输出模式规划：用传感器BIN/SKIP直接输出检测分辨率，代替每帧cv2.resize
+  显示坐标系 - 固定为采集视场（默认640x480），叠加显示、起始区域、落点都用这个坐标系
+  输出图像   - 传感器BIN/SKIP后的实际图像，显示坐标 = 输出坐标 * scale
+候选模式来自相机能力：预设分辨率（cap.pImageSizeDesc）里用到的BIN/SKIP，以及
+sResolutionRange 中的 uBinAverageModeMask / uSkipModeMask / uBinSumModeMask
+直接运行本文件会逐个测量每种模式的帧率和CPU占用（需要相机）：
+  python3 sensor_mode.py [曝光us] [每种模式的帧数]
+"""
+import sys
+sys.path.append('python_demo')
+import mvsdk
+import cv2
+import time
+from frame_view import FrameViewCache
+
+# 自动选择时的优先顺序：求均值BIN画质最好；SKIP有混叠；求和BIN会让灯光过曝
+MODE_KINDS = ('bin_avg', 'skip', 'bin_sum')
+
+
+def custom_resolution(width, height, kind=None, value=0, factor=1, h_offset=0, v_offset=0):
+    """
+    自定义分辨率：采集视场 width x height（左上角偏移 h_offset, v_offset），
+    kind 为 bin_avg/bin_sum/skip 时输出 width/factor x height/factor
+    """
+    res = mvsdk.tSdkImageResolution()
+    res.iIndex = 0xff  # 0xff表示自定义分辨率
+    res.iWidthFOV = width
+    res.iHeightFOV = height
+    res.iHOffsetFOV = h_offset
+    res.iVOffsetFOV = v_offset
+    res.iWidth = width // factor
+    res.iHeight = height // factor
+    res.iWidthZoomSw = 0
+    res.iHeightZoomSw = 0
+    res.iWidthZoomHd = 0
+    res.iHeightZoomHd = 0
+    res.uBinSumMode = value if kind == 'bin_sum' else 0
+    res.uBinAverageMode = value if kind == 'bin_avg' else 0
+    res.uSkipMode = value if kind == 'skip' else 0
+    res.uResampleMask = 0
+    return res
+
+
+class SensorMode(object):
+    """一种传感器输出模式，以及输出坐标到显示坐标的换算"""
+
+    def __init__(self, display_width, display_height, kind=None, value=0, factor=1):
+        self.display_width = display_width
+        self.display_height = display_height
+        self.kind = kind          # None表示不做BIN/SKIP（裁剪视场，原来的做法）
+        self.value = value        # 写入uBinAverageMode/uSkipMode/uBinSumMode的值
+        self.factor = factor
+        self.resolution = custom_resolution(display_width, display_height, kind, value, factor)
+
+    @property
+    def name(self):
+        return f"{self.kind}{self.factor}" if self.kind else 'crop'
+
+    @property
+    def width(self):
+        return self.resolution.iWidth
+
+    @property
+    def height(self):
+        return self.resolution.iHeight
+
+    @property
+    def scale(self):
+        """显示坐标 / 输出坐标"""
+        return self.factor
+
+
+def _mask_factors(mask):
+    """BIN/SKIP掩码 -> [(模式值, 倍数)]，bit0表示2x2，bit1表示3x3..."""
+    return [(1 << bit, bit + 2) for bit in range(32) if mask & (1 << bit)]
+
+
+def list_sensor_modes(cap, display_width=640, display_height=480):
+    """列出相机支持的所有输出模式（第一个是不做BIN/SKIP的crop）"""
+    found = {}
+    rng = cap.sResolutionRange
+    masks = {'bin_avg': rng.uBinAverageModeMask, 'skip': rng.uSkipModeMask, 'bin_sum': rng.uBinSumModeMask}
+    for kind, mask in masks.items():
+        for value, factor in _mask_factors(mask):
+            found[(kind, value)] = factor
+
+    # 预设分辨率里用到的BIN/SKIP（有些相机掩码为0，但预设里有BIN模式）
+    for i in range(cap.iImageSizeDesc):
+        preset = cap.pImageSizeDesc[i]
+        for kind, value in (('bin_avg', preset.uBinAverageMode), ('skip', preset.uSkipMode),
+                            ('bin_sum', preset.uBinSumMode)):
+            if value and (kind, value) not in found and preset.iWidth > 0:
+                found[(kind, value)] = max(2, round(preset.iWidthFOV / preset.iWidth))
+
+    modes = [SensorMode(display_width, display_height)]
+    for (kind, value), factor in sorted(found.items(), key=lambda item: (item[1], MODE_KINDS.index(item[0][0]))):
+        if display_width % factor == 0 and display_height % factor == 0:
+            modes.append(SensorMode(display_width, display_height, kind, value, factor))
+    return modes
+
+
+def choose_sensor_mode(modes, name='crop', detect_scale=2):
+    """
+    按名称选择模式（crop / bin_avg2 / skip2 ...），auto 表示按 MODE_KINDS 顺序
+    找一个直接输出检测分辨率（缩小detect_scale倍）的模式，找不到时退回crop
+    """
+    if name == 'auto':
+        for kind in MODE_KINDS:
+            for mode in modes:
+                if mode.kind == kind and mode.factor == detect_scale:
+                    return mode
+        return modes[0]
+    for mode in modes:
+        if mode.name == name:
+            return mode
+    raise ValueError(f"相机不支持输出模式: {name}，可选 {[m.name for m in modes] + ['auto']}")
+
+
+def measure_sensor_mode(hCamera, mode, frames=100, detect_scale=2):
+    """
+    切换到mode后连续取frames帧，返回 (帧率, 每帧CPU毫秒, 实际输出宽, 高)
+    CPU时间包括SDK的ISP线程；crop模式额外计入缩小到检测分辨率的cv2.resize
+    """
+    mvsdk.CameraSetImageResolution(hCamera, mode.resolution)
+    mvsdk.CameraClearBuffer(hCamera)
+    size = mode.display_width * mode.display_height * 3
+    pFrameBuffer = mvsdk.CameraAlignMalloc(size, 16)
+    views = FrameViewCache()
+    width = height = 0
+    try:
+        for i in range(frames + 10):
+            if i == 10:  # 前10帧预热，不计时
+                t0, c0 = time.perf_counter(), time.process_time()
+            pRawData, FrameHead = mvsdk.CameraGetImageBuffer(hCamera, 1000)
+            mvsdk.CameraImageProcess(hCamera, pRawData, pFrameBuffer, FrameHead)
+            mvsdk.CameraReleaseImageBuffer(hCamera, pRawData)
+            frame = views.get(pFrameBuffer, FrameHead)
+            width, height = FrameHead.iWidth, FrameHead.iHeight
+            if mode.factor < detect_scale:
+                s = detect_scale // mode.factor
+                cv2.resize(frame, (width // s, height // s), interpolation=cv2.INTER_LINEAR)
+        wall = time.perf_counter() - t0
+        cpu = time.process_time() - c0
+    finally:
+        views.clear()
+        mvsdk.CameraAlignFree(pFrameBuffer)
+    return frames / wall, cpu / frames * 1000, width, height
+
+
+def main():
+    exposure_us = int(sys.argv[1]) if len(sys.argv) > 1 else 0
+    frames = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+
+    DevList = mvsdk.CameraEnumerateDevice()
+    if len(DevList) < 1:
+        print("错误：未找到相机！")
+        return
+    hCamera = mvsdk.CameraInit(DevList[0], -1, -1)
+    try:
+        cap = mvsdk.CameraGetCapability(hCamera)
+        mvsdk.CameraSetIspOutFormat(hCamera, mvsdk.CAMERA_MEDIA_TYPE_BGR8)
+        mvsdk.CameraSetTriggerMode(hCamera, 0)
+        if exposure_us > 0:
+            mvsdk.CameraSetAeState(hCamera, 0)
+            mvsdk.CameraSetExposureTime(hCamera, exposure_us)
+        mvsdk.CameraPlay(hCamera)
+
+        print("预设分辨率:")
+        for i in range(cap.iImageSizeDesc):
+            p = cap.pImageSizeDesc[i]
+            print(f"  [{p.iIndex}] {p.GetDescription():<20} 视场 {p.iWidthFOV}x{p.iHeightFOV} -> 输出 {p.iWidth}x{p.iHeight}"
+                  f"  bin_sum={p.uBinSumMode} bin_avg={p.uBinAverageMode} skip={p.uSkipMode}")
+        rng = cap.sResolutionRange
+        print(f"掩码: bin_avg=0x{rng.uBinAverageModeMask:X} skip=0x{rng.uSkipModeMask:X} bin_sum=0x{rng.uBinSumModeMask:X}")
+
+        modes = list_sensor_modes(cap)
+        results = []
+        for mode in modes:
+            try:
+                results.append((mode, measure_sensor_mode(hCamera, mode, frames)))
+            except mvsdk.CameraException as e:
+                print(f"  {mode.name}: 失败 {e.message}")
+
+        if not results:
+            return
+        base_fps, base_cpu = results[0][1][:2]
+        print(f"\n{'模式':<10}{'输出':>10}{'FPS':>8}{'CPU ms/帧':>12}{'FPS增益':>10}{'CPU节省':>10}")
+        for mode, (fps, cpu_ms, width, height) in results:
+            print(f"{mode.name:<10}{f'{width}x{height}':>10}{fps:>8.1f}{cpu_ms:>12.2f}"
+                  f"{fps / base_fps - 1:>+10.0%}{1 - cpu_ms / base_cpu:>+10.0%}")
+        print(f"\nauto 会选择: {choose_sensor_mode(modes, 'auto').name}")
+    finally:
+        mvsdk.CameraUnInit(hCamera)
+
+
+if __name__ == '__main__':
+    main()
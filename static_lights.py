@@ -0,0 +1,160 @@
+#coding=utf-8
+"""
+背景静态灯光排除：学习画面中长期存在的红色光源（指示灯、反光、落在靶上的飞镖），生成排除掩模，
+检测时红色掩模与保留掩模做一次 bitwise_and，静态灯光不再进入形态学和连通域，灯多的画面与干净画面耗时相同
+  - 学习：启动后前 learn_seconds 秒（或按键重新标定）每帧累计红色像素的出现频率
+  - 适应：之后每 update_every 帧按 adapt_rate 慢速更新（新出现/消失的静态光源约几十秒后生效）
+  - 出现频率超过 threshold 的像素（再膨胀 dilate 像素）为排除区域
+  - 模型保存到 .npz 文件，下次启动直接加载，不需要重新学习
+模型网格为全幅显示坐标 / scale（与学习时的检测图同一分辨率），检测图可以是全幅、走廊或窗口的一部分；
+检测分辨率切换（空闲1/4、追踪1/2）时保留掩模换算到对应网格，模型本身不变
+"""
+import os
+import cv2
+import numpy as np
+
+
+class StaticLightMask(object):
+    """
+    observe() 在没有飞镖的帧上调用（学习/适应），apply() 每帧在形态学之前调用
+    统计：excluded 排除像素占比、sources 排除区域的连通域数（静态光源个数）
+    """
+
+    def __init__(self, full_width, full_height, learn_seconds=3.0, threshold=0.8, adapt_rate=0.002,
+                 update_every=10, dilate=2):
+        self.full_width = full_width
+        self.full_height = full_height
+        self.learn_seconds = learn_seconds
+        self.threshold = threshold
+        self.adapt_rate = adapt_rate
+        self.update_every = update_every
+        self.dilate = dilate
+        self.scale = None
+        self.occupancy = None      # 红色像素出现频率（0~255，与0/255掩模同一量纲）
+        self.keep = None           # 保留掩模（0/255），排除区域为0
+        self._scaled = {}          # 保留掩模换算到其他缩小倍数的缓存，重建时清空
+        self.learning = True
+        self.learned_frames = 0
+        self.excluded = 0.0
+        self.sources = 0
+        self._learn_start = None
+        self._observed = 0
+
+    def start_learning(self):
+        """重新标定：清空模型，从下一帧开始学习learn_seconds秒（画面中不要有飞镖）"""
+        self.occupancy = None
+        self.keep = None
+        self.learning = True
+        self.learned_frames = 0
+        self._learn_start = None
+
+    def _ensure(self, scale):
+        """按检测图缩小倍数建立（或换算）模型网格"""
+        if self.occupancy is not None and self.scale == scale:
+            return
+        h, w = -(-self.full_height // scale), -(-self.full_width // scale)
+        if self.occupancy is None:
+            self.occupancy = np.zeros((h, w), np.float32)
+        else:
+            # 加载的模型或检测缩小倍数改变：换算到新网格
+            self.occupancy = cv2.resize(self.occupancy, (w, h), interpolation=cv2.INTER_AREA)
+        self.scale = scale
+        self._rebuild()
+
+    def _grid(self, shape, offset, grid, scale):
+        """检测图在网格（缩小倍数scale）中的范围（行、列切片），检测图超出网格时裁剪"""
+        ox, oy = offset[0] // scale, offset[1] // scale
+        h = min(shape[0], grid.shape[0] - oy)
+        w = min(shape[1], grid.shape[1] - ox)
+        return slice(oy, oy + h), slice(ox, ox + w)
+
+    def _keep(self, scale):
+        """保留掩模换算到检测缩小倍数scale的网格（与模型相同时直接用）"""
+        if scale == self.scale:
+            return self.keep
+        keep = self._scaled.get(scale)
+        if keep is None:
+            h, w = -(-self.full_height // scale), -(-self.full_width // scale)
+            if scale > self.scale:
+                # 变粗：块内有任何排除像素则整块排除
+                excluded = cv2.resize(cv2.bitwise_not(self.keep), (w, h), interpolation=cv2.INTER_AREA)
+                keep = cv2.compare(excluded, 0, cv2.CMP_EQ)
+            else:
+                keep = cv2.resize(self.keep, (w, h), interpolation=cv2.INTER_NEAREST)
+            self._scaled[scale] = keep
+        return keep
+
+    def _rebuild(self):
+        """由出现频率生成保留掩模"""
+        excluded = cv2.compare(self.occupancy, self.threshold * 255.0, cv2.CMP_GT)
+        if self.dilate > 0:
+            size = 2 * self.dilate + 1
+            excluded = cv2.dilate(excluded, cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (size, size)))
+        self.keep = cv2.bitwise_not(excluded)
+        self._scaled = {}
+        self.excluded = cv2.countNonZero(excluded) / float(excluded.size)
+        self.sources = cv2.connectedComponents(excluded)[0] - 1
+
+    def observe(self, red_mask, scale, offset, t):
+        """没有飞镖的帧：学习阶段每帧累计，之后每update_every帧慢速适应，返回学习是否在本帧结束"""
+        if self.learning and self.learned_frames and scale != self.scale:
+            return False    # 学习期间网格固定为开始学习时的缩小倍数，其他分辨率的帧不计入
+        self._ensure(scale)
+        rows, cols = self._grid(red_mask.shape, offset, self.occupancy, scale)
+        src = red_mask[:rows.stop - rows.start, :cols.stop - cols.start]
+        if self.learning:
+            if self._learn_start is None:
+                self._learn_start = t
+            self.learned_frames += 1
+            # 学习阶段为简单平均
+            cv2.accumulateWeighted(src, self.occupancy[rows, cols], 1.0 / self.learned_frames)
+            if t - self._learn_start < self.learn_seconds:
+                return False
+            self.learning = False
+            self._rebuild()
+            return True
+        self._observed += 1
+        if self._observed % self.update_every == 0:
+            cv2.accumulateWeighted(src, self.occupancy[rows, cols], self.adapt_rate)
+            self._rebuild()
+        return False
+
+    def apply(self, red_mask, scale, offset):
+        """红色掩模（原地）去掉静态光源区域，学习完成前不处理"""
+        if self.learning or self.keep is None:
+            return red_mask
+        keep = self._keep(scale)
+        rows, cols = self._grid(red_mask.shape, offset, keep, scale)
+        dst = red_mask[:rows.stop - rows.start, :cols.stop - cols.start]
+        cv2.bitwise_and(dst, keep[rows, cols], dst=dst)
+        return red_mask
+
+    def save(self, path):
+        if self.occupancy is None or self.learning:
+            return False
+        np.savez_compressed(path, occupancy=self.occupancy, scale=self.scale,
+                            full_size=(self.full_width, self.full_height))
+        return True
+
+    def load(self, path):
+        """加载保存的模型（全幅尺寸不同时忽略），返回是否加载成功"""
+        if not os.path.exists(path):
+            return False
+        try:
+            data = np.load(path)
+            if tuple(data['full_size']) != (self.full_width, self.full_height):
+                return False
+            self.occupancy = data['occupancy'].astype(np.float32)
+            self.scale = int(data['scale'])
+        except (OSError, KeyError, ValueError) as e:
+            print(f"加载静态灯光模型失败: {e}")
+            return False
+        self.learning = False
+        self._rebuild()
+        return True
+
+    def summary(self):
+        """统计字符串（打印用）"""
+        if self.learning:
+            return f"学习中（{self.learned_frames} 帧）"
+        return f"排除 {self.sources} 处光源，占 {self.excluded:.1%}"
@@ -0,0 +1,213 @@
+#coding=utf-8
+"""
+分条并行检测：检测图按行切成 workers 条，颜色分类、形态学、连通域标记在线程池里每条各做一份（OpenCV和NumPy的
+整图运算执行时释放GIL，几个核可以同时跑），再把跨条边界的连通域合并，结果与整图串行处理相同
+  - 颜色分类：逐像素运算，每条直接写进整图掩模的对应行
+  - 形态学：每条上下各多带 HALO 行一起做（每次3x3腐蚀/膨胀只影响相邻一行），只取本条的行，与整图结果逐像素一致
+  - 连通域：每条单独标记，条与条相邻两行上同时为前景的像素（8连通含斜对角）所在的连通域用并查集合并，
+    外接框取并集、面积和周长相加、质心按面积加权，合并后的统计交给 BlobExtractor 做同样的过滤
+    （各条形态学结果的本条行拷回整图掩模，外轮廓面积在合并后的外接框上算）
+  - 检测图太小（行数不够切成每条 min_rows 行）或 workers=1 时在调用线程里串行处理，与原来的逐步调用相同
+调用线程自己处理第一条，线程池只需要 workers-1 个线程；各条的中间缓冲取自 DetectionWorkspace（每条各用一组名字）
+"""
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+import numpy as np
+
+
+class StripeDetector(object):
+    """
+    classify() 得到红/绿掩模（替代 HsvClassifier/ColorLut.masks），extract() 形态学 + 连通域 + 过滤（替代 morphologyEx + BlobExtractor.extract）
+    ops 为形态学操作序列（主程序开运算+闭运算，无界面版本只做闭运算）
+    统计：frames extract帧数、parallel_frames 分条并行的帧数、merges 跨条合并的连通域数
+    """
+
+    def __init__(self, classifier, extractor, workers=4, min_rows=32, ops=(cv2.MORPH_OPEN, cv2.MORPH_CLOSE),
+                 workspace=None):
+        self.classifier = classifier
+        self.extractor = extractor
+        self.workers = max(1, workers)
+        self.min_rows = min_rows
+        self.ops = tuple(ops)
+        self.workspace = workspace if workspace is not None else classifier.workspace
+        self._kernel = np.ones((3, 3), np.uint8)
+        self._pool = ThreadPoolExecutor(self.workers - 1) if self.workers > 1 else None
+        # 每条的缓冲名字和各行数的切条结果事先准备好，每帧不再拼字符串、建列表
+        self._names = [(f'stripe{i}', (f'stripe{i}_morph0', f'stripe{i}_morph1'), f'stripe{i}_labels', f'stripe{i}_eroded')
+                       for i in range(self.workers)]
+        self._bounds_cache = {}
+        # 统计
+        self.frames = 0
+        self.parallel_frames = 0
+        self.merges = 0
+
+    def _bounds(self, h):
+        """按行切条，返回 [(r0, r1), ...]，只有一条时串行"""
+        bounds = self._bounds_cache.get(h)
+        if bounds is None:
+            n = max(1, min(self.workers, h // self.min_rows))
+            edges = [h * i // n for i in range(n + 1)]
+            bounds = self._bounds_cache[h] = list(zip(edges[:-1], edges[1:]))
+        return bounds
+
+    def _map(self, fn, bounds):
+        """第一条在调用线程里做，其余交给线程池，按条的顺序返回结果（工作线程的异常在这里抛出）"""
+        futures = [self._pool.submit(fn, i, r0, r1) for i, (r0, r1) in enumerate(bounds) if i > 0]
+        first = fn(0, *bounds[0])
+        return [first] + [f.result() for f in futures]
+
+    def classify(self, bgr):
+        """检测图 -> (红色掩模, 绿色掩模)，0/255（复用的缓冲，下一次调用时被覆盖）"""
+        h, w = bgr.shape[:2]
+        bounds = self._bounds(h)
+        if len(bounds) == 1:
+            return self.classifier.masks(bgr)
+        ws = self.workspace
+        red, green = ws.buffer('red', (h, w)), ws.buffer('green', (h, w))
+        scratch = [self.classifier.scratch(r1 - r0, w, self._names[i][0]) for i, (r0, r1) in enumerate(bounds)]
+
+        def stripe(i, r0, r1):
+            self.classifier.masks_into(bgr[r0:r1], red[r0:r1], green[r0:r1], *scratch[i])
+
+        self._map(stripe, bounds)
+        return red, green
+
+    def _morph(self, mask, ops, names):
+        """形态学操作序列，结果在两块缓冲之间交替写（names 为这两块缓冲的名字，各条不同）"""
+        for k, op in enumerate(ops):
+            dst = self.workspace.buffer(names[k % 2], mask.shape)
+            mask = cv2.morphologyEx(mask, op, self._kernel, dst=dst)
+        return mask
+
+    def _stripe(self, i, r0, r1, mask, ops, full):
+        """第i条（整图的 r0:r1 行）：带上下邻行做形态学，只对本条的行做连通域标记；full 不为None时本条的行拷回整图"""
+        _, morph_names, labels_name, eroded_name = self._names[i]
+        extractor = self.extractor
+        ws = self.workspace
+        h = mask.shape[0]
+        halo = 2 * len(ops) + 1     # 每个操作一次腐蚀一次膨胀，再加一行给边界像素（周长）
+        e0, e1 = max(0, r0 - halo), min(h, r1 + halo)
+        morphed = self._morph(mask[e0:e1], ops, morph_names)
+        core = morphed[r0 - e0:r1 - e0]
+        labels = ws.buffer(labels_name, core.shape, extractor.label_dtype(core))
+        n, labels, stats, centroids = extractor.label(core, labels)
+        stats, centroids = stats[1:], centroids[1:]
+        perimeter = None
+        if extractor.min_circularity > 0:
+            eroded = cv2.erode(morphed, self._kernel, dst=ws.buffer(eroded_name, morphed.shape))
+            perimeter = extractor.perimeter(core, labels, n, eroded[r0 - e0:r1 - e0])
+        if full is not None:
+            # 外轮廓面积要在合并后的连通域上算：本条的行拷回整图掩模
+            np.copyto(full[r0:r1], core)
+        return labels, stats, centroids, perimeter, core
+
+    def extract(self, mask, scale=1, offset=(0, 0), t=0.0, frame_id=0, ops=None):
+        """红色掩模（未做形态学）-> (candidates, rejected)，同 BlobExtractor.extract；ops 不为None时代替本帧的形态学操作"""
+        self.frames += 1
+        ops = self.ops if ops is None else tuple(ops)
+        h = mask.shape[0]
+        bounds = self._bounds(h)
+        if len(bounds) == 1:
+            # 整图一条：与 BlobExtractor.extract 相同
+            _, stats, centroids, perimeter, core = self._stripe(0, 0, h, mask, ops, None)
+            return self.extractor.from_stats(stats, centroids, scale, offset, t, frame_id, perimeter, core)
+        self.parallel_frames += 1
+        full = self.workspace.buffer('morphed', mask.shape)
+        results = self._map(lambda i, r0, r1: self._stripe(i, r0, r1, mask, ops, full), bounds)
+        return self._merge(results, bounds, full, scale, offset, t, frame_id)
+
+    def _boundary_pairs(self, upper, lower, base_upper, base_lower):
+        """相邻两条交界处两行标签图上相连的前景像素，返回 (上条连通域序号, 下条连通域序号) 对（全局序号）"""
+        w = upper.shape[0]
+        shifts = (-1, 0, 1) if self.extractor.connectivity == 8 else (0,)
+        pairs = []
+        for dx in shifts:
+            a = upper[max(0, -dx):w - max(0, dx)]
+            b = lower[max(0, dx):w - max(0, -dx)]
+            both = (a > 0) & (b > 0)
+            if both.any():
+                pairs.append(np.stack([a[both].astype(np.int64) + base_upper - 1,
+                                       b[both].astype(np.int64) + base_lower - 1], axis=1))
+        return pairs
+
+    def _merge(self, results, bounds, mask, scale, offset, t, frame_id):
+        """各条的连通域统计换算到整图行坐标，跨条相连的用并查集合并；mask 为整图的形态学结果"""
+        stats = np.concatenate([r[1] for r in results]).astype(np.int64)
+        centroids = np.concatenate([r[2] for r in results])
+        perimeter = None
+        if results[0][3] is not None:
+            perimeter = np.concatenate([r[3] for r in results])
+        counts = [len(r[1]) for r in results]
+        bases = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        rows = np.repeat([r0 for r0, _ in bounds], counts)
+        stats[:, cv2.CC_STAT_TOP] += rows
+        centroids[:, 1] += rows
+
+        pairs = []
+        for i in range(len(results) - 1):
+            pairs += self._boundary_pairs(results[i][0][-1], results[i + 1][0][0], bases[i], bases[i + 1])
+        if pairs:
+            # 并查集：根取序号最小的连通域（整图光栅顺序中最先出现），合并后的顺序与整图标记相同
+            parent = np.arange(len(stats))
+
+            def find(k):
+                while parent[k] != k:
+                    parent[k] = parent[parent[k]]
+                    k = parent[k]
+                return k
+
+            pairs = np.concatenate(pairs)
+            keys = np.unique(pairs[:, 0] * len(stats) + pairs[:, 1])
+            for a, b in zip(*divmod(keys, len(stats))):
+                ra, rb = find(a), find(b)
+                if ra != rb:
+                    parent[max(ra, rb)] = min(ra, rb)
+            # 路径压缩到根（向量化，只有几层）
+            while True:
+                grand = parent[parent]
+                if np.array_equal(grand, parent):
+                    break
+                parent = grand
+            groups, inverse = np.unique(parent, return_inverse=True)
+            self.merges += len(stats) - len(groups)
+            stats, centroids, perimeter = self._combine(stats, centroids, perimeter, inverse, len(groups))
+        return self.extractor.from_stats(stats, centroids, scale, offset, t, frame_id, perimeter, mask)
+
+    @staticmethod
+    def _combine(stats, centroids, perimeter, inverse, n):
+        """按 inverse 分组合并统计：外接框取并集，面积/周长相加，质心按面积加权"""
+        left = stats[:, cv2.CC_STAT_LEFT]
+        top = stats[:, cv2.CC_STAT_TOP]
+        right = left + stats[:, cv2.CC_STAT_WIDTH]
+        bottom = top + stats[:, cv2.CC_STAT_HEIGHT]
+        area = stats[:, cv2.CC_STAT_AREA].astype(np.float64)
+        merged = np.empty((n, 5), np.int64)
+        x0 = np.full(n, np.iinfo(np.int64).max)
+        y0 = np.full(n, np.iinfo(np.int64).max)
+        x1 = np.zeros(n, np.int64)
+        y1 = np.zeros(n, np.int64)
+        np.minimum.at(x0, inverse, left)
+        np.minimum.at(y0, inverse, top)
+        np.maximum.at(x1, inverse, right)
+        np.maximum.at(y1, inverse, bottom)
+        total = np.bincount(inverse, weights=area, minlength=n)
+        merged[:, cv2.CC_STAT_LEFT] = x0
+        merged[:, cv2.CC_STAT_TOP] = y0
+        merged[:, cv2.CC_STAT_WIDTH] = x1 - x0
+        merged[:, cv2.CC_STAT_HEIGHT] = y1 - y0
+        merged[:, cv2.CC_STAT_AREA] = total
+        cx = np.bincount(inverse, weights=centroids[:, 0] * area, minlength=n) / total
+        cy = np.bincount(inverse, weights=centroids[:, 1] * area, minlength=n) / total
+        if perimeter is not None:
+            perimeter = np.bincount(inverse, weights=perimeter, minlength=n).astype(np.float32)
+        return merged, np.stack([cx, cy], axis=1), perimeter
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    def summary(self):
+        """统计字符串（打印用）"""
+        return (f"{self.workers} 线程，{self.parallel_frames}/{self.frames} 帧分条并行，"
+                f"跨条合并 {self.merges} 个连通域")
@@ -0,0 +1,86 @@
+#coding=utf-8
+"""
+亚像素飞镖中心：候选目标在缩小的检测图上找到后，在全分辨率图像上取候选外接框附近的小块，
+按“红色程度”加权求矩（cv2.moments）得到质心，代替检测图二值掩模的质心（检测图一个像素是2个显示像素，
+二值掩模边缘像素的取舍让中心在2像素格子上跳动）
+  - 权重 = R - max(G, B)（饱和减法），低于 min_weight 的置0（去掉背景偏色），小块只含候选外接框加 margin
+  - 全分辨率图像可以是ISP后的BGR图，也可以是RAW Bayer图（只对小块去马赛克）；BIN/SKIP缩小输出时在输出图上求，
+    仍比二值掩模稳定
+每个候选只处理几十x几十像素，比全分辨率检测便宜得多
+"""
+import cv2
+from workspace import DetectionWorkspace
+
+
+class SubpixelRefiner(object):
+    """
+    refine() 在连通域提取之后调用，原地更新候选数组（BLOB_DTYPE）的 cx/cy（显示坐标，浮点）
+    统计：refined 成功细化的候选数、rejected 小块内没有足够权重（保留原质心）的候选数
+    """
+
+    def __init__(self, margin=4, min_weight=24, max_blobs=4, workspace=None):
+        self.margin = margin            # 外接框四周扩大的显示像素
+        self.workspace = workspace if workspace is not None else DetectionWorkspace()   # 小块缓冲（按实际大小）
+        self.min_weight = min_weight
+        self.max_blobs = max_blobs      # 每帧最多细化的候选数（按面积从大到小）
+        self.refined = 0
+        self.rejected = 0
+
+    def _crop(self, image, x0, y0, x1, y1, mirrored, bayer_code):
+        """
+        取全分辨率小块（图像坐标，mirrored 时为镜像之后的坐标），返回 (BGR小块, 实际的x0, y0)
+        RAW图按2x2对齐后去马赛克，镜像之前的RAW图先换算列坐标，去马赛克后再翻转
+        """
+        if bayer_code is None:
+            return image[y0:y1, x0:x1], x0, y0
+        ws = self.workspace
+        y0, y1 = y0 & ~1, min(image.shape[0], (y1 + 1) & ~1)
+        if mirrored:
+            width = image.shape[1]
+            rx0, rx1 = (width - x1) & ~1, min(width, (width - x0 + 1) & ~1)
+            shape = (y1 - y0, rx1 - rx0, 3)
+            patch = cv2.cvtColor(image[y0:y1, rx0:rx1], bayer_code, dst=ws.buffer('sub_bgr', shape, full=False))
+            patch = cv2.flip(patch, 1, dst=ws.buffer('sub_mirrored', shape, full=False))
+            return patch, width - rx1, y0
+        x0, x1 = x0 & ~1, min(image.shape[1], (x1 + 1) & ~1)
+        patch = cv2.cvtColor(image[y0:y1, x0:x1], bayer_code, dst=ws.buffer('sub_bgr', (y1 - y0, x1 - x0, 3), full=False))
+        return patch, x0, y0
+
+    def refine(self, blobs, image, scale=1, offset=(0, 0), mirrored=False, bayer_code=None):
+        """
+        blobs: 候选数组（显示坐标），image: 全分辨率图像（BGR，或 bayer_code 不为None时为RAW Bayer），
+        scale/offset 为 image 到显示坐标的换算，mirrored 表示 image 是镜像之前的（RAW图）
+        """
+        ox, oy = offset
+        h, w = image.shape[:2]
+        m = self.margin
+        ws = self.workspace
+        for blob in blobs[:self.max_blobs]:
+            x0 = max(0, (int(blob['x']) - m - ox) // scale)
+            y0 = max(0, (int(blob['y']) - m - oy) // scale)
+            x1 = min(w, -(-(int(blob['x'] + blob['w']) + m - ox) // scale))
+            y1 = min(h, -(-(int(blob['y'] + blob['h']) + m - oy) // scale))
+            if x1 - x0 < 2 or y1 - y0 < 2:
+                self.rejected += 1
+                continue
+            patch, px, py = self._crop(image, x0, y0, x1, y1, mirrored, bayer_code)
+            shape = patch.shape[:2]
+            r = cv2.extractChannel(patch, 2, dst=ws.buffer('sub_r', shape, full=False))
+            g = cv2.extractChannel(patch, 1, dst=ws.buffer('sub_g', shape, full=False))
+            b = cv2.extractChannel(patch, 0, dst=ws.buffer('sub_b', shape, full=False))
+            gb = cv2.max(g, b, dst=g)
+            weight = cv2.subtract(r, gb, dst=ws.buffer('sub_weight', shape, full=False))
+            cv2.threshold(weight, self.min_weight - 1, 0, cv2.THRESH_TOZERO, dst=weight)
+            moments = cv2.moments(weight)
+            if moments['m00'] <= 0:
+                self.rejected += 1
+                continue
+            # 像素中心换算到显示坐标（与 BlobExtractor 的质心换算一致）
+            blob['cx'] = (px + moments['m10'] / moments['m00'] + 0.5) * scale - 0.5 + ox
+            blob['cy'] = (py + moments['m01'] / moments['m00'] + 0.5) * scale - 0.5 + oy
+            self.refined += 1
+        return blobs
+
+    def summary(self):
+        """统计字符串（打印用）"""
+        return f"细化 {self.refined} 个候选，{self.rejected} 个保留原质心"
@@ -0,0 +1,147 @@
+#coding=utf-8
+"""
+跟踪ROI：飞镖开始追踪后，把传感器读出窗口缩小到预测位置附近，丢失后恢复全幅
+  TrackingRoi - 策略：根据最近几个轨迹点预测下一位置，决定ROI矩形（显示坐标系）
+  SensorRoi   - 执行：把显示坐标系下的矩形换算成传感器坐标并调用SDK
+所有矩形都是 (x, y, w, h)，以全幅显示画面（ISP镜像之后）为坐标系
+"""
+import sys
+sys.path.append('python_demo')
+import mvsdk
+
+ROI_METHODS = ('fov', 'transfer')
+
+
+def _align_down(v, align):
+    return (v // align) * align
+
+
+class TrackingRoi(object):
+    """根据轨迹预测位置决定ROI，预测点离开内框时才移动ROI，连续丢失lost_frames帧后恢复全幅"""
+
+    def __init__(self, full_width, full_height, roi_width=320, roi_height=240,
+                 inner_margin=0.25, lost_frames=5, align=16):
+        self.full_width = full_width
+        self.full_height = full_height
+        self.roi_width = min(_align_down(roi_width, align), full_width)
+        self.roi_height = min(_align_down(roi_height, align), full_height)
+        self.inner_margin = inner_margin
+        self.lost_frames = lost_frames
+        self.align = align
+        self.rect = None       # 当前ROI，None表示全幅
+        self.misses = 0
+        self.moves = 0         # ROI移动次数（统计用）
+
+    @property
+    def active(self):
+        return self.rect is not None
+
+    def predict(self, points, dt=0.0):
+        """
+        用最近两个轨迹点 (t, x, y) 按硬件时间做匀速外推，预测dt秒之后的位置
+        dt为0时外推一个"上一次的点间隔"（与以前按点外推一致）
+        """
+        t, x, y = points[-1]
+        if len(points) >= 2:
+            pt, px, py = points[-2]
+            span = t - pt
+            if span > 0:
+                k = (dt if dt > 0 else span) / span
+                x, y = x + (x - px) * k, y + (y - py) * k
+        return x, y
+
+    def track(self, points, dt=0.0):
+        """飞镖被检测到时调用，dt为下一帧的预计间隔（秒），返回ROI是否需要改变"""
+        self.misses = 0
+        x, y = self.predict(points, dt)
+        if self.rect is not None and self._inside_inner(x, y):
+            return False
+        rect = self._center_on(x, y)
+        if rect == self.rect:
+            return False
+        self.rect = rect
+        self.moves += 1
+        return True
+
+    def miss(self):
+        """追踪中本帧没检测到飞镖时调用，连续丢失后恢复全幅，返回ROI是否改变"""
+        if self.rect is None:
+            return False
+        self.misses += 1
+        if self.misses >= self.lost_frames:
+            return self.reset()
+        return False
+
+    def reset(self):
+        """恢复全幅，返回ROI是否改变"""
+        changed = self.rect is not None
+        self.rect = None
+        self.misses = 0
+        return changed
+
+    def _inside_inner(self, x, y):
+        rx, ry, rw, rh = self.rect
+        mx, my = rw * self.inner_margin, rh * self.inner_margin
+        return rx + mx <= x <= rx + rw - mx and ry + my <= y <= ry + rh - my
+
+    def _center_on(self, x, y):
+        w, h = self.roi_width, self.roi_height
+        rx = _align_down(int(x - w / 2), self.align)
+        ry = _align_down(int(y - h / 2), self.align)
+        rx = max(0, min(rx, self.full_width - w))
+        ry = max(0, min(ry, self.full_height - h))
+        return (rx, ry, w, h)
+
+
+class SensorRoi(object):
+    """
+    把ROI应用到相机
+      fov      - CameraSetImageResolution 偏移采集视场，输出图像变小（省USB带宽和ISP时间）
+      transfer - CameraSetTransferRoi 只传输ROI区域，输出尺寸不变（只省USB带宽）
+    apply() 返回输出图像左上角在全幅显示坐标系中的位置
+    传感器开了BIN/SKIP时（sensor_mode），显示坐标系是采集视场，输出图像再缩小 scale 倍
+    """
+
+    def __init__(self, hCamera, method='fov', mirrored=True):
+        if method not in ROI_METHODS:
+            raise ValueError(f"未知ROI方式: {method}，可选 {ROI_METHODS}")
+        self.hCamera = hCamera
+        self.method = method
+        self.mirrored = mirrored   # ISP做了水平镜像时，显示坐标x需要翻转回传感器坐标
+        self.full = mvsdk.CameraGetImageResolution(hCamera)  # 全幅窗口，用于恢复
+        self.full_width = self.full.iWidthFOV
+        self.full_height = self.full.iHeightFOV
+        self.scale = self.full_width // max(self.full.iWidth, 1)  # 视场 / 输出
+
+    def apply(self, rect):
+        hCamera = self.hCamera
+        if rect is None:
+            if self.method == 'fov':
+                mvsdk.CameraSetImageResolution(hCamera, self.full)
+            else:
+                mvsdk.CameraEnableTransferRoi(hCamera, 0)
+            return (0, 0)
+
+        x, y, w, h = rect
+        # 显示坐标 -> 传感器坐标（镜像只影响水平方向）
+        sx = self.full_width - x - w if self.mirrored else x
+        if self.method == 'fov':
+            # 在全幅窗口的基础上只改视场，保留BIN/SKIP设置
+            res = self.full.clone()
+            res.iIndex = 0xff
+            res.iHOffsetFOV = self.full.iHOffsetFOV + sx
+            res.iVOffsetFOV = self.full.iVOffsetFOV + y
+            res.iWidthFOV, res.iHeightFOV = w, h
+            res.iWidth, res.iHeight = w // self.scale, h // self.scale
+            err = mvsdk.CameraSetImageResolution(hCamera, res)
+            if err != mvsdk.CAMERA_STATUS_SUCCESS:
+                raise mvsdk.CameraException(err)
+            return (x, y)
+
+        # 传输ROI用输出图像坐标
+        s = self.scale
+        err = mvsdk.CameraSetTransferRoi(hCamera, 0, sx // s, y // s, (sx + w) // s, (y + h) // s)
+        if err != mvsdk.CAMERA_STATUS_SUCCESS:
+            raise mvsdk.CameraException(err)
+        mvsdk.CameraEnableTransferRoi(hCamera, 1)
+        return (0, 0)
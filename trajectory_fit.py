@@ -0,0 +1,104 @@
+#coding=utf-8
+"""
+增量最小二乘轨迹拟合：x(t)、y(t) 各拟合一个多项式，每加一个点只更新累加和，耗时与轨迹长度无关
+  - 累加 Σw·τ^k（k=0..2d）、Σw·τ^k·x、Σw·τ^k·y、Σw·x²、Σw·y²，正规方程 A c = b 的 A 是 τ^k 累加和组成的
+    (d+1)x(d+1) Hankel 矩阵，取系数时才解一次（只有 d+1 阶）
+  - forgetting < 1 时每加一个点所有旧累加和先乘 forgetting（指数遗忘，等效窗口约 1/(1-forgetting) 个点），
+    与按 forgetting^点龄 加权的 np.polyfit 结果相同
+  - 残差平方和由累加和直接算出（Σw·x² - 2c·b + cᵀAc），不需要保存轨迹点
+τ 为相对第一个点的时间（秒），一条飞镖轨迹只有一两秒，τ^(2d) 的累加和不会损失精度
+不同的时间戳少于 d+1 个（重复帧、同一时间戳的多个观测）时正规方程奇异，系数为None（与点数不够相同）
+"""
+import numpy as np
+
+
+class IncrementalPolyFit(object):
+    """
+    add(t, x, y) 每个点调用一次，之后读取：
+      coefficients  - (d+1, 2) 数组，第k行为 τ^k 的系数（两列分别为x、y），点数不够或正规方程奇异时为None
+      residuals     - 加权残差均方根 (x, y)（像素）
+      predict(t)    - t时刻的拟合位置 (x, y)
+    """
+
+    def __init__(self, degree=2, forgetting=1.0):
+        self.degree = degree
+        self.forgetting = forgetting
+        self._exponents = np.arange(2 * degree + 1)
+        idx = np.arange(degree + 1)
+        self._hankel = idx[:, None] + idx[None, :]      # A[i, j] 取 Σw·τ^(i+j)
+        self.reset()
+
+    def reset(self):
+        d = self.degree
+        self.t0 = None
+        self.points = 0
+        self.times = 0                          # 不同时间戳的个数（时间戳按顺序到达，与上一个点比较）
+        self._last_t = None
+        self._moments = np.zeros(2 * d + 1)     # Σw·τ^k
+        self._b = np.zeros((d + 1, 2))          # Σw·τ^k·(x, y)
+        self._squares = np.zeros(2)             # Σw·(x², y²)
+        self._coefficients = None               # 缓存的解，加点后失效
+
+    @property
+    def ready(self):
+        """不同时间戳的点数够解出全部系数"""
+        return self.times > self.degree
+
+    @property
+    def weight(self):
+        """加权点数 Σw（forgetting=1 时即点数）"""
+        return self._moments[0]
+
+    def add(self, t, x, y):
+        """加入一个点（t为秒，x/y为显示坐标），O(1)"""
+        if self.t0 is None:
+            self.t0 = t
+        if t != self._last_t:
+            self.times += 1
+            self._last_t = t
+        powers = (t - self.t0) ** self._exponents
+        z = np.array([x, y], np.float64)
+        if self.forgetting < 1.0:
+            f = self.forgetting
+            self._moments *= f
+            self._b *= f
+            self._squares *= f
+        self._moments += powers
+        self._b += powers[:self.degree + 1, None] * z
+        self._squares += z * z
+        self.points += 1
+        self._coefficients = None
+
+    def normal_matrix(self):
+        """正规方程矩阵 A[i, j] = Σw·τ^(i+j)"""
+        return self._moments[self._hankel]
+
+    @property
+    def coefficients(self):
+        if not self.ready:
+            return None
+        if self._coefficients is None:
+            try:
+                self._coefficients = np.linalg.solve(self.normal_matrix(), self._b)
+            except np.linalg.LinAlgError:
+                # 数值上奇异（遗忘后早期点的权重下溢为0等）：当作解不出
+                return None
+        return self._coefficients
+
+    @property
+    def residuals(self):
+        """加权残差均方根 (x, y)，点数不够时为None"""
+        c = self.coefficients
+        if c is None:
+            return None
+        a = self.normal_matrix()
+        rss = self._squares - 2.0 * np.sum(c * self._b, axis=0) + np.sum(c * (a @ c), axis=0)
+        return tuple(np.sqrt(np.maximum(rss, 0.0) / self.weight))
+
+    def predict(self, t):
+        """t时刻的拟合位置 (x, y)，点数不够时为None"""
+        c = self.coefficients
+        if c is None:
+            return None
+        powers = (t - self.t0) ** self._exponents[:self.degree + 1]
+        return tuple(powers @ c)
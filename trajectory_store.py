@@ -0,0 +1,166 @@
+#coding=utf-8
+"""
+轨迹存储：轨迹点是结构化数组（TRAJECTORY_DTYPE）而不是 (t, x, y) 元组的列表，内存在开始时一次分配，大小固定
+  - TrajectoryRing：当前飞镖的轨迹，容量 capacity 个点，超过时丢弃最早的点（代替 list.pop(0) 的整表搬移）；
+    缓冲长度为 2*capacity，追加写在末尾，写到缓冲末尾时把最近的点搬回开头（每 capacity 次追加最多搬一次，均摊O(1)），
+    所以 points 始终是一段连续视图，绘制、拟合、导出都直接对字段做向量运算
+  - TrajectoryArena：已完成的轨迹依次拷贝进一个连续数组，offsets 记录每条轨迹的起点（代替每条轨迹 .copy() 一个列表）；
+    总点数和条数有上限，超过时丢弃最早的轨迹，长时间运行内存不增长
+  - polyline() 把轨迹点四舍五入成 cv2.polylines 的整数点，一条轨迹一次调用代替逐段 cv2.line
+坐标为显示坐标（浮点，亚像素中心），时间为硬件时间戳（秒）
+"""
+import numpy as np
+
+TRAJECTORY_DTYPE = np.dtype([
+    ('t', np.float64),                         # 相机硬件时间戳（秒）
+    ('x', np.float32), ('y', np.float32),      # 飞镖头中心（显示坐标）
+    ('area', np.float32),                      # 飞镖头面积（显示坐标像素）
+    ('frame_id', np.int64),
+])
+
+
+def polyline(points):
+    """轨迹点（结构化数组）-> cv2.polylines 用的 int32 点数组 (N, 2)"""
+    xy = np.empty((len(points), 2), np.float32)
+    xy[:, 0] = points['x']
+    xy[:, 1] = points['y']
+    return np.rint(xy).astype(np.int32)
+
+
+class TrajectoryRing(object):
+    """
+    append() 每个轨迹点调用一次，points 为按时间顺序的连续结构化数组视图（下一次 append/clear 之后失效）
+    ring[i] 为第i个点的 (t, x, y)，与原来的 (t, x, y) 列表一样可以交给 SearchWindow / TrackingRoi 外推
+    """
+
+    def __init__(self, capacity=100):
+        self.capacity = capacity
+        self._data = np.zeros(2 * capacity, TRAJECTORY_DTYPE)
+        self._start = 0
+        self._end = 0
+        # 统计
+        self.appends = 0
+        self.dropped = 0        # 超过容量丢弃的最早的点
+
+    def __len__(self):
+        return self._end - self._start
+
+    def __getitem__(self, i):
+        n = self._end - self._start
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError('trajectory index out of range')
+        point = self._data[self._start + i]
+        return float(point['t']), float(point['x']), float(point['y'])
+
+    @property
+    def nbytes(self):
+        return self._data.nbytes
+
+    @property
+    def points(self):
+        return self._data[self._start:self._end]
+
+    def append(self, t, x, y, area=0.0, frame_id=0):
+        """加入一个点，已满时丢弃最早的点"""
+        if self._end - self._start == self.capacity:
+            self._start += 1
+            self.dropped += 1
+        if self._end == len(self._data):
+            # 写到缓冲末尾：保留的点（不超过 capacity 个）搬回开头，与原位置不重叠
+            n = self._end - self._start
+            self._data[:n] = self._data[self._start:self._end]
+            self._start, self._end = 0, n
+        self._data[self._end] = (t, x, y, area, frame_id)
+        self._end += 1
+        self.appends += 1
+
+    def extend(self, points):
+        """按顺序加入多个点（结构化数组），超过容量时只保留最近的 capacity 个"""
+        n = len(points)
+        points = points[-self.capacity:]
+        keep = min(self._end - self._start, self.capacity - len(points))
+        # 保留的旧点和新点一起放到缓冲开头
+        self._data[:keep] = self._data[self._end - keep:self._end]
+        self._data[keep:keep + len(points)] = points
+        self.dropped += self._end - self._start - keep + n - len(points)
+        self._start, self._end = 0, keep + len(points)
+        self.appends += n
+
+    def clear(self):
+        self._start = self._end = 0
+
+    def polyline(self):
+        return polyline(self.points)
+
+
+class TrajectoryArena(object):
+    """
+    add(points) 轨迹结束时调用，arena[i] 为第i条轨迹的结构化数组视图，points / offsets 为全部点和每条轨迹的起点
+    （offsets 比条数多一个，最后一个为总点数），导出时直接保存这两个数组
+    统计：dropped 因超过容量丢弃的最早的轨迹条数
+    """
+
+    def __init__(self, capacity=400, max_trajectories=4):
+        self.capacity = capacity                    # 总点数上限
+        self.max_trajectories = max_trajectories    # 条数上限
+        self._data = np.zeros(capacity, TRAJECTORY_DTYPE)
+        self._offsets = np.zeros(max_trajectories + 1, np.int64)
+        self._count = 0
+        self.dropped = 0
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError('trajectory index out of range')
+        return self._data[self._offsets[i]:self._offsets[i + 1]]
+
+    @property
+    def nbytes(self):
+        return self._data.nbytes + self._offsets.nbytes
+
+    @property
+    def offsets(self):
+        return self._offsets[:self._count + 1]
+
+    @property
+    def points(self):
+        return self._data[:self._offsets[self._count]]
+
+    def add(self, points):
+        """拷贝一条轨迹（结构化数组），超过容量时先丢弃最早的轨迹（轨迹本身超过总容量时只保留最近的点）"""
+        points = points[-self.capacity:]
+        n = len(points)
+        used = self._offsets[self._count]
+        drop = 0
+        while drop < self._count and (self._count - drop >= self.max_trajectories
+                                      or used - self._offsets[drop] + n > self.capacity):
+            drop += 1
+        if drop:
+            start = self._offsets[drop]
+            self._data[:used - start] = self._data[start:used]
+            self._offsets[:self._count - drop + 1] = self._offsets[drop:self._count + 1] - start
+            self._count -= drop
+            self.dropped += drop
+            used -= start
+        self._data[used:used + n] = points
+        self._count += 1
+        self._offsets[self._count] = used + n
+
+    def clear(self):
+        self._count = 0
+
+    def polylines(self):
+        """每条轨迹的 cv2.polylines 点数组列表（一次四舍五入后按 offsets 切开）"""
+        if self._count == 0:
+            return []
+        return np.split(polyline(self.points), self.offsets[1:-1])
+
+    def save(self, filename):
+        """全部点和 offsets 保存为 .npz"""
+        np.savez(filename, points=self.points, offsets=self.offsets)
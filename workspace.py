@@ -0,0 +1,57 @@
+#coding=utf-8
+"""
+检测中间缓冲：缩小图、HSV图、红绿掩模、形态学结果、连通域标签图等每帧都要用的整图缓冲集中在一个对象里，
+各步骤的 OpenCV 调用都通过 dst= 写进去，稳定运行时检测各步骤不再为图像分配内存
+  - 每块缓冲按名字保存，存储容量按协商的传感器输出分辨率（像素数 x 通道 x 字节）一次分配
+  - buffer() 返回存储开头部分 reshape 成所需形状的连续视图：预测窗口、飞行走廊、粗分辨率的检测图比容量小，
+    只换视图不重新分配；只有超过容量（输出分辨率变大）时才重新分配
+  - 同一个名字的缓冲在下一次 buffer() 之后内容失效，同时使用的缓冲要用不同的名字（分条处理时每条各用一组名字）
+  - 运动门控小图、亚像素小块等远小于整幅的缓冲用 full=False，按实际请求的大小分配，请求变大时才重新分配
+  - 每个名字缓存最近一次的视图，形状和dtype不变时直接返回（每帧调用二三十次，重新切片reshape的开销与小步骤相当）
+"""
+import numpy as np
+
+
+class DetectionWorkspace(object):
+    """
+    buffer(name, shape, dtype) 取缓冲视图，resize() 在输出分辨率改变时调用
+    统计：allocations 分配（含重新分配）次数、nbytes 所有缓冲的总字节数
+    """
+
+    def __init__(self, width=0, height=0):
+        self.pixels = width * height    # 容量按这个像素数分配（0为按第一次请求的尺寸）
+        self.allocations = 0
+        self._store = {}
+        self._views = {}                # 名字 -> 最近一次返回的视图
+
+    @property
+    def nbytes(self):
+        return sum(store.nbytes for store in self._store.values())
+
+    def resize(self, width, height):
+        """输出分辨率改变：像素数变大时丢弃已有存储（下一次 buffer() 按新容量分配）"""
+        if width * height > self.pixels:
+            self._store.clear()
+            self._views.clear()
+        self.pixels = width * height
+
+    def buffer(self, name, shape, dtype=np.uint8, full=True):
+        """名字为name、形状为shape（元组）的连续缓冲（内容未初始化），full=False 时容量只按本次请求的大小"""
+        view = self._views.get(name)
+        if view is not None and view.shape == shape and view.dtype == dtype:
+            return view
+        dtype = np.dtype(dtype)
+        size = int(np.prod(shape)) * dtype.itemsize
+        store = self._store.get(name)
+        if store is None or store.nbytes < size:
+            # 容量：协商分辨率下同样通道数和字节数的整幅图像
+            capacity = size
+            if full:
+                channels = int(np.prod(shape[2:])) if len(shape) > 2 else 1
+                capacity = max(size, self.pixels * channels * dtype.itemsize)
+            store = np.empty(capacity, np.uint8)
+            self._store[name] = store
+            self.allocations += 1
+        view = store[:size].view(dtype).reshape(shape)
+        self._views[name] = view
+        return view